@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Admission control in front of model inference and symptom analysis.
+
+Each resource (a model name, "symptoms", "batch") has a concurrency cap.
+Requests beyond the cap wait in a bounded queue that is served by
+priority first (interactive single predictions before bulk jobs), then
+fairly across users (whoever has the fewest requests running on that
+resource goes next), then in arrival order. Waiters get their queue
+position through a callback so pages can show it.
+
+A request is shed with a clear error instead of queued when the queue
+is full, when bulk work would take more than half of it, or when one
+user already has too many requests waiting; a queued request that is not
+admitted within its timeout is dropped too. Counters are exported as the
+medi_admission gauge (see telemetry.render_prometheus).
+
+Configuration:
+    MEDI_CONCURRENCY_LIMITS     per-resource caps as JSON, e.g. {"heart": 2, "symptoms": 8}
+    MEDI_ADMISSION_QUEUE        max waiting requests per resource (default: 32)
+    MEDI_ADMISSION_PER_USER     max waiting requests per user and resource (default: 4)
+    MEDI_ADMISSION_TIMEOUT      seconds a request may wait (default: 10)
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from telemetry import register_gauge
+
+INTERACTIVE, BULK = 0, 1
+
+DEFAULT_LIMIT = os.cpu_count() or 2
+LIMITS = {"batch": 1}
+LIMITS.update(json.loads(os.environ.get("MEDI_CONCURRENCY_LIMITS", "{}")))
+QUEUE_LIMIT = int(os.environ.get("MEDI_ADMISSION_QUEUE", "32"))
+PER_USER_LIMIT = int(os.environ.get("MEDI_ADMISSION_PER_USER", "4"))
+TIMEOUT = float(os.environ.get("MEDI_ADMISSION_TIMEOUT", "10"))
+
+_LABELS = {"symptoms": "symptom analysis", "batch": "batch screening"}
+
+
+class AdmissionError(RuntimeError):
+    """Base class for requests turned away by admission control."""
+
+
+class QueueFull(AdmissionError):
+    """The request was shed because too much work is already waiting."""
+
+
+class WaitTimeout(AdmissionError):
+    """The request waited in the queue longer than its timeout."""
+
+
+class Ticket:
+    """One request's place in a resource's queue."""
+
+    __slots__ = ("resource", "user", "priority", "seq", "granted")
+
+    def __init__(self, resource, user, priority, seq):
+        self.resource = resource
+        self.user = user
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+
+
+class AdmissionController:
+    """Concurrency caps plus a bounded, prioritized, per-user fair wait queue."""
+
+    def __init__(self, limits=None, queue_limit=QUEUE_LIMIT, per_user_limit=PER_USER_LIMIT,
+                 timeout=TIMEOUT, default_limit=DEFAULT_LIMIT):
+        self.limits = dict(LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.queue_limit = queue_limit
+        self.per_user_limit = per_user_limit
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._running = defaultdict(int)        # resource -> admitted and unfinished
+        self._user_running = defaultdict(int)   # (resource, user) -> admitted and unfinished
+        self._waiting = defaultdict(list)       # resource -> [Ticket]
+        self._counters = defaultdict(float)     # (resource, stat) -> total
+        self._fallback = {}                     # resource -> cap its callers use when none is configured
+
+    def limit(self, resource):
+        return self.limits.get(resource, self._fallback.get(resource, self.default_limit))
+
+    def _order_key(self, ticket):
+        return (ticket.priority, self._user_running[(ticket.resource, ticket.user)], ticket.seq)
+
+    def _position(self, ticket):
+        key = self._order_key(ticket)
+        return 1 + sum(self._order_key(t) < key for t in self._waiting[ticket.resource])
+
+    def _dispatch(self, resource):
+        waiting = self._waiting[resource]
+        while waiting and self._running[resource] < self.limit(resource):
+            ticket = min(waiting, key=self._order_key)
+            waiting.remove(ticket)
+            ticket.granted = True
+            self._running[resource] += 1
+            self._user_running[(resource, ticket.user)] += 1
+        self._cond.notify_all()
+
+    def _shed(self, resource, message):
+        self._counters[(resource, "rejected")] += 1
+        raise QueueFull(message)
+
+    def acquire(self, resource, user=None, priority=INTERACTIVE, timeout=None, on_wait=None, default_limit=None):
+        """Blocks until the request may run and returns its Ticket.
+
+        `on_wait(position)` is called, outside the lock, whenever the
+        request's 1-based queue position changes, and with 0 once it is
+        admitted after having waited. `default_limit` is the resource's
+        cap unless one is configured in `limits`.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        label = _LABELS.get(resource, f"the {resource} model")
+        t0 = time.monotonic()
+        with self._cond:
+            if default_limit is not None:
+                self._fallback[resource] = default_limit
+            waiting = self._waiting[resource]
+            # Shed before queueing: the queue is bounded, bulk work keeps half
+            # of it free for interactive requests, and no user can flood it
+            if len(waiting) >= self.queue_limit:
+                self._shed(resource, f"The server is at capacity for {label}. Please try again in a moment.")
+            if priority == BULK and len(waiting) >= self.queue_limit // 2:
+                self._shed(resource, f"Bulk jobs for {label} are paused while the server is busy. Please retry shortly.")
+            if sum(t.user == user for t in waiting) >= self.per_user_limit:
+                self._shed(resource, f"You already have {self.per_user_limit} requests waiting for {label}. "
+                                     "Please wait for them to finish.")
+            ticket = Ticket(resource, user, priority, next(self._seq))
+            waiting.append(ticket)
+            self._dispatch(resource)
+
+        shown = None
+        while True:
+            with self._cond:
+                while not ticket.granted and self._position(ticket) == shown:
+                    remaining = t0 + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting[resource].remove(ticket)
+                        self._counters[(resource, "timed_out")] += 1
+                        self._cond.notify_all()
+                        raise WaitTimeout(f"Still waiting for {label} after {timeout:g}s; "
+                                          "the request was cancelled. Please retry.")
+                    self._cond.wait(remaining)
+                if ticket.granted:
+                    self._counters[(resource, "admitted")] += 1
+                    self._counters[(resource, "wait_seconds")] += time.monotonic() - t0
+                    break
+                shown = self._position(ticket)
+            if on_wait is not None:
+                on_wait(shown)
+        if shown is not None and on_wait is not None:
+            on_wait(0)
+        return ticket
+
+    def release(self, ticket):
+        """Frees the ticket's slot and admits the next waiter."""
+        with self._cond:
+            self._running[ticket.resource] -= 1
+            self._user_running[(ticket.resource, ticket.user)] -= 1
+            self._dispatch(ticket.resource)
+
+    @contextmanager
+    def admit(self, resource, user=None, priority=INTERACTIVE, timeout=None, on_wait=None):
+        """Runs the with-block once admitted."""
+        ticket = self.acquire(resource, user, priority, timeout, on_wait)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        """{(resource, stat): value} for running/waiting/limit and the cumulative counters."""
+        with self._cond:
+            resources = set(self.limits) | set(self._fallback) | set(self._running) | {r for r, _ in self._counters}
+            result = dict(self._counters)
+            for resource in resources:
+                result[(resource, "running")] = self._running[resource]
+                result[(resource, "waiting")] = len(self._waiting[resource])
+                result[(resource, "limit")] = self.limit(resource)
+        return result
+
+
+_controller = None
+_lock = threading.Lock()
+
+
+def get_admission():
+    """Returns the process-wide admission controller, creating it on first use."""
+    global _controller
+    if _controller is None:
+        with _lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
+
+
+def admit(resource, user=None, priority=INTERACTIVE, timeout=None, on_wait=None):
+    """Admission through the shared controller, as a context manager."""
+    return get_admission().admit(resource, user, priority, timeout, on_wait)
+
+
+register_gauge(
+    "medi_admission", "Admission control: running, waiting and limit per resource, plus cumulative counters.",
+    lambda: {(("resource", r), ("stat", s)): v for (r, s), v in get_admission().stats().items()},
+)
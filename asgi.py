@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+ASGI entrypoint for Medi-Predictor.
+
+Serves the same app as `streamlit run eleventh.py`, plus long-lived
+immutable caching of the content-hashed static assets:
+
+    uvicorn asgi:app --port 8501
+"""
+
+import os
+
+import streamlit as st
+from starlette.middleware import Middleware
+
+from static_assets import CacheHeadersMiddleware
+
+app = st.App(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "eleventh.py"),
+    middleware=[Middleware(CacheHeadersMiddleware)],
+)
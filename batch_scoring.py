@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Batch scoring of patient tables for the three disease predictors.
+
+Input files (CSV or Parquet) are read in fixed-size chunks, validated
+against the model's feature order and scored one chunk at a time, so
+memory stays bounded regardless of the file size. Rows with a missing
+or non-numeric feature are not scored: their prediction is left empty
+(NA) and they are counted as invalid.
+
+Command line usage:
+    python batch_scoring.py diabetes patients.csv -o scored.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from model_registry import FEATURES
+from fastpath import get_scorer
+from admission import BULK
+from inference_executor import run_inference
+
+DEFAULT_CHUNKSIZE = 10_000
+# Seconds a single chunk may spend on the inference executor
+CHUNK_TIMEOUT = 120
+RESULT_COLUMN = "prediction"
+
+
+class SchemaError(ValueError):
+    """Raised when an input table does not match a model's features."""
+
+
+def detect_format(filename):
+    """Guesses 'csv' or 'parquet' from a file name."""
+    return 'parquet' if str(filename).lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def validate_columns(name, columns):
+    """Checks that every feature of the model is present in the table."""
+    missing = [col for col in FEATURES[name] if col not in set(columns)]
+    if missing:
+        raise SchemaError(
+            f"Missing {len(missing)} column(s) for the {name} model: {', '.join(missing)}"
+        )
+
+
+def read_chunks(source, fmt='csv', chunksize=DEFAULT_CHUNKSIZE):
+    """Yields DataFrames of at most `chunksize` rows from a CSV or Parquet source."""
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet support requires the 'pyarrow' package.")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def feature_matrix(name, chunk):
+    """(float matrix in training column order, mask of rows whose features are all numeric and finite)."""
+    X = chunk[FEATURES[name]].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    return X, np.isfinite(X).all(axis=1)
+
+
+def first_invalid(name, chunk):
+    """(position in the chunk, column) of the first row with a missing or non-numeric feature, or None."""
+    X, valid = feature_matrix(name, chunk)
+    if valid.all():
+        return None
+    row = int(np.flatnonzero(~valid)[0])
+    return row, FEATURES[name][int(np.flatnonzero(~np.isfinite(X[row]))[0])]
+
+
+def model_input(model, name, X):
+    """Wraps a feature matrix the way the model was fitted."""
+    # Models fitted on DataFrames expect named columns, the others a plain array
+    if hasattr(model, 'feature_names_in_'):
+        return pd.DataFrame(X, columns=FEATURES[name])
+    return X
+
+
+def score_chunks(name, chunks, model=None, user=None):
+    """Scores an iterable of DataFrames, yielding each one with a prediction column.
+
+    Without an explicit model, chunks run on the shared inference executor
+    through the prediction cache, so duplicate records are only scored once.
+    They are admitted as bulk work, behind interactive predictions.
+    Rows with a missing or non-numeric feature get NA instead of a prediction.
+    """
+    for chunk in chunks:
+        validate_columns(name, chunk.columns)
+        X, valid = feature_matrix(name, chunk)
+        result = pd.array([pd.NA] * len(chunk), dtype="Int64")
+        if valid.any():
+            if model is None:
+                preds = run_inference(name, X[valid].tolist(), timeout=CHUNK_TIMEOUT, user=user, priority=BULK)
+            else:
+                preds = model.predict(model_input(model, name, X[valid]))
+            result[valid] = np.asarray(preds, dtype=np.int64)
+        chunk[RESULT_COLUMN] = pd.Series(result, index=chunk.index)
+        yield chunk
+
+
+class _ParquetSink:
+    """Appends DataFrame chunks to a single Parquet file."""
+
+    def __init__(self, dest):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa, self._pq = pa, pq
+        self.dest = dest
+        self.writer = None
+
+    def write(self, chunk):
+        table = self._pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.dest, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def write_chunks(chunks, dest, out_fmt):
+    """Appends each DataFrame to `dest` (CSV or Parquet), yielding it once written."""
+    sink = _ParquetSink(dest) if out_fmt == 'parquet' else None
+    try:
+        for i, chunk in enumerate(chunks):
+            if sink is not None:
+                sink.write(chunk)
+            else:
+                chunk.to_csv(dest, header=(i == 0), index=False, mode='w' if i == 0 else 'a')
+            yield chunk
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+def score_file(name, source, dest, model=None, fmt=None, out_fmt=None,
+               chunksize=DEFAULT_CHUNKSIZE, user=None):
+    """Scores `source` into `dest` chunk by chunk and returns summary counts.
+
+    `dest` is a path or an open text handle (CSV) / binary handle (Parquet).
+    """
+    fmt = fmt or detect_format(getattr(source, 'name', source))
+    out_fmt = out_fmt or detect_format(getattr(dest, 'name', dest))
+    stats = {"rows": 0, "positive": 0, "invalid": 0, "first_invalid": None}
+    for chunk in write_chunks(score_chunks(name, read_chunks(source, fmt, chunksize), model, user), dest, out_fmt):
+        invalid = int(chunk[RESULT_COLUMN].isna().sum())
+        if invalid and stats["first_invalid"] is None:
+            row, column = first_invalid(name, chunk)
+            # 1-based data row, as counted below the header
+            stats["first_invalid"] = (stats["rows"] + row + 1, column)
+        stats["rows"] += len(chunk)
+        stats["positive"] += int(chunk[RESULT_COLUMN].sum())
+        stats["invalid"] += invalid
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a patient table with a Medi-Predictor model.")
+    parser.add_argument('model', choices=sorted(FEATURES), help="Which predictor to run")
+    parser.add_argument('input', help="CSV or Parquet file with one patient per row")
+    parser.add_argument('-o', '--output', required=True, help="Destination .csv or .parquet file")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows scored per vectorized call (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Score every row directly instead of through the prediction cache")
+    args = parser.parse_args(argv)
+
+    model = get_scorer(args.model) if args.no_cache else None
+    try:
+        stats = score_file(args.model, args.input, args.output, model=model, chunksize=args.chunksize)
+    except SchemaError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Scored {stats['rows']} rows ({stats['positive']} positive) -> {args.output}")
+    if stats["invalid"]:
+        row, column = stats["first_invalid"]
+        print(f"Warning: {stats['invalid']} row(s) with missing or non-numeric values were not scored "
+              f"(first: row {row}, column {column})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Offline microbenchmarks for Medi-Predictor hot paths.
+
+Covers model unpickling, artifact mapping, single-row and batched
+predict (sklearn and the NumPy fast path), the user store at
+1k/10k/100k accounts, prediction history queries at 100k/1M rows,
+symptom matching and typeahead search at growing catalog sizes, the
+chat glossary, and full script reruns of each page through Streamlit's
+AppTest harness.
+
+Results are written as JSON and can be compared against a stored
+baseline; any benchmark slower than the baseline by more than the
+threshold is reported and makes the run exit non-zero.
+
+    python bench.py                              # run everything
+    python bench.py --only predict --quick       # subset, fewer samples
+    python bench.py --save-baseline              # refresh bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(APP_DIR, 'bench_results.json')
+DEFAULT_BASELINE = os.path.join(APP_DIR, 'bench_baseline.json')
+
+BENCHMARKS = []
+
+
+def benchmark(group):
+    """Registers a generator of (name, callable) pairs under a group."""
+    def wrap(fn):
+        BENCHMARKS.append((group, fn))
+        return fn
+    return wrap
+
+
+def measure(fn, min_time=0.2, max_samples=2000, min_samples=5):
+    """Times fn() repeatedly; returns per-call statistics in microseconds."""
+    fn()  # warm-up
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_samples and (len(samples) < min_samples or time.perf_counter() < deadline):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        "n": len(samples),
+        "median_us": round(statistics.median(samples), 3),
+        "p95_us": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "min_us": round(samples[0], 3),
+    }
+
+
+# ---------------------------------------------------------
+#  MODELS
+# ---------------------------------------------------------
+@benchmark("unpickle")
+def bench_unpickle(quick):
+    from model_registry import MODEL_FILES, model_path
+    for name in MODEL_FILES:
+        path = model_path(name)
+
+        def load(path=path):
+            with open(path, 'rb') as f:
+                pickle.load(f)
+        yield f"unpickle[{name}]", load
+
+
+@benchmark("artifact")
+def bench_artifact(quick):
+    from model_registry import MODEL_FILES, get_loaded
+    from model_artifact import Artifact, export
+
+    tmp = tempfile.mkdtemp(prefix='medi-bench-')
+    try:
+        path = os.path.join(tmp, 'models.medi')
+        export({name: (get_loaded(name).model, get_loaded(name).sha256) for name in MODEL_FILES}, path)
+        for name in MODEL_FILES:
+            yield f"artifact_map[{name}]", lambda n=name: Artifact(path).scorer(n)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@benchmark("predict")
+def bench_predict(quick):
+    import numpy as np
+    from model_registry import FEATURES, get_model
+    from fastpath import compile_model, _named
+
+    rng = np.random.default_rng(0)
+    for name, features in FEATURES.items():
+        model = get_model(name)
+        scorer = compile_model(model)
+        batch = rng.normal(0.0, 1.0, (1000, len(features))) * 50
+        row = [list(batch[0])]
+        sk_row, sk_batch = _named(model, np.asarray(row)), _named(model, batch)
+        yield f"predict_single[{name}][sklearn]", lambda m=model, x=sk_row: m.predict(x)
+        yield f"predict_single[{name}][fastpath]", lambda s=scorer, x=row: s.predict(x)
+        yield f"predict_batch1000[{name}][sklearn]", lambda m=model, x=sk_batch: m.predict(x)
+        yield f"predict_batch1000[{name}][fastpath]", lambda s=scorer, x=batch: s.predict(x)
+
+
+# ---------------------------------------------------------
+#  USER STORE
+# ---------------------------------------------------------
+@benchmark("users")
+def bench_users(quick):
+    from user_store import SQLiteUserStore, load_users, save_users
+
+    tmp = tempfile.mkdtemp(prefix='medi-bench-')
+    try:
+        for size in ((1_000, 10_000) if quick else (1_000, 10_000, 100_000)):
+            users = {f"user{i}": {"name": f"User {i}", "password": "0" * 64} for i in range(size)}
+            json_path = os.path.join(tmp, f'users_{size}.json')
+            save_users(users, json_path)
+            yield f"load_users[json][{size}]", lambda p=json_path: load_users(p)
+            yield f"save_users[json][{size}]", lambda u=users, p=json_path: save_users(u, p)
+
+            store = SQLiteUserStore(os.path.join(tmp, f'users_{size}.sqlite3'))
+            store.add_many(users)
+            probe = [f"user{random.randrange(size)}" for _ in range(256)]
+            it = iter(range(10**9))
+            yield f"get_user[sqlite][{size}]", lambda s=store, p=probe: s.get(p[next(it) % len(p)])
+            yield f"add_user[sqlite][{size}]", lambda s=store: s.add(f"new{next(it)}", "New", "0" * 64)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@benchmark("history")
+def bench_history(quick):
+    from prediction_history import PredictionHistory
+
+    tmp = tempfile.mkdtemp(prefix='medi-bench-')
+    try:
+        history = PredictionHistory(os.path.join(tmp, 'history.sqlite3'))
+        models = ["diabetes", "heart", "parkinsons"]
+        stored = 0
+        for size in ((100_000,) if quick else (100_000, 1_000_000)):
+            conn = history._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO predictions (user, ts, seq, model, result, inputs) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((f"user{i % 1000}", 1_700_000_000_000_000 + i, i, models[i % 3], i % 2, "{}")
+                     for i in range(stored, size)),
+                )
+            stored = size
+            yield f"history_query[user][{size}]", lambda: history.query("user7")
+            yield f"history_query[user,model,limit50][{size}]", lambda: history.query("user7", model="heart", limit=50)
+        yield "history_record[enqueue]", lambda: history.record("bench", "heart", {"age": 50.0}, 1)
+        history.flush()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------------------------------------------------------
+#  SYMPTOM MATCHING & CHAT
+# ---------------------------------------------------------
+def synthetic_knowledge_base(n_diseases, symptoms_per_disease=6, seed=0):
+    from symptom_engine import KnowledgeBase
+
+    rng = random.Random(seed)
+    vocabulary = [f"Symptom {i}" for i in range(max(50, n_diseases * 2))]
+    severities = ["Critical", "High", "Medium", "Low"]
+    diseases = [{
+        "name": f"Condition {i}",
+        "symptoms": rng.sample(vocabulary, symptoms_per_disease),
+        "severity": rng.choice(severities),
+        "advice": "",
+    } for i in range(n_diseases)]
+    return KnowledgeBase(diseases), vocabulary
+
+
+@benchmark("symptoms")
+def bench_symptoms(quick):
+    from symptom_engine import load_knowledge_base
+
+    kb = load_knowledge_base()
+    selection = ["Nausea", "Fever", "Vomiting"]
+    yield "symptom_match[catalog=builtin]", lambda: kb.match(selection)
+    for size in ((100, 10_000) if quick else (100, 1_000, 10_000, 100_000)):
+        kb, vocabulary = synthetic_knowledge_base(size)
+        selection = vocabulary[:3]
+        yield f"symptom_match[catalog={size}]", lambda kb=kb, sel=selection: kb.match(sel)
+        yield f"symptom_match_weighted[catalog={size}]", lambda kb=kb, sel=selection: kb.match(sel, weighted=True)
+
+
+@benchmark("symptom_search")
+def bench_symptom_search(quick):
+    from symptom_search import SymptomIndex, get_symptom_index
+
+    index = get_symptom_index()
+    yield "symptom_search[builtin][shaking]", lambda: index.search("shaking")
+    yield "symptom_search[builtin][typo]", lambda: index.search("diarhea")
+    rng = random.Random(0)
+    for size in ((1_000, 10_000) if quick else (1_000, 10_000, 50_000)):
+        vocabulary = [f"symptom {i} {rng.choice(['ache', 'pain', 'swelling', 'rash', 'numbness'])}" for i in range(size)]
+        synonyms = {s: [f"lay term {i}"] for i, s in enumerate(vocabulary)}
+        big = SymptomIndex(vocabulary, synonyms)
+        yield f"symptom_search[vocab={size}][prefix]", lambda ix=big: ix.search("sympt")
+        yield f"symptom_search[vocab={size}][typo]", lambda ix=big, q=f"symtpom {size // 2} pain": ix.search(q)
+
+
+@benchmark("chat")
+def bench_chat(quick):
+    import glossary
+
+    queries = ["What is BMI?", "Explain Glucose", "hello there", "tell me about my chip",
+               "What are Chest Pain types?", "is my resting blood pressure too high"]
+    it = iter(range(10**9))
+    yield "get_health_response[cached]", lambda: glossary.get_health_response(queries[next(it) % len(queries)])
+
+    def uncached():
+        glossary._answer.cache_clear()
+        glossary.get_health_response(queries[next(it) % len(queries)])
+    yield "get_health_response[uncached]", uncached
+
+
+# ---------------------------------------------------------
+#  FULL RERUNS
+# ---------------------------------------------------------
+PAGES = ['Home Dashboard', '🔍 Symptom Checker', '🩸 Diabetes Check', '💓 Heart Disease Check', '🧠 Parkinsons Check',
+         '🩺 Full Screening', '📈 My History']
+
+
+@benchmark("rerun")
+def bench_rerun(quick):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("  streamlit.testing unavailable; skipping rerun benchmarks", file=sys.stderr)
+        return
+
+    # Keep the app's user and history databases out of the working directory,
+    # even when the environment points the app at the real ones
+    tmp = tempfile.mkdtemp(prefix='medi-bench-')
+    os.environ["MEDI_USER_DB"] = os.path.join(tmp, 'users.sqlite3')
+    os.environ["MEDI_HISTORY_DB"] = os.path.join(tmp, 'history.sqlite3')
+    try:
+        script = os.path.join(APP_DIR, 'eleventh.py')
+        login = AppTest.from_file(script, default_timeout=60)
+        yield "rerun[login]", lambda: login.run()
+
+        for page in PAGES:
+            app = AppTest.from_file(script, default_timeout=60)
+            app.session_state['logged_in'] = True
+            app.session_state['user_name'] = "Bench"
+            app.run()
+            app.sidebar.radio[0].set_value(page)
+            yield f"rerun[{page}]", lambda app=app: app.run()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------------------------------------------------------
+#  RUNNER
+# ---------------------------------------------------------
+def run(only=None, quick=False):
+    results = {}
+    min_time = 0.05 if quick else 0.2
+    for group, gen in BENCHMARKS:
+        if only and not any(o in group for o in only):
+            continue
+        print(f"[{group}]")
+        try:
+            for name, fn in gen(quick):
+                stats = measure(fn, min_time=min_time, max_samples=200 if quick else 2000)
+                results[name] = stats
+                print(f"  {name:<48} median {stats['median_us']:>12.2f} us   p95 {stats['p95_us']:>12.2f} us")
+        except ImportError as e:
+            print(f"  skipped: {e}", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns [(name, base_us, now_us, ratio)] for benchmarks slower than the baseline."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_us"):
+            continue
+        ratio = stats["median_us"] / base["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median_us"], stats["median_us"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Medi-Predictor microbenchmarks.")
+    parser.add_argument('--only', action='append', help="Run only groups containing this text (repeatable)")
+    parser.add_argument('--quick', action='store_true', help="Fewer samples and smaller sizes")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results to the baseline file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, APP_DIR)
+    results = run(args.only, args.quick)
+    report = {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, base, now, ratio in regressions:
+            print(f"REGRESSION {name}: {base:.2f} us -> {now:.2f} us ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
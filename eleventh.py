@@ -5,13 +5,22 @@ Created on Tue Oct  7 21:17:49 2025
 @author: Ishita
 """
 
-import pickle
 import streamlit as st
 import random
 import time
-import json
 import os
 import hashlib
+import tempfile
+
+import static_assets
+import warmup
+from telemetry import PageTimer, begin_rerun, end_rerun, span, start_metrics_server, start_span, summary as timing_summary
+from user_store import get_user_store
+from prediction_history import get_prediction_history
+from evaluation import latest_results
+from symptom_engine import get_knowledge_base
+from glossary import get_health_response
+from session_memory import CHAT_PAGE_SIZE, ChatHistory, state_footprint
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -21,116 +30,25 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Tracing spans are no-ops unless MEDI_TRACING=1; /metrics is served when MEDI_METRICS_PORT is set
+begin_rerun()
+start_metrics_server()
+
+# Heavy ML imports and model loading happen once per process, off the login path
+warmup.start()
+
 # --- CUSTOM CSS FOR DARK BLUE GLASSMORPHISM THEME ---
-page_bg_css = """
-<style>
-/* --- MAIN BACKGROUND --- */
-[data-testid="stAppViewContainer"] {
-    background-image: linear-gradient(180deg, #000428, #004e92);
-    color: #ffffff;
-    font-family: 'Segoe UI', sans-serif;
-}
-
-/* --- SIDEBAR BACKGROUND --- */
-[data-testid="stSidebar"] {
-    background-image: linear-gradient(180deg, #004e92, #000428);
-    border-right: 1px solid rgba(255, 255, 255, 0.1);
-}
-
-/* --- GLASSMORPHISM CARDS & INPUTS --- */
-div[data-baseweb="input"] > div, 
-div[data-baseweb="select"] > div, 
-div[data-testid="stMarkdownContainer"] > div,
-div[data-testid="stMetricValue"] {
-    background-color: rgba(255, 255, 255, 0.05) !important;
-    backdrop-filter: blur(10px);
-    border: 1px solid rgba(255, 255, 255, 0.1);
-    border-radius: 10px;
-    color: white !important;
-}
-
-/* --- TABS STYLING --- */
-button[data-baseweb="tab"] {
-    background-color: transparent !important;
-    color: #e0e0e0 !important;
-    font-weight: 600;
-}
-button[data-baseweb="tab"][aria-selected="true"] {
-    color: #00d2ff !important;
-    border-bottom: 2px solid #00d2ff !important;
-}
-
-/* --- HEADERS --- */
-h1, h2, h3 {
-    color: #00d2ff !important; /* Neon Cyan for pop */
-    text-shadow: 0 0 10px rgba(0, 210, 255, 0.3);
-    font-weight: 600;
-}
-
-p, label, li, span {
-    color: #e0e0e0 !important;
-}
-
-/* --- ANIMATED BUTTONS --- */
-div.stButton > button {
-    background: linear-gradient(45deg, #007bff, #00c6ff);
-    color: white;
-    border-radius: 12px;
-    border: none;
-    padding: 12px 28px;
-    font-size: 16px;
-    font-weight: bold;
-    box-shadow: 0 4px 15px rgba(0, 198, 255, 0.3);
-    transition: all 0.3s ease;
-    width: 100%;
-}
-
-div.stButton > button:hover {
-    transform: translateY(-3px);
-    box-shadow: 0 8px 25px rgba(0, 198, 255, 0.6);
-}
-
-/* --- SUCCESS/ERROR BOX STYLING --- */
-div[data-testid="stAlert"] {
-    background-color: rgba(255, 255, 255, 0.1);
-    backdrop-filter: blur(10px);
-    border-radius: 10px;
-}
-
-/* --- MULTI-SELECT TAGS --- */
-span[data-baseweb="tag"] {
-    background-color: #007bff !important;
-}
-
-/* --- EXPANDER HEADER --- */
-.streamlit-expanderHeader {
-    color: #00d2ff !important;
-    font-weight: bold;
-}
-</style>
-"""
-st.markdown(page_bg_css, unsafe_allow_html=True)
+# The stylesheet (assets/medi.css) and logo are served locally under content-hash
+# names, so each rerun only sends a short tag and the browser caches the files
+with span("css_injection"):
+    st.markdown(static_assets.stylesheet_tag(), unsafe_allow_html=True)
 
 
 # =========================================================
-#  AUTHENTICATION FUNCTIONS (JSON DB & HASHING)
+#  AUTHENTICATION FUNCTIONS (USER STORE & HASHING)
 # =========================================================
-DB_FILE = 'user_db.json'
-
-def load_users():
-    """Loads users from JSON file. If not exists, returns empty dict."""
-    if not os.path.exists(DB_FILE):
-        return {}
-    try:
-        with open(DB_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {}
-
-def save_users(users):
-    """Saves users to JSON file."""
-    with open(DB_FILE, 'w') as f:
-        json.dump(users, f)
+# Accounts live in an indexed SQLite store shared by all sessions
+user_store = get_user_store()
 
 def make_hashes(password):
     """Hashes password using SHA256."""
@@ -154,7 +72,7 @@ def login_page():
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col2:
-        st.image("https://cdn-icons-png.flaticon.com/512/3004/3004458.png", width=80)
+        st.markdown(static_assets.image_tag("logo.svg", width=80, alt="Medi-Predictor"), unsafe_allow_html=True)
         st.title("Medi-Predictor")
         st.markdown("##### Secure Access Portal")
         
@@ -167,13 +85,17 @@ def login_page():
             password = st.text_input("Password", type="password", key="login_pass")
             
             if st.button("Log In"):
-                users = load_users()
-                if username in users:
-                    if check_hashes(password, users[username]['password']):
+                with span("auth", step="lookup"):
+                    user = user_store.get(username)
+                if user is not None:
+                    with span("auth", step="check_hashes"):
+                        password_ok = check_hashes(password, user['password'])
+                    if password_ok:
                         st.session_state['logged_in'] = True
-                        st.session_state['user_name'] = users[username]['name']
-                        st.success(f"Welcome back, {users[username]['name']}!")
-                        time.sleep(1)
+                        st.session_state['user_name'] = user['name']
+                        st.session_state['username'] = username
+                        # A toast survives the rerun, so the greeting needs no pause
+                        st.toast(f"Welcome back, {user['name']}!", icon="👋")
                         st.rerun()
                     else:
                         st.error("Incorrect Password")
@@ -188,20 +110,14 @@ def login_page():
             confirm_pass = st.text_input("Confirm Password", type="password")
             
             if st.button("Create Account"):
-                users = load_users()
-                if new_user in users:
-                    st.warning("Username already exists. Please choose another.")
-                elif new_pass != confirm_pass:
+                if new_pass != confirm_pass:
                     st.warning("Passwords do not match.")
                 elif not new_user or not new_pass or not new_name:
                     st.warning("Please fill in all fields.")
+                # Insert is atomic, so two concurrent signups cannot both claim a name
+                elif not user_store.add(new_user, new_name, make_hashes(new_pass)):
+                    st.warning("Username already exists. Please choose another.")
                 else:
-                    # Save new user
-                    users[new_user] = {
-                        "name": new_name,
-                        "password": make_hashes(new_pass)
-                    }
-                    save_users(users)
                     st.success("Account created successfully! You can now Login.")
 
 # =========================================================
@@ -210,21 +126,100 @@ def login_page():
 
 if not st.session_state['logged_in']:
     login_page()
+    end_rerun('Login')
 else:
     # --- LOGGED IN USER INTERFACE ---
+    # numpy/pandas/sklearn are only needed past the login screen
+    from model_registry import FEATURES, get_loaded
+    from fastpath import get_scorer
+    from prediction_cache import prediction_cache
+    from admission import BULK, AdmissionError, admit
+    from inference_executor import InferenceError, run_inference
+    from batch_scoring import SchemaError, detect_format, score_file
+    from voice_features import VoiceAnalysisError, analyze as analyze_voice
+    from symptom_search import get_symptom_index
+    from screening import PROFILE_FIELDS, screen, screen_file
+    import pandas as pd
     
-    # Load Models
-    try:
-        diabetes_model = pickle.load(open('C:/Users/Ishita/OneDrive/Desktop/Multiple diswease prediction system/Saved models/trained_model.sav', 'rb'))
-        heart_disease_model = pickle.load(open('C:/Users/Ishita/OneDrive/Desktop/Multiple diswease prediction system/Saved models/heart_disease_model.sav', 'rb'))
-        parkinsons_model = pickle.load(open('C:/Users/Ishita/OneDrive/Desktop/Multiple diswease prediction system/Saved models/parkinsons_model.sav', 'rb'))
-    except FileNotFoundError:
-        st.warning("⚠️ Model files not found. Please check your file paths.")
-        pass
+    # Models are loaded lazily by each prediction page from the shared registry;
+    # predictions run on the shared inference executor behind the result cache
+    # Every interactive prediction is kept per user; writes happen on a background thread
+    history = get_prediction_history()
+    current_user = st.session_state.get('username') or st.session_state['user_name']
+
+    def record_prediction(model, inputs, prediction, version=None):
+        history.record(current_user, model, dict(zip(FEATURES[model], map(float, inputs))), prediction[0], version=version)
+
+    def queue_status():
+        """Placeholder plus callback showing this session's place in the admission queue."""
+        notice = st.empty()
+
+        def show(position):
+            st.session_state['queue_position'] = position
+            if position:
+                notice.info(f"⏳ High demand right now: you are number {position} in the queue.")
+            else:
+                notice.empty()
+        return show
+
+    def predict_for_user(name, rows):
+        """Interactive prediction admitted for the current user; returns (predictions, model version)."""
+        return run_inference(name, rows, versioned=True, user=current_user, on_wait=queue_status())
+
+    def load_page_model(name):
+        """Loads (or reuses) a model and its compiled scorer, warning if the file is missing."""
+        try:
+            with span("model_load", model=name):
+                return get_scorer(name)
+        except FileNotFoundError:
+            st.warning("⚠️ Model files not found. Please check your file paths.")
+            return None
+
+    def result_spool(key):
+        """Fresh on-disk file for a batch result, replacing this session's previous one."""
+        previous = st.session_state.pop(key, None)
+        if previous and os.path.exists(previous):
+            os.remove(previous)
+        fd, path = tempfile.mkstemp(prefix='medi-batch-', suffix='.csv')
+        os.close(fd)
+        st.session_state[key] = path
+        return path
+
+    def download_results(path, file_name, key):
+        """Download button that reads the spooled file only when clicked."""
+        st.download_button("⬇️ Download Results", lambda: open(path, 'rb'), file_name=file_name, mime="text/csv", key=key)
+
+    @st.fragment
+    def batch_upload_section(name):
+        """Scores an uploaded patient table and offers the results for download."""
+        with st.expander("📂 Batch Screening (CSV / Parquet)"):
+            st.caption(f"Required columns ({len(FEATURES[name])}): " + ", ".join(FEATURES[name]))
+            upload = st.file_uploader("Upload patient records", type=["csv", "parquet"], key=f"{name}_batch_file")
+            if upload is not None and st.button("Score File", key=f"{name}_batch_button"):
+                with st.spinner("Scoring records..."):
+                    try:
+                        # Results are spooled to disk chunk by chunk instead of built in memory;
+                        # batch jobs queue behind interactive predictions
+                        path = result_spool(f"{name}_batch_result")
+                        with open(path, 'w', newline='') as out, \
+                                admit('batch', current_user, priority=BULK, on_wait=queue_status()):
+                            stats = score_file(name, upload, out, fmt=detect_format(upload.name), out_fmt='csv', user=current_user)
+                        st.success(f"Scored {stats['rows']} records: {stats['positive']} flagged as at risk.")
+                        if stats['invalid']:
+                            row, column = stats['first_invalid']
+                            st.warning(f"{stats['invalid']} record(s) with missing or non-numeric values were not scored "
+                                       f"(first: row {row}, column {column}); their prediction is left empty.")
+                        download_results(path, f"{name}_predictions.csv", f"{name}_batch_download")
+                    except SchemaError as e:
+                        st.error(f"Invalid file: {e}")
+                    except (AdmissionError, InferenceError) as e:
+                        st.error(f"⏳ {e}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
 
     # --- SIDEBAR NAVIGATION ---
     with st.sidebar:
-        st.image("https://cdn-icons-png.flaticon.com/512/3004/3004458.png", width=70) 
+        st.markdown(static_assets.image_tag("logo.svg", width=70, alt="Medi-Predictor"), unsafe_allow_html=True)
         st.title("Medi-Predictor")
         
         # Personal Greeting in Sidebar
@@ -233,18 +228,26 @@ else:
         
         selected = st.radio(
             "Navigate System:",
-            ['Home Dashboard', '🔍 Symptom Checker', '🩸 Diabetes Check', '💓 Heart Disease Check', '🧠 Parkinsons Check'],
+            ['Home Dashboard', '🔍 Symptom Checker', '🩸 Diabetes Check', '💓 Heart Disease Check', '🧠 Parkinsons Check', '🩺 Full Screening', '📈 My History'],
             index=0
         )
         
+        show_timing = st.checkbox("⏱️ Timing debug panel", value=os.environ.get("MEDI_DEBUG_TIMING") == "1")
+        show_memory = st.checkbox("🧮 Session memory panel")
+
         st.markdown("---")
         if st.button("🔒 Log Out"):
             st.session_state['logged_in'] = False
             st.session_state['user_name'] = ""
+            st.session_state['username'] = ""
             st.rerun()
             
         st.caption("v3.3 | Secure Medical AI")
 
+    # Measures feature assembly, inference and render time for this rerun
+    timer = PageTimer(selected)
+    render_span = start_span("page_render", page=selected)
+
 
     # --- HOME DASHBOARD ---
     if selected == 'Home Dashboard':
@@ -255,14 +258,33 @@ else:
         
         st.markdown("---")
         
-        # Dashboard Metrics
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric(label="Diabetes Model", value="Active", delta="Accuracy: 98%")
-        with col2:
-            st.metric(label="Heart Disease Model", value="Active", delta="Accuracy: 95%")
-        with col3:
-            st.metric(label="Parkinsons Model", value="Active", delta="Accuracy: 94%")
+        # Dashboard Metrics, read from cached offline evaluations (python evaluation.py)
+        with timer.stage("metrics"):
+            # The registry swaps in changed model files in the background
+            active = {}
+            for name in FEATURES:
+                try:
+                    active[name] = get_loaded(name)
+                except FileNotFoundError:
+                    pass
+            evaluations = latest_results({name: loaded.sha256 for name, loaded in active.items()})
+
+        cols = st.columns(3)
+        for col, (name, label) in zip(cols, [('diabetes', "Diabetes Model"), ('heart', "Heart Disease Model"), ('parkinsons', "Parkinsons Model")]):
+            with col:
+                if name not in active:
+                    st.metric(label=label, value="Missing", delta="Model file not found", delta_color="off")
+                    continue
+                loaded = active[name]
+                result = evaluations[name]
+                if result is None:
+                    st.metric(label=label, value="Active", delta="Not evaluated", delta_color="off")
+                else:
+                    st.metric(label=label, value="Active", delta=f"Accuracy: {result['accuracy']:.0%}")
+                    auc = "n/a" if result['roc_auc'] is None else f"{result['roc_auc']:.3f}"
+                    st.caption(f"Precision {result['precision']:.0%} · Recall {result['recall']:.0%} · AUC {auc} · "
+                               f"{result['rows']:,} holdout rows")
+                st.caption(f"Version `{loaded.version}` · loaded {time.strftime('%Y-%m-%d %H:%M', time.localtime(loaded.loaded_at))}")
             
         st.markdown("---")
         st.info("✨ **Update:** The Symptom Checker now includes Emergency Triage logic.")
@@ -293,72 +315,36 @@ else:
 
         st.markdown("#### 2. Add Symptoms")
         
-        disease_db = {
-            "Heart Attack (Myocardial Infarction)": {
-                "symptoms": ["Chest Pain", "Shortness of Breath", "Pain in Left Arm", "Sweating", "Nausea", "Lightheadedness"],
-                "severity": "Critical",
-                "advice": "🚑 **CALL EMERGENCY SERVICES IMMEDIATELY.** Do not drive yourself to the hospital."
-            },
-            "Stroke": {
-                "symptoms": ["Sudden Numbness", "Slurred Speech", "Confusion", "Vision Trouble", "Severe Headache", "Balance Loss"],
-                "severity": "Critical",
-                "advice": "🚑 **CALL EMERGENCY SERVICES.** Time is brain. Note the time symptoms started."
-            },
-            "Appendicitis": {
-                "symptoms": ["Sharp Pain Lower Right Abdomen", "Nausea", "Vomiting", "Fever", "Loss of Appetite"],
-                "severity": "High",
-                "advice": "🏥 **Seek Immediate Medical Care.** Appendicitis requires urgent evaluation."
-            },
-            "Kidney Stones": {
-                "symptoms": ["Severe Side/Back Pain", "Blood in Urine", "Nausea", "Vomiting", "Fever", "Painful Urination"],
-                "severity": "High",
-                "advice": "🏥 **Consult a Doctor.** Severe pain may require ER visit for pain management."
-            },
-            "Diabetes (Type 2)": {
-                "symptoms": ["Increased Thirst", "Frequent Urination", "Unexplained Weight Loss", "Extreme Hunger", "Blurred Vision", "Fatigue"],
-                "severity": "Medium",
-                "advice": "🩺 **See a Doctor.** Use the **Diabetes Check** tool in the sidebar for a risk calculation."
-            },
-            "COVID-19": {
-                "symptoms": ["Fever", "Dry Cough", "Loss of Taste/Smell", "Shortness of Breath", "Fatigue", "Sore Throat"],
-                "severity": "Medium",
-                "advice": "🏠 **Self-Isolate & Test.** Monitor breathing. Seek care if breathing becomes difficult."
-            },
-            "Migraine": {
-                "symptoms": ["Severe Pulsing Headache", "Sensitivity to Light", "Sensitivity to Sound", "Nausea", "Visual Aura"],
-                "severity": "Medium",
-                "advice": "💊 **Rest in a dark room.** Take over-the-counter pain relief. Consult a neurologist if frequent."
-            },
-            "Gastroenteritis (Stomach Flu)": {
-                "symptoms": ["Watery Diarrhea", "Abdominal Cramps", "Nausea", "Vomiting", "Low Fever"],
-                "severity": "Low",
-                "advice": "💧 **Stay Hydrated.** Drink electrolytes. See a doctor if dehydration signs appear."
-            },
-            "Common Cold": {
-                "symptoms": ["Sneezing", "Runny Nose", "Sore Throat", "Mild Cough", "Low Fever", "Watery Eyes"],
-                "severity": "Low",
-                "advice": "🛌 **Rest & Fluids.** Symptoms usually resolve in 7-10 days."
-            },
-            "Anxiety/Panic Attack": {
-                "symptoms": ["Rapid Heart Rate", "Fear of Doom", "Sweating", "Trembling", "Shortness of Breath", "Chest Tightness"],
-                "severity": "Medium",
-                "advice": "🧘 **Deep Breathing.** If new symptoms, rule out heart issues first. Consult a mental health professional."
-            },
-            "Parkinson's Disease": {
-                "symptoms": ["Tremors (Shaking)", "Slowed Movement", "Rigid Muscles", "Changes in Speech", "Impaired Balance"],
-                "severity": "Medium",
-                "advice": "🧠 **Neurologist Consultation.** Use the **Parkinsons Check** tool in the sidebar."
-            }
-        }
-        
-        all_symptoms = sorted(list(set([sym for data in disease_db.values() for sym in data["symptoms"]])))
-        
+        # Knowledge base and search index are built once per process
+        knowledge_base = get_knowledge_base()
+        symptom_index = get_symptom_index()
+        all_symptoms = knowledge_base.all_symptoms
+        st.session_state.setdefault('symptom_selection', [])
+
+        def add_symptom(symptom):
+            if symptom not in st.session_state['symptom_selection']:
+                st.session_state['symptom_selection'] = st.session_state['symptom_selection'] + [symptom]
+
+        query = st.text_input("Describe a symptom", placeholder="e.g. shaking, tummy ache, short of breath")
+        if query:
+            with timer.stage("search"), span("symptom_search"):
+                suggestions = symptom_index.search(query, limit=6)
+            if not suggestions:
+                st.caption("No matching symptom found. Try different words.")
+            for i, hit in enumerate(suggestions):
+                label = hit['symptom'] if hit['matched'] == hit['symptom'] else f"{hit['symptom']}  ·  \"{hit['matched']}\""
+                st.button(f"➕ {label}", key=f"suggest_{i}", on_click=add_symptom, args=(hit['symptom'],))
+
+        # Large vocabularies are only reachable through search; the list shows the selection
         selected_symptoms = st.multiselect(
             "What are you experiencing?",
-            all_symptoms,
+            all_symptoms if len(all_symptoms) <= 500 else sorted(st.session_state['symptom_selection']),
+            key='symptom_selection',
             placeholder="Search symptoms (e.g., Chest Pain, Fever, Tremors...)"
         )
         
+        weight_by_severity = st.checkbox("Prioritize by severity", help="Rank urgent conditions higher when match counts are close")
+        
         st.markdown("")
         
         if st.button("🔍 Analyze Condition"):
@@ -366,282 +352,583 @@ else:
                 st.warning("Please select at least one symptom.")
             else:
                 with st.spinner("Comparing against medical guidelines..."):
-                    time.sleep(1.5)
+                    with timer.stage("matching"), span("symptom_match"):
+                        try:
+                            with admit('symptoms', current_user, on_wait=queue_status()):
+                                results = knowledge_base.match(selected_symptoms, top_k=4, weighted=weight_by_severity)
+                        except AdmissionError as e:
+                            results, busy = None, e
                     
-                    results = []
-                    for disease, data in disease_db.items():
-                        matched = set(selected_symptoms).intersection(data["symptoms"])
-                        match_count = len(matched)
-                        if match_count > 0:
-                            results.append({
-                                "disease": disease,
-                                "score": match_count,
-                                "matched_symptoms": list(matched),
-                                "severity": data["severity"],
-                                "advice": data["advice"]
-                            })
-                    
-                    results.sort(key=lambda x: x["score"], reverse=True)
-                    
-                    if not results:
-                        st.info("No exact match found. Please consult a General Physician.")
-                    else:
-                        top_result = results[0]
+                    with timer.stage("render"):
+                        if results is None:
+                            st.error(f"⏳ {busy}")
+                        elif not results:
+                            st.info("No exact match found. Please consult a General Physician.")
+                        else:
+                            top_result = results[0]
                         
-                        st.markdown("### 📋 Analysis Result")
+                            st.markdown("### 📋 Analysis Result")
                         
-                        severity_color = "green"
-                        if top_result["severity"] == "Critical": severity_color = "red"
-                        elif top_result["severity"] == "High": severity_color = "orange"
-                        elif top_result["severity"] == "Medium": severity_color = "gold"
+                            severity_color = "green"
+                            if top_result["severity"] == "Critical": severity_color = "red"
+                            elif top_result["severity"] == "High": severity_color = "orange"
+                            elif top_result["severity"] == "Medium": severity_color = "gold"
                         
-                        with st.container():
-                            c1, c2 = st.columns([3, 1])
-                            with c1:
-                                st.markdown(f"## **{top_result['disease']}**")
-                                st.caption(f"Based on matching **{top_result['score']}** symptoms.")
-                            with c2:
-                                st.markdown(f":{severity_color}[**{top_result['severity'].upper()} PRIORITY**]")
+                            with st.container():
+                                c1, c2 = st.columns([3, 1])
+                                with c1:
+                                    st.markdown(f"## **{top_result['disease']}**")
+                                    st.caption(f"Based on matching **{top_result['score']}** symptoms.")
+                                with c2:
+                                    st.markdown(f":{severity_color}[**{top_result['severity'].upper()} PRIORITY**]")
                         
-                        st.progress(min(top_result['score'] / 4, 1.0))
-                        st.info(f"**Recommended Action:**\n\n{top_result['advice']}")
-                        st.markdown(f"**Symptoms Matched:** {', '.join(top_result['matched_symptoms'])}")
+                            st.progress(min(top_result['score'] / 4, 1.0))
+                            st.info(f"**Recommended Action:**\n\n{top_result['advice']}")
+                            st.markdown(f"**Symptoms Matched:** {', '.join(top_result['matched_symptoms'])}")
                         
-                        if top_result['disease'] == "Diabetes (Type 2)":
-                            st.markdown("[Go to Diabetes Tool](#diabetes-check)")
-                        elif top_result['disease'] == "Heart Attack (Myocardial Infarction)":
-                            st.markdown("[Go to Heart Disease Risk Tool](#heart-disease-check)")
+                            if top_result['disease'] == "Diabetes (Type 2)":
+                                st.markdown("[Go to Diabetes Tool](#diabetes-check)")
+                            elif top_result['disease'] == "Heart Attack (Myocardial Infarction)":
+                                st.markdown("[Go to Heart Disease Risk Tool](#heart-disease-check)")
                         
-                        if len(results) > 1:
-                            with st.expander("View other possible causes"):
-                                for res in results[1:4]:
-                                    st.markdown(f"**{res['disease']}** ({res['score']} matches) - *{res['severity']}*")
+                            if len(results) > 1:
+                                with st.expander("View other possible causes"):
+                                    for res in results[1:4]:
+                                        st.markdown(f"**{res['disease']}** ({res['score']} matches) - *{res['severity']}*")
 
 
     # --- DIABETES PREDICTION PAGE ---
     elif selected == '🩸 Diabetes Check':
 
         st.title('🩸 Diabetes Risk Prediction')
+        load_page_model('diabetes')
         st.markdown("Enter clinical data to assess Type 2 Diabetes risk.")
 
-        tab1, tab2 = st.tabs(["👤 Patient Profile", "🧪 Clinical Vitals"])
-
-        with tab1:
-            col1, col2 = st.columns(2)
-            with col1:
-                Pregnancies = st.number_input('Number of Pregnancies', min_value=0, max_value=20, step=1)
-                Age = st.number_input('Age (Years)', min_value=0, max_value=120, step=1)
-            with col2:
-                BMI = st.number_input('BMI (Body Mass Index)', min_value=0.0, max_value=70.0, step=0.1)
-                DiabetesPedigreeFunction = st.number_input('Pedigree Function', min_value=0.0, max_value=2.5, step=0.01, help="Family history score")
-
-        with tab2:
-            col1, col2 = st.columns(2)
-            with col1:
-                Glucose = st.number_input('Glucose Level (mg/dL)', min_value=0, max_value=300, step=1)
-                BloodPressure = st.number_input('Blood Pressure (mm Hg)', min_value=0, max_value=200, step=1)
-            with col2:
-                Insulin = st.number_input('Insulin Level (mu U/ml)', min_value=0, max_value=1000, step=1)
-                SkinThickness = st.number_input('Skin Thickness (mm)', min_value=0, max_value=100, step=1)
-
-        st.markdown("")
-        if st.button('Analyze Risk', key='diabetes_button'):
-            with st.spinner('Processing...'):
-                time.sleep(1)
-                try:
-                    user_input = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness), float(Insulin), float(BMI), float(DiabetesPedigreeFunction), float(Age)]
-                    diabetes_prediction = diabetes_model.predict([user_input])
-                    
-                    if diabetes_prediction[0] == 1:
-                        st.error('### Result: Positive for Diabetes Risk')
-                        st.toast("Alert: High Risk Detected", icon="⚠️")
-                        st.markdown("The model has identified patterns consistent with diabetes.")
-                    else:
-                        st.success('### Result: Negative (Healthy)')
-                        st.toast("Analysis Result: Healthy", icon="✅")
-                        st.markdown("No significant risk factors identified.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
+        @st.fragment
+        def diabetes_form():
+            """Clinical-data form and its result region."""
+            # Widgets are batched in a form, so editing them triggers no rerun;
+            # submitting reruns only this fragment
+            timer = PageTimer('🩸 Diabetes Check [form]')
+            with st.form('diabetes_form'):
+                tab1, tab2 = st.tabs(["👤 Patient Profile", "🧪 Clinical Vitals"])
+
+                with tab1:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        Pregnancies = st.number_input('Number of Pregnancies', min_value=0, max_value=20, step=1)
+                        Age = st.number_input('Age (Years)', min_value=0, max_value=120, step=1)
+                    with col2:
+                        BMI = st.number_input('BMI (Body Mass Index)', min_value=0.0, max_value=70.0, step=0.1)
+                        DiabetesPedigreeFunction = st.number_input('Pedigree Function', min_value=0.0, max_value=2.5, step=0.01, help="Family history score")
+
+                with tab2:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        Glucose = st.number_input('Glucose Level (mg/dL)', min_value=0, max_value=300, step=1)
+                        BloodPressure = st.number_input('Blood Pressure (mm Hg)', min_value=0, max_value=200, step=1)
+                    with col2:
+                        Insulin = st.number_input('Insulin Level (mu U/ml)', min_value=0, max_value=1000, step=1)
+                        SkinThickness = st.number_input('Skin Thickness (mm)', min_value=0, max_value=100, step=1)
+
+                st.markdown("")
+                submitted = st.form_submit_button('Analyze Risk')
+            if submitted:
+                with st.spinner('Processing...'):
+                    try:
+                        with timer.stage("features"):
+                            user_input = [float(Pregnancies), float(Glucose), float(BloodPressure), float(SkinThickness), float(Insulin), float(BMI), float(DiabetesPedigreeFunction), float(Age)]
+                        with timer.stage("inference"), span("predict", model='diabetes'):
+                            diabetes_prediction, model_version = predict_for_user('diabetes', [user_input])
+                        record_prediction('diabetes', user_input, diabetes_prediction, model_version)
+
+                        with timer.stage("render"):
+                            if diabetes_prediction[0] == 1:
+                                st.error('### Result: Positive for Diabetes Risk')
+                                st.toast("Alert: High Risk Detected", icon="⚠️")
+                                st.markdown("The model has identified patterns consistent with diabetes.")
+                            else:
+                                st.success('### Result: Negative (Healthy)')
+                                st.toast("Analysis Result: Healthy", icon="✅")
+                                st.markdown("No significant risk factors identified.")
+                    except InferenceError as e:
+                        st.error(f"⏳ {e}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            timer.finish()
+
+        diabetes_form()
+
+        batch_upload_section('diabetes')
 
 
     # --- HEART DISEASE PREDICTION PAGE ---
     elif selected == '💓 Heart Disease Check':
         st.title('💓 Heart Disease Risk Prediction')
+        load_page_model('heart')
         st.markdown("Cardiovascular risk assessment based on clinical metrics.")
 
-        tab1, tab2, tab3 = st.tabs(["👤 Demographics", "🩺 Vitals", "📉 ECG & Pain"])
-
-        with tab1:
-            col1, col2 = st.columns(2)
-            with col1:
-                age = st.number_input('Age', min_value=1, max_value=120, step=1)
-            with col2:
-                sex = st.radio('Sex', ('Male', 'Female'), horizontal=True)
-                sex_val = 1 if sex == 'Male' else 0
-
-        with tab2:
-            col1, col2 = st.columns(2)
-            with col1:
-                trestbps = st.number_input('Resting BP (mm Hg)', min_value=80, max_value=200, step=1)
-                chol = st.number_input('Cholesterol (mg/dL)', min_value=100, max_value=600, step=1)
-            with col2:
-                thalach = st.number_input('Max Heart Rate', min_value=60, max_value=220, step=1)
-                fbs = st.number_input('Fasting BS > 120? (1=True, 0=False)', min_value=0, max_value=1, step=1)
-
-        with tab3:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                cp = st.number_input('Chest Pain (0-3)', min_value=0, max_value=3)
-                restecg = st.number_input('Resting ECG (0-2)', min_value=0, max_value=2)
-            with col2:
-                exang = st.number_input('Exer. Angina (1=Yes, 0=No)', min_value=0, max_value=1)
-                oldpeak = st.number_input('ST Depression', min_value=0.0, max_value=7.0, step=0.1)
-            with col3:
-                slope = st.number_input('Slope (0-2)', min_value=0, max_value=2)
-                ca = st.number_input('Major Vessels (0-3)', min_value=0, max_value=3)
-                thal = st.number_input('Thal (1-3)', min_value=1, max_value=3)
-
-        st.markdown("")
-        if st.button('Evaluate Heart Health', key='heart_button'):
-            with st.spinner('Analyzing Cardiovascular Data...'):
-                time.sleep(1)
-                try:
-                    user_input = [float(x) for x in [age, sex_val, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]]
-                    heart_prediction = heart_disease_model.predict([user_input])
-                    
-                    if heart_prediction[0] == 1:
-                        st.error('### Result: Heart Disease Detected')
-                        st.toast("Critical Alert: Heart Risk", icon="🚨")
-                        st.markdown("Please consult a cardiologist immediately.")
-                    else:
-                        st.success('### Result: Healthy Heart')
-                        st.toast("Heart Health: Normal", icon="💚")
-                        st.markdown("Cardiovascular metrics appear normal.")
-                except Exception as e:
-                    st.error(f"Error: {e}")
+        @st.fragment
+        def heart_form():
+            """Cardiovascular form and its result region."""
+            # Widgets are batched in a form, so editing them triggers no rerun;
+            # submitting reruns only this fragment
+            timer = PageTimer('💓 Heart Disease Check [form]')
+            with st.form('heart_form'):
+                tab1, tab2, tab3 = st.tabs(["👤 Demographics", "🩺 Vitals", "📉 ECG & Pain"])
+
+                with tab1:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        age = st.number_input('Age', min_value=1, max_value=120, step=1)
+                    with col2:
+                        sex = st.radio('Sex', ('Male', 'Female'), horizontal=True)
+                        sex_val = 1 if sex == 'Male' else 0
+
+                with tab2:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        trestbps = st.number_input('Resting BP (mm Hg)', min_value=80, max_value=200, step=1)
+                        chol = st.number_input('Cholesterol (mg/dL)', min_value=100, max_value=600, step=1)
+                    with col2:
+                        thalach = st.number_input('Max Heart Rate', min_value=60, max_value=220, step=1)
+                        fbs = st.number_input('Fasting BS > 120? (1=True, 0=False)', min_value=0, max_value=1, step=1)
+
+                with tab3:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        cp = st.number_input('Chest Pain (0-3)', min_value=0, max_value=3)
+                        restecg = st.number_input('Resting ECG (0-2)', min_value=0, max_value=2)
+                    with col2:
+                        exang = st.number_input('Exer. Angina (1=Yes, 0=No)', min_value=0, max_value=1)
+                        oldpeak = st.number_input('ST Depression', min_value=0.0, max_value=7.0, step=0.1)
+                    with col3:
+                        slope = st.number_input('Slope (0-2)', min_value=0, max_value=2)
+                        ca = st.number_input('Major Vessels (0-3)', min_value=0, max_value=3)
+                        thal = st.number_input('Thal (1-3)', min_value=1, max_value=3)
+
+                st.markdown("")
+                submitted = st.form_submit_button('Evaluate Heart Health')
+            if submitted:
+                with st.spinner('Analyzing Cardiovascular Data...'):
+                    try:
+                        with timer.stage("features"):
+                            user_input = [float(x) for x in [age, sex_val, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal]]
+                        with timer.stage("inference"), span("predict", model='heart'):
+                            heart_prediction, model_version = predict_for_user('heart', [user_input])
+                        record_prediction('heart', user_input, heart_prediction, model_version)
+
+                        with timer.stage("render"):
+                            if heart_prediction[0] == 1:
+                                st.error('### Result: Heart Disease Detected')
+                                st.toast("Critical Alert: Heart Risk", icon="🚨")
+                                st.markdown("Please consult a cardiologist immediately.")
+                            else:
+                                st.success('### Result: Healthy Heart')
+                                st.toast("Heart Health: Normal", icon="💚")
+                                st.markdown("Cardiovascular metrics appear normal.")
+                    except InferenceError as e:
+                        st.error(f"⏳ {e}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            timer.finish()
+
+        heart_form()
+
+        batch_upload_section('heart')
 
 
     # --- PARKINSONS PREDICTION PAGE ---
     elif selected == '🧠 Parkinsons Check':
         st.title("🧠 Parkinson's Disease Prediction")
+        load_page_model('parkinsons')
         st.markdown("Neural assessment using biomedical voice measurements.")
 
         with st.expander("ℹ️ How to use this tool"):
-            st.info("Enter the acoustic parameters extracted from voice recordings. These values (Jitter, Shimmer, etc.) measure vocal stability.")
-
-        tab1, tab2, tab3 = st.tabs(["Frequency & Pitch", "Variation (Jitter/Shimmer)", "Harmonics & Pulse"])
-
-        with tab1:
-            col1, col2 = st.columns(2)
-            with col1:
-                fo = st.number_input('MDVP:Fo(Hz) - Avg Freq', format="%.3f")
-                fhi = st.number_input('MDVP:Fhi(Hz) - Max Freq', format="%.3f")
-            with col2:
-                flo = st.number_input('MDVP:Flo(Hz) - Min Freq', format="%.3f")
+            st.info("Upload a WAV recording of a steady 'aaah' (3-10 seconds), or enter the acoustic parameters "
+                    "extracted from voice recordings. These values (Jitter, Shimmer, etc.) measure vocal stability.")
 
-        with tab2:
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                Jitter_percent = st.number_input('MDVP:Jitter(%)', format="%.4f")
-                Jitter_Abs = st.number_input('MDVP:Jitter(Abs)', format="%.5f")
-                RAP = st.number_input('MDVP:RAP', format="%.4f")
-                PPQ = st.number_input('MDVP:PPQ', format="%.4f")
-                DDP = st.number_input('Jitter:DDP', format="%.5f")
-            with col2:
-                Shimmer = st.number_input('MDVP:Shimmer', format="%.4f")
-                Shimmer_dB = st.number_input('MDVP:Shimmer(dB)', format="%.3f")
-                APQ3 = st.number_input('Shimmer:APQ3', format="%.5f")
-                APQ5 = st.number_input('Shimmer:APQ5', format="%.5f")
-            with col3:
-                APQ = st.number_input('MDVP:APQ', format="%.4f")
-                DDA = st.number_input('Shimmer:DDA', format="%.5f")
-
-        with tab3:
-            col1, col2 = st.columns(2)
-            with col1:
-                NHR = st.number_input('NHR', format="%.5f")
-                HNR = st.number_input('HNR', format="%.4f")
-                PPE = st.number_input('PPE', format="%.6f")
-            with col2:
-                spread1 = st.number_input('spread1', format="%.6f")
-                spread2 = st.number_input('spread2', format="%.6f")
-                D2 = st.number_input('D2', format="%.6f")
-
-        st.markdown("")
-        if st.button("Analyze Neural Signs", key='parkinsons_button'):
-            with st.spinner('Processing Vocal Biomarkers...'):
-                time.sleep(1)
-                try:
-                    user_input = [
-                        fo, fhi, flo, Jitter_percent, Jitter_Abs, RAP, PPQ, DDP,
-                        Shimmer, Shimmer_dB, APQ3, APQ5, APQ, DDA, NHR, HNR,
-                        1.15, 0.4, # Placeholder
-                        spread1, spread2, D2, PPE
-                    ]
-                    parkinsons_prediction = parkinsons_model.predict([user_input])
-                    
-                    if parkinsons_prediction[0] == 1:
-                        st.error("### Result: Parkinson's Detected")
-                        st.toast("Alert: Parkinson's Signs", icon="🧠")
-                    else:
-                        st.success("### Result: Healthy Pattern")
-                        st.toast("Result: Negative", icon="✅")
-                except Exception as e:
-                    st.error(f"Error: {e}")
+        def show_parkinsons_result(prediction):
+            if prediction[0] == 1:
+                st.error("### Result: Parkinson's Detected")
+                st.toast("Alert: Parkinson's Signs", icon="🧠")
+            else:
+                st.success("### Result: Healthy Pattern")
+                st.toast("Result: Negative", icon="✅")
+
+        @st.fragment
+        def voice_recording_section():
+            """WAV upload that computes all 22 voice measurements and predicts from them."""
+            timer = PageTimer('🧠 Parkinsons Check [recording]')
+            recording = st.file_uploader("🎙️ Upload a sustained vowel recording (WAV)", type=['wav'], key='parkinsons_wav')
+            if recording is not None:
+                # Extraction runs once per uploaded file, not on every fragment rerun
+                cached = st.session_state.get('voice_features')
+                if cached is None or cached[0] != recording.file_id:
+                    try:
+                        with st.spinner("Analysing recording..."), timer.stage("extraction"), span("voice_extraction"):
+                            cached = (recording.file_id, *analyze_voice(recording))
+                    except VoiceAnalysisError as e:
+                        st.error(f"🎙️ {e}")
+                        cached = None
+                    st.session_state['voice_features'] = cached
+                if cached is not None:
+                    _, measures, info = cached
+                    st.caption(f"{info['duration_s']:.1f} s at {info['sample_rate']} Hz, {info['voiced_fraction']:.0%} voiced")
+                    with st.expander("Extracted voice measurements"):
+                        st.dataframe([{"feature": k, "value": round(v, 6)} for k, v in measures.items()],
+                                     use_container_width=True, hide_index=True)
+                    if st.button("Analyze Recording"):
+                        try:
+                            with timer.stage("inference"), span("predict", model='parkinsons'):
+                                prediction, model_version = predict_for_user('parkinsons', [list(measures.values())])
+                            record_prediction('parkinsons', list(measures.values()), prediction, model_version)
+                            with timer.stage("render"):
+                                show_parkinsons_result(prediction)
+                        except InferenceError as e:
+                            st.error(f"⏳ {e}")
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+            timer.finish()
+
+        voice_recording_section()
+
+        st.markdown("###### Or enter the measurements manually")
+
+        @st.fragment
+        def parkinsons_form():
+            """Voice-measurement form and its result region."""
+            # Widgets are batched in a form, so editing them triggers no rerun;
+            # submitting reruns only this fragment
+            timer = PageTimer('🧠 Parkinsons Check [form]')
+            with st.form('parkinsons_form'):
+                tab1, tab2, tab3 = st.tabs(["Frequency & Pitch", "Variation (Jitter/Shimmer)", "Harmonics & Pulse"])
+
+                with tab1:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        fo = st.number_input('MDVP:Fo(Hz) - Avg Freq', format="%.3f")
+                        fhi = st.number_input('MDVP:Fhi(Hz) - Max Freq', format="%.3f")
+                    with col2:
+                        flo = st.number_input('MDVP:Flo(Hz) - Min Freq', format="%.3f")
+
+                with tab2:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        Jitter_percent = st.number_input('MDVP:Jitter(%)', format="%.4f")
+                        Jitter_Abs = st.number_input('MDVP:Jitter(Abs)', format="%.5f")
+                        RAP = st.number_input('MDVP:RAP', format="%.4f")
+                        PPQ = st.number_input('MDVP:PPQ', format="%.4f")
+                        DDP = st.number_input('Jitter:DDP', format="%.5f")
+                    with col2:
+                        Shimmer = st.number_input('MDVP:Shimmer', format="%.4f")
+                        Shimmer_dB = st.number_input('MDVP:Shimmer(dB)', format="%.3f")
+                        APQ3 = st.number_input('Shimmer:APQ3', format="%.5f")
+                        APQ5 = st.number_input('Shimmer:APQ5', format="%.5f")
+                    with col3:
+                        APQ = st.number_input('MDVP:APQ', format="%.4f")
+                        DDA = st.number_input('Shimmer:DDA', format="%.5f")
+
+                with tab3:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        NHR = st.number_input('NHR', format="%.5f")
+                        HNR = st.number_input('HNR', format="%.4f")
+                        RPDE = st.number_input('RPDE', format="%.6f")
+                        DFA = st.number_input('DFA', format="%.6f")
+                    with col2:
+                        spread1 = st.number_input('spread1', format="%.6f")
+                        spread2 = st.number_input('spread2', format="%.6f")
+                        D2 = st.number_input('D2', format="%.6f")
+                        PPE = st.number_input('PPE', format="%.6f")
+
+                st.markdown("")
+                submitted = st.form_submit_button("Analyze Neural Signs")
+            if submitted:
+                with st.spinner('Processing Vocal Biomarkers...'):
+                    try:
+                        with timer.stage("features"):
+                            user_input = [
+                                fo, fhi, flo, Jitter_percent, Jitter_Abs, RAP, PPQ, DDP,
+                                Shimmer, Shimmer_dB, APQ3, APQ5, APQ, DDA, NHR, HNR,
+                                RPDE, DFA, spread1, spread2, D2, PPE
+                            ]
+                        with timer.stage("inference"), span("predict", model='parkinsons'):
+                            parkinsons_prediction, model_version = predict_for_user('parkinsons', [user_input])
+                        record_prediction('parkinsons', user_input, parkinsons_prediction, model_version)
+
+                        with timer.stage("render"):
+                            show_parkinsons_result(parkinsons_prediction)
+                    except InferenceError as e:
+                        st.error(f"⏳ {e}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            timer.finish()
+
+        parkinsons_form()
+
+        batch_upload_section('parkinsons')
+
+
+    # --- FULL SCREENING PAGE ---
+    elif selected == '🩺 Full Screening':
+        st.title("🩺 Full Screening")
+        st.markdown("Fill in one patient profile and every applicable model runs at once.")
+
+        with st.expander("ℹ️ How this works"):
+            st.info("Shared measurements (age, sex, glucose, blood pressure...) are entered once and mapped to each "
+                    "model's inputs. BMI is computed from height and weight. A model is skipped when a value it needs "
+                    "is left empty; the Parkinson's check runs when a voice recording is attached.")
+
+        @st.fragment
+        def screening_form():
+            """Shared patient profile form and its combined report."""
+            timer = PageTimer('🩺 Full Screening [form]')
+            with st.form('screening_form'):
+                tab1, tab2, tab3, tab4 = st.tabs(["👤 Patient", "🩸 Metabolic", "💓 Cardiac", "🎙️ Voice"])
+
+                with tab1:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        age = st.number_input('Age (Years)', min_value=1, max_value=120, step=1, key='screen_age')
+                        height = st.number_input('Height (cm)', min_value=50.0, max_value=250.0, value=170.0, step=0.5)
+                        pregnancies = st.number_input('Number of Pregnancies', min_value=0, max_value=20, step=1, key='screen_preg')
+                    with col2:
+                        sex = st.radio('Sex', ('Male', 'Female'), horizontal=True, key='screen_sex')
+                        weight = st.number_input('Weight (kg)', min_value=2.0, max_value=300.0, value=70.0, step=0.5)
+
+                with tab2:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        glucose = st.number_input('Glucose Level (mg/dL)', min_value=0, max_value=300, value=None, step=1, help="2 hours into an oral glucose tolerance test", key='screen_glucose')
+                        insulin = st.number_input('Insulin Level (mu U/ml)', min_value=0, max_value=1000, value=None, step=1, key='screen_insulin')
+                        diastolic = st.number_input('Diastolic BP (mm Hg)', min_value=0, max_value=200, value=None, step=1)
+                    with col2:
+                        skin = st.number_input('Skin Thickness (mm)', min_value=0, max_value=100, value=None, step=1, key='screen_skin')
+                        pedigree = st.number_input('Pedigree Function', min_value=0.0, max_value=2.5, value=None, step=0.01, help="Family history score", key='screen_pedigree')
+                        fbs = st.number_input('Fasting BS > 120? (1=True, 0=False)', min_value=0, max_value=1, value=None, step=1, help="From a fasting blood test; used by the heart check", key='screen_fbs')
+
+                with tab3:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        systolic = st.number_input('Resting Systolic BP (mm Hg)', min_value=80, max_value=200, value=None, step=1)
+                        chol = st.number_input('Cholesterol (mg/dL)', min_value=100, max_value=600, value=None, step=1, key='screen_chol')
+                        thalach = st.number_input('Max Heart Rate', min_value=60, max_value=220, value=None, step=1, key='screen_thalach')
+                    with col2:
+                        cp = st.number_input('Chest Pain (0-3)', min_value=0, max_value=3, value=None, key='screen_cp')
+                        restecg = st.number_input('Resting ECG (0-2)', min_value=0, max_value=2, value=None, key='screen_restecg')
+                        exang = st.number_input('Exer. Angina (1=Yes, 0=No)', min_value=0, max_value=1, value=None, key='screen_exang')
+                    with col3:
+                        oldpeak = st.number_input('ST Depression', min_value=0.0, max_value=7.0, value=None, step=0.1, key='screen_oldpeak')
+                        slope = st.number_input('Slope (0-2)', min_value=0, max_value=2, value=None, key='screen_slope')
+                        ca = st.number_input('Major Vessels (0-3)', min_value=0, max_value=3, value=None, key='screen_ca')
+                        thal = st.number_input('Thal (1-3)', min_value=1, max_value=3, value=None, key='screen_thal')
+
+                with tab4:
+                    recording = st.file_uploader("🎙️ Sustained vowel recording (WAV, optional)", type=['wav'], key='screening_wav')
+
+                st.markdown("")
+                submitted = st.form_submit_button('Run Full Screening')
+            if submitted:
+                with st.spinner('Screening...'):
+                    try:
+                        with timer.stage("features"):
+                            profile = {
+                                "age": age, "sex": 1 if sex == 'Male' else 0, "height_cm": height, "weight_kg": weight,
+                                "pregnancies": pregnancies, "glucose": glucose, "fasting_bs_high": fbs, "insulin": insulin,
+                                "skin_thickness": skin, "pedigree": pedigree, "diastolic_bp": diastolic,
+                                "systolic_bp": systolic, "cholesterol": chol, "max_heart_rate": thalach,
+                                "chest_pain": cp, "resting_ecg": restecg, "exercise_angina": exang,
+                                "st_depression": oldpeak, "st_slope": slope, "major_vessels": ca, "thal": thal,
+                            }
+                            if recording is not None:
+                                try:
+                                    with span("voice_extraction"):
+                                        profile.update(analyze_voice(recording)[0])
+                                except VoiceAnalysisError as e:
+                                    st.warning(f"🎙️ {e} The Parkinson's check was skipped.")
+                        with timer.stage("inference"), span("predict", model='screening'):
+                            report = screen(profile, user=current_user, on_wait=queue_status())
+                        for name, entry in report.items():
+                            if 'prediction' in entry:
+                                record_prediction(name, entry['inputs'], [entry['prediction']], entry['version'])
+
+                        with timer.stage("render"):
+                            st.markdown("### 📋 Combined Risk Report")
+                            labels = {'diabetes': "🩸 Diabetes", 'heart': "💓 Heart Disease", 'parkinsons': "🧠 Parkinson's"}
+                            cols = st.columns(len(labels))
+                            for col, (name, label) in zip(cols, labels.items()):
+                                entry = report[name]
+                                with col:
+                                    if 'prediction' not in entry:
+                                        st.metric(label=label, value="Skipped", delta=f"{len(entry['missing'])} value(s) missing", delta_color="off")
+                                    elif entry['prediction'] == 1:
+                                        st.metric(label=label, value="At risk", delta="Positive", delta_color="inverse")
+                                    else:
+                                        st.metric(label=label, value="Low risk", delta="Negative", delta_color="normal")
+                            at_risk = [labels[name] for name, entry in report.items() if entry.get('prediction') == 1]
+                            if at_risk:
+                                st.error(f"Risk patterns found for: {', '.join(at_risk)}. Please consult a physician.")
+                            elif any('prediction' in entry for entry in report.values()):
+                                st.success("No significant risk factors identified by the models that ran.")
+                            skipped = {labels[name]: entry['missing'] for name, entry in report.items() if 'missing' in entry}
+                            if skipped:
+                                with st.expander("Why were some checks skipped?"):
+                                    for label, missing in skipped.items():
+                                        st.markdown(f"**{label}** needs: {', '.join(missing[:8])}{' ...' if len(missing) > 8 else ''}")
+                    except InferenceError as e:
+                        st.error(f"⏳ {e}")
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+            timer.finish()
+
+        screening_form()
+
+        @st.fragment
+        def screening_batch_section():
+            """Screens an uploaded table of patient profiles with all models in one pass."""
+            with st.expander("📂 Batch Screening (CSV / Parquet)"):
+                st.caption("One patient per row. Profile columns: " + ", ".join(PROFILE_FIELDS) +
+                           ", plus the 22 Parkinson's voice measures when available.")
+                upload = st.file_uploader("Upload patient profiles", type=["csv", "parquet"], key="screening_batch_file")
+                if upload is not None and st.button("Screen File", key="screening_batch_button"):
+                    with st.spinner("Screening records..."):
+                        try:
+                            path = result_spool("screening_batch_result")
+                            with open(path, 'w', newline='') as out, \
+                                    admit('batch', current_user, priority=BULK, on_wait=queue_status()):
+                                stats = screen_file(upload, out, fmt=detect_format(upload.name), out_fmt='csv', user=current_user)
+                            st.success(f"Screened {stats['rows']} records: " + ", ".join(
+                                f"{name} {stats['positive'][name]}/{stats['screened'][name]} at risk" for name in FEATURES))
+                            invalid = {name: n for name, n in stats['invalid'].items() if n}
+                            if invalid:
+                                st.warning("Rows with non-finite values were not screened: " +
+                                           ", ".join(f"{name} {n}" for name, n in invalid.items()))
+                            download_results(path, "screening_results.csv", "screening_batch_download")
+                        except (AdmissionError, InferenceError) as e:
+                            st.error(f"⏳ {e}")
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+
+        screening_batch_section()
+
+
+    # --- PREDICTION HISTORY PAGE ---
+    elif selected == '📈 My History':
+        st.title("📈 My Prediction History")
+        st.markdown("Every check you run is saved here so you can follow your risk over time.")
+
+        with timer.stage("query"), span("history_query"):
+            records = history.query(current_user)
+
+        if not records:
+            st.info("No predictions yet. Results from the prediction pages will appear here.")
+        else:
+            with timer.stage("render"):
+                frame = pd.DataFrame(records)
+                frame['time'] = pd.to_datetime(frame['ts'], unit='s')
+                labels = {'diabetes': 'Diabetes', 'heart': 'Heart Disease', 'parkinsons': 'Parkinsons'}
+
+                cols = st.columns(len(labels))
+                for col, (model, label) in zip(cols, labels.items()):
+                    runs = frame[frame['model'] == model]
+                    with col:
+                        st.metric(label=label, value=f"{len(runs)} checks",
+                                  delta=("Last: positive" if runs['result'].iloc[-1] else "Last: negative") if len(runs) else None,
+                                  delta_color="inverse")
+
+                # Share of positive results over each model's last 5 checks
+                frame['risk'] = frame.groupby('model')['result'].transform(lambda r: r.rolling(5, min_periods=1).mean())
+                trend = frame.pivot_table(index='time', columns='model', values='risk').ffill()
+                st.markdown("##### Risk trend (positive share of the last 5 checks)")
+                st.line_chart(trend.rename(columns=labels))
+
+                st.markdown("##### Recent checks")
+                recent = frame.sort_values('time', ascending=False).head(20)
+                st.dataframe(
+                    [{"time": t.strftime('%Y-%m-%d %H:%M'), "check": labels.get(m, m), "result": "Positive" if r else "Negative",
+                      "model version": v or "unknown"}
+                     for t, m, r, v in zip(recent['time'], recent['model'], recent['result'], recent['version'])],
+                    use_container_width=True, hide_index=True
+                )
 
 
     # ----------------------------------------------------------
-    #  CHATBOT (UNCHANGED)
+    #  CHATBOT (GLOSSARY ENGINE)
     # ----------------------------------------------------------
     st.markdown("---")
 
-    def get_health_response(query):
-        query = query.lower()
-        if any(x in query for x in ["glucose", "sugar", "fbs"]):
-            return "🩸 **Glucose:** Fasting blood sugar levels. Normal is <100 mg/dL. 100-125 is pre-diabetes, and >126 suggests diabetes."
-        elif "bmi" in query:
-            return "⚖️ **BMI (Body Mass Index):** A measure of body fat based on height and weight. Normal range is 18.5 - 24.9."
-        elif "blood pressure" in query or "bp" in query or "trestbps" in query:
-            return "💓 **Blood Pressure:** 'Resting Blood Pressure' (trestbps). High BP (>130/80 mmHg) strains the heart."
-        elif "chest pain" in query or "cp" in query:
-            return "💔 **Chest Pain (CP):** Classified into 4 types. Type 0 (Typical Angina) is often the most serious indicator."
-        elif "parkinson" in query:
-            return "🧠 **Parkinson's:** A neurodegenerative disorder. We use vocal frequency variations (Jitter, Shimmer) to detect it."
-        elif "jitter" in query:
-            return "〰️ **Jitter:** Measures the variation in the *pitch* of the voice. High jitter is a sign of vocal impairment."
-        elif "hello" in query or "hi" in query:
-            return "👋 Hello! I am your Medi-Predictor Assistant. Ask me about any medical term on this page!"
-        else:
-            return "🤖 I can explain parameters like BMI, Glucose, Chest Pain, or Jitter. Try asking about those!"
-
-    with st.expander("💬 AI Health Assistant & FAQ", expanded=False):
-        st.caption("⚠️ **Disclaimer:** I am an AI assistant providing definitions. I cannot provide medical diagnosis.")
-        if "messages" not in st.session_state:
-            st.session_state.messages = [{"role": "assistant", "content": "Hello! Click a button below or type a question to learn about the health metrics."}]
-
-        col_faq1, col_faq2, col_faq3, col_faq4 = st.columns(4)
-        user_query = None
-        if col_faq1.button("BMI?", use_container_width=True): user_query = "What is BMI?"
-        if col_faq2.button("Glucose?", use_container_width=True): user_query = "Explain Glucose"
-        if col_faq3.button("Chest Pain?", use_container_width=True): user_query = "What are Chest Pain types?"
-        if col_faq4.button("Jitter?", use_container_width=True): user_query = "What is Jitter?"
-
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-        if prompt := st.chat_input("Ask about a medical term..."):
-            user_query = prompt
-
-        if user_query:
-            with st.chat_message("user"):
-                st.markdown(user_query)
-            st.session_state.messages.append({"role": "user", "content": user_query})
-            response = get_health_response(user_query)
-            with st.chat_message("assistant"):
-                st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
-
-        if st.button("🗑️ Clear Chat"):
-            st.session_state.messages = []
-            st.rerun()
\ No newline at end of file
+    @st.fragment
+    def health_assistant():
+        """Chat widget; its buttons and input rerun only this fragment."""
+        with st.expander("💬 AI Health Assistant & FAQ", expanded=False):
+            st.caption("⚠️ **Disclaimer:** I am an AI assistant providing definitions. I cannot provide medical diagnosis.")
+            # Chat history is a bounded ring buffer so long sessions keep a flat footprint
+            if not isinstance(st.session_state.get("messages"), ChatHistory):
+                st.session_state.messages = ChatHistory(st.session_state.get("messages") or [{"role": "assistant", "content": "Hello! Click a button below or type a question to learn about the health metrics."}])
+
+            col_faq1, col_faq2, col_faq3, col_faq4 = st.columns(4)
+            user_query = None
+            if col_faq1.button("BMI?", use_container_width=True): user_query = "What is BMI?"
+            if col_faq2.button("Glucose?", use_container_width=True): user_query = "Explain Glucose"
+            if col_faq3.button("Chest Pain?", use_container_width=True): user_query = "What are Chest Pain types?"
+            if col_faq4.button("Jitter?", use_container_width=True): user_query = "What is Jitter?"
+
+            earlier_messages = st.session_state.messages.older(CHAT_PAGE_SIZE)
+            if earlier_messages and st.checkbox(f"Show {len(earlier_messages)} earlier messages", key="chat_show_earlier"):
+                for message in earlier_messages:
+                    with st.chat_message(message["role"]):
+                        st.markdown(message["content"])
+
+            for message in st.session_state.messages.recent(CHAT_PAGE_SIZE):
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
+
+            if prompt := st.chat_input("Ask about a medical term..."):
+                user_query = prompt
+
+            if user_query:
+                with st.chat_message("user"):
+                    st.markdown(user_query)
+                st.session_state.messages.append({"role": "user", "content": user_query})
+                with span("chat_response"):
+                    response = get_health_response(user_query)
+                with st.chat_message("assistant"):
+                    st.markdown(response)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+
+            if st.button("🗑️ Clear Chat"):
+                st.session_state.messages.clear()
+                st.rerun(scope="fragment")
+
+    health_assistant()
+    render_span.end()
+
+    # ----------------------------------------------------------
+    #  TIMING DEBUG PANEL
+    # ----------------------------------------------------------
+    last_timings = timer.finish()
+    end_rerun(selected)
+    if show_timing:
+        with st.expander("⏱️ Timing Debug", expanded=True):
+            st.caption("This rerun: " + " | ".join(f"{k}: {v:.2f} ms" for k, v in last_timings.items()))
+            st.dataframe(
+                [{"page": page, "stage": stage, **stats} for (page, stage), stats in sorted(timing_summary().items())],
+                use_container_width=True
+            )
+            cache_stats = prediction_cache.stats()
+            st.caption(f"Prediction cache: {cache_stats['size']}/{cache_stats['maxsize']} entries | "
+                       f"hits {cache_stats['hits']} | misses {cache_stats['misses']} | hit rate {cache_stats['hit_rate']:.0%}")
+            warm = warmup.report()
+            st.caption(f"Warm-up: {warm['status']}" + (f" in {warm['total_ms']:.0f} ms" if 'total_ms' in warm else "") + " | "
+                       + " | ".join(f"{k}: {v:.0f} ms" for k, v in {**warm['imports_ms'], **warm['models_ms']}.items()))
+
+    if show_memory:
+        with st.expander("🧮 Session Memory", expanded=True):
+            state_sizes, state_total = state_footprint(st.session_state)
+            st.caption(f"This session holds ~{state_total / 1024:.1f} KiB across {len(state_sizes)} keys "
+                       f"(chat: {len(st.session_state.messages)}/{st.session_state.messages.maxlen} messages).")
+            st.dataframe(
+                [{"key": k, "bytes": v} for k, v in sorted(state_sizes.items(), key=lambda kv: -kv[1])],
+                use_container_width=True
+            )
\ No newline at end of file
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Offline evaluation of the disease models on labeled holdout data.
+
+A labeled CSV or Parquet table is streamed through a model chunk by
+chunk (see batch_scoring.read_chunks) while the metrics are accumulated
+incrementally: confusion-matrix counts for accuracy, precision, recall
+and F1, and per-class histograms of the decision scores for ROC-AUC. So
+memory stays bounded by one chunk however large the holdout set is.
+Rows with a missing or non-numeric feature, or a label other than 0/1,
+are left out of the metrics and counted in the result's "skipped".
+
+Results are cached in a JSON file keyed by the model file's content hash
+plus the dataset's content hash. The Home dashboard only reads this
+cache; evaluations are produced from the command line:
+
+    python evaluation.py diabetes diabetes_holdout.csv [--label Outcome]
+    python evaluation.py --list
+
+Configure the cache file with MEDI_EVAL_CACHE (default evaluation_results.json).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from model_registry import FEATURES, get_loaded
+
+DEFAULT_CACHE = 'evaluation_results.json'
+CACHE_VERSION = 2
+
+# Label column of each model's original training data
+LABEL_COLUMNS = {"diabetes": "Outcome", "heart": "target", "parkinsons": "status"}
+
+# Decision scores are binned on a symmetric log scale for ROC-AUC
+AUC_BINS = 20_000
+AUC_LIMIT = 14.0
+
+_lock = threading.Lock()
+
+
+def cache_path():
+    return os.environ.get("MEDI_EVAL_CACHE", DEFAULT_CACHE)
+
+
+class MetricAccumulator:
+    """Streaming confusion counts and score histograms for a binary classifier."""
+
+    def __init__(self):
+        import numpy as np
+        self._np = np
+        self.tp = self.fp = self.tn = self.fn = 0
+        self.pos_hist = np.zeros(AUC_BINS, np.int64)
+        self.neg_hist = np.zeros(AUC_BINS, np.int64)
+
+    def update(self, labels, predictions, scores):
+        """Adds one chunk; labels must be 0/1 and scores finite (ValueError naming the row otherwise)."""
+        np = self._np
+        scores = np.asarray(scores, dtype=np.float64)
+        bad = np.flatnonzero(~np.isfinite(scores))
+        if len(bad):
+            raise ValueError(f"Row {bad[0]} of the chunk has a non-finite score ({scores[bad[0]]}).")
+        label_values = np.asarray(labels, dtype=np.float64)
+        bad = np.flatnonzero((label_values != 0) & (label_values != 1))
+        if len(bad):
+            raise ValueError(f"Row {bad[0]} of the chunk has label {label_values[bad[0]]}; expected 0 or 1.")
+        labels = label_values.astype(bool)
+        predictions = np.asarray(predictions).astype(bool)
+        self.tp += int(np.count_nonzero(labels & predictions))
+        self.fp += int(np.count_nonzero(~labels & predictions))
+        self.fn += int(np.count_nonzero(labels & ~predictions))
+        self.tn += int(np.count_nonzero(~labels & ~predictions))
+        u = np.clip(np.sign(scores) * np.log1p(np.abs(scores)), -AUC_LIMIT, AUC_LIMIT)
+        bins = np.minimum(((u + AUC_LIMIT) / (2 * AUC_LIMIT) * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+        self.pos_hist += np.bincount(bins[labels], minlength=AUC_BINS)
+        self.neg_hist += np.bincount(bins[~labels], minlength=AUC_BINS)
+
+    def roc_auc(self):
+        """Probability a positive outranks a negative (ties within a bin count half)."""
+        np = self._np
+        pos, neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if not pos or not neg:
+            return None
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        return float((self.pos_hist * (neg_below + 0.5 * self.neg_hist)).sum() / (pos * neg))
+
+    def result(self):
+        rows = self.tp + self.fp + self.tn + self.fn
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else 0.0
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else 0.0
+        return {
+            "rows": rows,
+            "accuracy": (self.tp + self.tn) / rows if rows else 0.0,
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "roc_auc": self.roc_auc(),
+            "confusion": {"tn": self.tn, "fp": self.fp, "fn": self.fn, "tp": self.tp},
+        }
+
+
+# ---------------------------------------------------------
+#  CACHE
+# ---------------------------------------------------------
+def _load_cache():
+    try:
+        with open(cache_path(), 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "results": {}, "datasets": {}}
+    if data.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "results": {}, "datasets": {}}
+    return data
+
+
+def _save_cache(data):
+    path = cache_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def dataset_sha256(path, cache=None):
+    """Content hash of a dataset file, remembered per (size, mtime) in the cache."""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    known = (cache or {}).get("datasets", {}).get(key)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        return known["sha256"]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    sha = digest.hexdigest()
+    if cache is not None:
+        cache.setdefault("datasets", {})[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    return sha
+
+
+def cache_key(name, model_sha256, data_sha256):
+    return f"{name}:{model_sha256}:{data_sha256}"
+
+
+# ---------------------------------------------------------
+#  EVALUATION
+# ---------------------------------------------------------
+def evaluate(name, path, label=None, fmt=None, chunksize=None, force=False):
+    """Evaluates the current model on a labeled file; cached per (model, dataset) hash."""
+    import numpy as np
+    import pandas as pd
+    from batch_scoring import DEFAULT_CHUNKSIZE, detect_format, feature_matrix, read_chunks, validate_columns
+    from fastpath import scorer_for
+
+    label = label or LABEL_COLUMNS[name]
+    loaded = get_loaded(name)
+    with _lock:
+        cache = _load_cache()
+    key = cache_key(name, loaded.sha256, dataset_sha256(path, cache))
+    if not force and key in cache["results"]:
+        return cache["results"][key]
+
+    scorer = scorer_for(name, loaded.model)
+    acc = MetricAccumulator()
+    skipped = {"invalid_features": 0, "unlabeled": 0}
+    t0 = time.perf_counter()
+    for chunk in read_chunks(path, fmt or detect_format(path), chunksize or DEFAULT_CHUNKSIZE):
+        validate_columns(name, chunk.columns)
+        if label not in chunk.columns:
+            raise KeyError(f"Label column '{label}' not found in {path}.")
+        X, valid = feature_matrix(name, chunk)
+        labels = pd.to_numeric(chunk[label], errors='coerce').to_numpy(dtype=np.float64)
+        labeled = (labels == 0) | (labels == 1)
+        skipped["invalid_features"] += int(np.count_nonzero(~valid))
+        skipped["unlabeled"] += int(np.count_nonzero(valid & ~labeled))
+        keep = valid & labeled
+        if keep.any():
+            scores = scorer.decision_function(X[keep])
+            acc.update(labels[keep], scores > 0, scores)
+
+    result = acc.result()
+    result.update({
+        "skipped": skipped,
+        "model": name,
+        "model_sha256": loaded.sha256,
+        "dataset": os.path.abspath(path),
+        "dataset_sha256": key.rsplit(':', 1)[1],
+        "label": label,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "evaluated_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    with _lock:
+        cache = _load_cache()
+        cache["results"][key] = result
+        dataset_sha256(path, cache)
+        _save_cache(cache)
+    return result
+
+
+def latest_results(model_hashes):
+    """{name: newest cached result for that model hash, or None}; never evaluates."""
+    results = _load_cache()["results"].values()
+    latest = {}
+    for name, sha in model_hashes.items():
+        matching = [r for r in results if r["model"] == name and r["model_sha256"] == sha]
+        latest[name] = max(matching, key=lambda r: r["evaluated_at"]) if matching else None
+    return latest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a Medi-Predictor model on labeled data.")
+    parser.add_argument('model', nargs='?', choices=sorted(FEATURES))
+    parser.add_argument('input', nargs='?', help="Labeled CSV or Parquet file")
+    parser.add_argument('--label', help="Label column (default: the training data's)")
+    parser.add_argument('--chunksize', type=int, help="Rows per chunk")
+    parser.add_argument('--force', action='store_true', help="Re-evaluate even if cached")
+    parser.add_argument('--list', action='store_true', help="Print cached results")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for result in _load_cache()["results"].values():
+            auc = "n/a" if result["roc_auc"] is None else f"{result['roc_auc']:.4f}"
+            print(f"{result['model']:<11} model={result['model_sha256'][:12]} data={result['dataset_sha256'][:12]} "
+                  f"rows={result['rows']} acc={result['accuracy']:.4f} auc={auc} ({result['evaluated_at']})")
+        return 0
+    if not args.model or not args.input:
+        parser.error("model and input are required unless --list is given")
+
+    result = evaluate(args.model, args.input, label=args.label, chunksize=args.chunksize, force=args.force)
+    c = result["confusion"]
+    print(f"{args.model}: {result['rows']} rows in {result['seconds']}s")
+    skipped = result["skipped"]
+    if any(skipped.values()):
+        print(f"  skipped   {skipped['invalid_features']} rows with missing or non-numeric features, "
+              f"{skipped['unlabeled']} without a 0/1 label")
+    print(f"  accuracy  {result['accuracy']:.4f}")
+    print(f"  precision {result['precision']:.4f}   recall {result['recall']:.4f}   f1 {result['f1']:.4f}")
+    print(f"  roc_auc   {'n/a' if result['roc_auc'] is None else format(result['roc_auc'], '.4f')}")
+    print(f"  confusion tn={c['tn']} fp={c['fp']} fn={c['fn']} tp={c['tp']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Native NumPy scorers compiled from the fitted sklearn models.
+
+sklearn's per-call input validation costs far more than the arithmetic
+for a single patient row. `compile_model` lifts the fitted parameters
+(coef_/intercept_ for linear models, support vectors and dual
+coefficients for kernel SVMs) into small scorer objects that do just the
+math. Every compiled scorer is checked for identical decisions against
+the original model before it is used.
+
+Parity check from the command line:
+    python fastpath.py --check
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+from model_registry import FEATURES, get_model
+
+
+def _weights(a):
+    """Contiguous float32/float64 view of a parameter array (no copy when possible)."""
+    a = np.asarray(a)
+    if a.dtype != np.float32 and a.dtype != np.float64:
+        a = a.astype(np.float64)
+    return np.ascontiguousarray(a)
+
+
+def as_matrix(X):
+    """2-D float64 view of the input; rejects NaN and infinity like sklearn's validation."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    finite = np.isfinite(X).all(axis=1)
+    if not finite.all():
+        bad = np.flatnonzero(~finite)
+        what = "NaN" if np.isnan(X[bad]).any() else "infinity"
+        rows = ", ".join(map(str, bad[:5].tolist())) + (", ..." if len(bad) > 5 else "")
+        raise ValueError(f"Input X contains {what} (row {rows}).")
+    return X
+
+
+class LinearScorer:
+    """decision(x) = x . w + b, for LogisticRegression and linear-kernel SVC."""
+
+    kind = "linear"
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = _weights(coef).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = self.coef.shape[0]
+
+    def decision_function(self, X):
+        return as_matrix(X) @ self.coef + self.intercept
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    def with_scaler(self, mean, scale):
+        """Folds a StandardScaler into the weights: w' = w / s, b' = b - w'.m"""
+        coef = self.coef / scale
+        intercept = self.intercept - (float(coef @ mean) if mean is not None else 0.0)
+        return LinearScorer(coef, intercept, self.classes_)
+
+
+class KernelSVCScorer:
+    """decision(x) = sum_i alpha_i K(sv_i, x) + b, for rbf/poly/sigmoid SVC."""
+
+    kind = "kernel"
+
+    def __init__(self, support_vectors, dual_coef, intercept, classes,
+                 kernel, gamma, coef0=0.0, degree=3, mean=None, scale=None):
+        self.support_vectors = _weights(support_vectors)
+        self.dual_coef = _weights(dual_coef).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+        self.classes_ = np.asarray(classes)
+        self.kernel = kernel
+        self.gamma = float(gamma)
+        self.coef0 = float(coef0)
+        self.degree = int(degree)
+        self.n_features_in_ = self.support_vectors.shape[1]
+        # Optional StandardScaler applied before the kernel
+        self.mean = None if mean is None else _weights(mean)
+        self.scale = None if scale is None else _weights(scale)
+        # ||sv||^2 is reused by every rbf evaluation
+        self._sv_sq = np.einsum('ij,ij->i', self.support_vectors, self.support_vectors)
+
+    def _kernel(self, X):
+        dots = X @ self.support_vectors.T
+        if self.kernel == 'rbf':
+            sq = np.einsum('ij,ij->i', X, X)[:, None] + self._sv_sq[None, :] - 2.0 * dots
+            return np.exp(-self.gamma * np.maximum(sq, 0.0))
+        if self.kernel == 'poly':
+            return (self.gamma * dots + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dots + self.coef0)
+
+    def decision_function(self, X):
+        X = as_matrix(X)
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        return self._kernel(X) @ self.dual_coef + self.intercept
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    def with_scaler(self, mean, scale):
+        """Returns a copy that standardizes its input before the kernel."""
+        return KernelSVCScorer(
+            self.support_vectors, self.dual_coef, self.intercept, self.classes_,
+            self.kernel, self.gamma, self.coef0, self.degree, mean, scale,
+        )
+
+
+class UnsupportedModel(TypeError):
+    """Raised when a model cannot be lowered to a NumPy scorer."""
+
+
+def compile_model(model):
+    """Builds a NumPy scorer from a fitted binary LogisticRegression or SVC.
+
+    A Pipeline of StandardScaler followed by one of those is also accepted.
+    """
+    steps = getattr(model, 'steps', None)
+    if steps is not None:
+        from sklearn.preprocessing import StandardScaler
+        if len(steps) != 2 or not isinstance(steps[0][1], StandardScaler):
+            raise UnsupportedModel("Only StandardScaler -> classifier pipelines can be compiled.")
+        scaler = steps[0][1]
+        n = scaler.n_features_in_
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+        return compile_model(steps[1][1]).with_scaler(scaler.mean_, scale)
+
+    classes = getattr(model, 'classes_', None)
+    if classes is None or len(classes) != 2:
+        raise UnsupportedModel("Only fitted binary classifiers can be compiled.")
+
+    kernel = getattr(model, 'kernel', None)
+    if kernel is None:
+        # LogisticRegression and other linear decision functions
+        if not hasattr(model, 'coef_'):
+            raise UnsupportedModel(f"{type(model).__name__} has no linear decision function.")
+        return LinearScorer(model.coef_, model.intercept_, classes)
+    if kernel == 'linear':
+        # Collapse the support vectors into a single weight vector
+        coef = np.asarray(model.dual_coef_) @ np.asarray(model.support_vectors_)
+        return LinearScorer(coef, model.intercept_, classes)
+    if kernel in ('rbf', 'poly', 'sigmoid'):
+        return KernelSVCScorer(
+            model.support_vectors_, model.dual_coef_, model.intercept_, classes,
+            kernel, model._gamma, model.coef0, model.degree,
+        )
+    raise UnsupportedModel(f"Kernel {kernel!r} is not supported.")
+
+
+def probe_inputs(model, n_features, n=2000, seed=0):
+    """Synthetic rows spread around the data the model has seen."""
+    rng = np.random.default_rng(seed)
+    sv = getattr(model, 'support_vectors_', None)
+    if sv is not None and len(sv):
+        sv = np.asarray(sv, dtype=np.float64)
+        center, scale = sv.mean(axis=0), sv.std(axis=0) + 1e-3
+        picks = sv[rng.integers(0, len(sv), n // 2)]
+        jitter = picks + rng.normal(0.0, 0.1, picks.shape) * scale
+        spread = center + rng.normal(0.0, 2.0, (n - n // 2, n_features)) * scale
+        return np.vstack([sv, jitter, spread])
+    return rng.normal(0.0, 1.0, (n, n_features)) * rng.choice([1.0, 10.0, 100.0], (n, 1))
+
+
+def verify(model, scorer, X):
+    """Returns the number of rows where the scorer and the model disagree."""
+    expected = model.predict(_named(model, X))
+    return int(np.count_nonzero(scorer.predict(X) != expected))
+
+
+def _named(model, X):
+    """Wraps X in a DataFrame when the model was fitted with feature names."""
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return X
+    import pandas as pd
+    return pd.DataFrame(X, columns=names)
+
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+def scorer_for(name, model):
+    """Returns the verified fast scorer for a model object, or the model itself.
+
+    Compiled scorers are cached per model object and fall back to sklearn
+    if compilation or the parity check fails.
+    """
+    if isinstance(model, (LinearScorer, KernelSVCScorer)):
+        # Already a scorer (e.g. mapped from a compact artifact)
+        return model
+    key = (name, id(model))
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] is model:
+        return cached[1]
+    with _lock:
+        cached = _compiled.get(key)
+        if cached is not None and cached[0] is model:
+            return cached[1]
+        try:
+            scorer = compile_model(model)
+            if verify(model, scorer, probe_inputs(model, len(FEATURES[name]))):
+                scorer = model
+        except UnsupportedModel:
+            scorer = model
+        _compiled[key] = (model, scorer)
+        # Keep the current and previous version of each model, so requests
+        # still finishing on the old one during a hot reload stay compiled
+        for stale in [k for k in _compiled if k[0] == name][:-2]:
+            del _compiled[stale]
+    return scorer
+
+
+def get_scorer(name):
+    """Returns the fast scorer for the registry's current model."""
+    return scorer_for(name, get_model(name))
+
+
+def main():
+    failed = False
+    for name in FEATURES:
+        model = get_model(name)
+        try:
+            scorer = compile_model(model)
+        except UnsupportedModel as e:
+            print(f"{name:<11} skipped: {e}")
+            continue
+        X = probe_inputs(model, len(FEATURES[name]))
+        mismatches = verify(model, scorer, X)
+        drift = np.max(np.abs(scorer.decision_function(X) - model.decision_function(_named(model, X))))
+        print(f"{name:<11} {type(model).__name__:<20} {scorer.kind:<7} rows={len(X)} "
+              f"mismatches={mismatches} max|Δdecision|={drift:.2e}")
+        failed |= mismatches > 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if '--check' not in sys.argv[1:]:
+        print(__doc__.strip())
+        sys.exit(0)
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Glossary engine behind the AI Health Assistant.
+
+Terms and their synonyms live in data/glossary.json. They are compiled
+once per process into a phrase index keyed by token tuples, and a query
+is answered with a single left-to-right pass over its tokens, so matches
+always respect word boundaries ("hi" no longer fires inside "chip") and
+lookup cost does not grow with the glossary size. Answers for
+normalized queries are kept in an LRU cache.
+
+When several entries match, the one with the lowest `priority` wins,
+then the one mentioned first in the query.
+"""
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+GLOSSARY_DB = os.environ.get("MEDI_GLOSSARY_DB", os.path.join(APP_DIR, "data", "glossary.json"))
+CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-cases text, drops apostrophes and splits it into word tokens."""
+    return tuple(_TOKEN.findall(text.lower().replace("'", "").replace("’", "")))
+
+
+class Glossary:
+    """Phrase index over glossary terms."""
+
+    def __init__(self, entries, default):
+        self.entries = entries
+        self.default = default
+        self.phrases = {}
+        self.max_len = 1
+        for order, entry in enumerate(entries):
+            rank = (entry.get("priority", 0), order)
+            for term in entry["terms"]:
+                key = tokenize(term)
+                if key and (key not in self.phrases or rank < self.phrases[key][0]):
+                    self.phrases[key] = (rank, entry)
+                    self.max_len = max(self.max_len, len(key))
+
+    def lookup(self, tokens):
+        """Returns the best matching entry for a token tuple, or None."""
+        best = None
+        for start in range(len(tokens)):
+            for length in range(1, min(self.max_len, len(tokens) - start) + 1):
+                hit = self.phrases.get(tokens[start:start + length])
+                if hit is None:
+                    continue
+                (priority, _), entry = hit
+                if best is None or (priority, start) < best[0]:
+                    best = ((priority, start), entry)
+        return best[1] if best else None
+
+
+def load_glossary(path=GLOSSARY_DB):
+    """Reads a glossary file and compiles its phrase index."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return Glossary(data["entries"], data["default"])
+
+
+_glossary = None
+_lock = threading.Lock()
+
+
+def get_glossary():
+    """Returns the process-wide glossary, loading it on first use."""
+    global _glossary
+    if _glossary is None:
+        with _lock:
+            if _glossary is None:
+                _glossary = load_glossary()
+    return _glossary
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _answer(tokens):
+    glossary = get_glossary()
+    entry = glossary.lookup(tokens)
+    return entry["response"] if entry else glossary.default
+
+
+def get_health_response(query):
+    """Answers a chat query from the glossary."""
+    return _answer(tokenize(query))
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Shared inference executor.
+
+Prediction pages and batch jobs hand their scoring work to one
+process-wide pool instead of running it on the Streamlit script thread.
+The pool is a thread pool by default (NumPy releases the GIL inside BLAS)
+or a process pool whose workers inherit preloaded models through fork.
+Jobs pass the shared admission controller first (see admission.py), which
+caps each model's concurrency, queues interactive predictions ahead of
+bulk chunks and fairly across users, and sheds load. Waiting for
+admission and waiting for the result share one deadline, and running
+past it surfaces as a user-facing InferenceError.
+
+The prediction cache lives in the calling process either way: in
+process mode the parent looks rows up, sends only the misses to a
+worker, and stores what comes back, so hits are shared by all workers
+and counted in the parent's cache stats.
+
+Configuration:
+    MEDI_INFERENCE_MODE         thread (default) | process
+    MEDI_INFERENCE_WORKERS      pool size (default: CPU count)
+    MEDI_MODEL_CONCURRENCY      max in-flight jobs per model (default: pool size;
+                                MEDI_CONCURRENCY_LIMITS overrides single models)
+    MEDI_INFERENCE_TIMEOUT      seconds before a prediction is abandoned (default: 10)
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from admission import INTERACTIVE, AdmissionError, get_admission
+from model_registry import MODEL_FILES, get_loaded
+from prediction_cache import cached_predict, prediction_cache
+
+MODE = os.environ.get("MEDI_INFERENCE_MODE", "thread")
+WORKERS = int(os.environ.get("MEDI_INFERENCE_WORKERS", str(os.cpu_count() or 2)))
+MODEL_CONCURRENCY = int(os.environ.get("MEDI_MODEL_CONCURRENCY", str(WORKERS)))
+TIMEOUT = float(os.environ.get("MEDI_INFERENCE_TIMEOUT", "10"))
+
+
+class InferenceError(RuntimeError):
+    """Base class for errors shown to users when a prediction cannot run."""
+
+
+class InferenceTimeout(InferenceError):
+    """The prediction did not finish within the timeout."""
+
+
+class InferenceBusy(InferenceError):
+    """Admission control shed the job or no slot became free within the timeout."""
+
+
+def _preload():
+    """Loads every available model (and its compiled scorer) in the current process."""
+    from fastpath import scorer_for
+    for name in MODEL_FILES:
+        try:
+            scorer_for(name, get_loaded(name).model)
+        except FileNotFoundError:
+            pass
+
+
+def _job(name, rows, versioned=False):
+    return cached_predict(name, rows, versioned)
+
+
+def _score(name, rows):
+    """Process-pool job: (predictions, model sha256, model version) from this worker's model."""
+    from fastpath import scorer_for
+    loaded = get_loaded(name)
+    return [int(p) for p in scorer_for(name, loaded.model).predict(rows)], loaded.sha256, loaded.version
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class InferenceExecutor:
+    """Pool behind per-model admission control."""
+
+    def __init__(self, workers=WORKERS, mode=MODE, model_concurrency=MODEL_CONCURRENCY,
+                 timeout=TIMEOUT, admission=None):
+        self.workers = workers
+        self.mode = mode
+        self.timeout = timeout
+        self.admission = admission or get_admission()
+        # Applies to models without a configured cap; the controller's own limits are left alone
+        self.model_concurrency = model_concurrency
+        if mode == 'process':
+            # Load models before forking so workers share the parent's pages
+            _preload()
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_preload)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='inference')
+
+    def submit(self, name, rows, timeout=None, versioned=False, user=None, priority=INTERACTIVE, on_wait=None):
+        """Admits and queues a scoring job; returns a Future of int predictions (and the model version).
+
+        `on_wait(position)` reports the job's place in the admission queue.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if self.mode == 'process':
+            loaded, keys, results, missing = lookup = prediction_cache.lookup(name, rows)
+            # Duplicate rows inside one call are scored once
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            if not missing:
+                return self._stamp(_completed((results, loaded.version) if versioned else results), deadline, timeout)
+        try:
+            ticket = self.admission.acquire(name, user, priority, timeout, on_wait, self.model_concurrency)
+        except AdmissionError as e:
+            raise InferenceBusy(str(e)) from e
+        try:
+            if self.mode == 'process':
+                job = self._pool.submit(_score, name, [list(key[2]) for key in unique])
+            else:
+                job = self._pool.submit(_job, name, rows, versioned)
+        except BaseException:
+            self.admission.release(ticket)
+            raise
+        job.add_done_callback(lambda _: self.admission.release(ticket))
+        future = self._merge(name, job, lookup, unique, versioned) if self.mode == 'process' else job
+        return self._stamp(future, deadline, timeout)
+
+    @staticmethod
+    def _stamp(future, deadline, timeout):
+        # result() waits only for what is left of the time budget that started at submit
+        future.deadline, future.timeout = deadline, timeout
+        return future
+
+    def _merge(self, name, job, lookup, unique, versioned):
+        """Future of the cached hits combined with a worker's predictions for the unique misses."""
+        loaded, keys, results, missing = lookup
+        merged = Future()
+
+        def done(job):
+            if job.cancelled():
+                merged.cancel()
+                return
+            try:
+                try:
+                    preds, sha256, version = job.result()
+                    fresh = dict(zip(unique, preds))
+                    # Cached only if the worker scored with the parent's current version
+                    if sha256 == loaded.sha256:
+                        prediction_cache.store(name, sha256, fresh)
+                    values = list(results)
+                    for i in missing:
+                        values[i] = fresh[keys[i]]
+                except BaseException as e:
+                    merged.set_exception(e)
+                else:
+                    merged.set_result((values, version) if versioned else values)
+            except InvalidStateError:
+                pass  # cancelled by a caller that timed out
+
+        merged.add_done_callback(lambda f: job.cancel() if f.cancelled() else None)
+        job.add_done_callback(done)
+        return merged
+
+    def predict(self, name, rows, timeout=None, versioned=False, user=None, priority=INTERACTIVE, on_wait=None):
+        """Scores rows on the pool and waits for the result, all within one timeout."""
+        return self.result(name, self.submit(name, rows, timeout, versioned, user, priority, on_wait))
+
+    def result(self, name, future, timeout=None):
+        """Waits for a submitted job until the deadline set at submit, then cancels it.
+
+        `timeout` only applies to futures that did not come from submit.
+        """
+        timeout = getattr(future, 'timeout', self.timeout if timeout is None else timeout)
+        deadline = getattr(future, 'deadline', None)
+        try:
+            return future.result(timeout=timeout if deadline is None else max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            future.cancel()
+            raise InferenceTimeout(
+                f"The {name} prediction took longer than {timeout:g}s and was cancelled. Please retry."
+            )
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the process-wide executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = InferenceExecutor()
+    return _executor
+
+
+def run_inference(name, rows, timeout=None, versioned=False, user=None, priority=INTERACTIVE, on_wait=None):
+    """Predicts off the calling thread through the shared executor.
+
+    With `versioned`, returns (predictions, model version) instead.
+    """
+    return get_executor().predict(name, rows, timeout, versioned, user, priority, on_wait)
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Concurrent-session load test for the Medi-Predictor app.
+
+Each simulated user is an AppTest session (Streamlit's headless test
+harness, which executes the real eleventh.py with its own session state).
+A session logs in, then loops over realistic actions: switching pages in
+the sidebar, filling and submitting the prediction and screening forms,
+searching and analysing symptoms, and chatting with the assistant.
+Every action is one or more script reruns and is timed.
+
+AppTest keeps process-global runtime state, so each session runs in its
+own worker process; all workers start together after logging in and
+share the same SQLite stores. CPU is the workers' combined CPU time over
+the step's wall time (100% = one core), and RSS is the sum of the
+workers' peaks, so both approximate what one server process hosting N
+sessions would need (minus the models and caches it would share).
+
+That also bounds what the numbers mean: only the SQLite stores are shared.
+Each worker has its own inference executor, admission queues and
+prediction cache, so the run measures N independent single-session
+servers side by side and never shows contention on one server's
+executor, queueing in its admission controller or a cache warmed by other
+users. The limit is repeated in the report's meta.
+
+For each concurrency step the report lists throughput (reruns/s),
+p50/p95/p99 rerun latency, per-action latency, errors, CPU and peak
+RSS. Results are written as JSON and can be compared with a baseline;
+a step whose p95 regresses by more than the threshold fails the run.
+
+    python loadtest.py --steps 1,2,4,8 --duration 20
+    python loadtest.py --save-baseline
+    python loadtest.py --baseline loadtest_baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(APP_DIR, 'eleventh.py')
+DEFAULT_OUTPUT = os.path.join(APP_DIR, 'loadtest_results.json')
+DEFAULT_BASELINE = os.path.join(APP_DIR, 'loadtest_baseline.json')
+PASSWORD = "load-test"
+# A session stops after this many failed actions in a row
+MAX_CONSECUTIVE_ERRORS = 20
+# Seconds all sessions together may take to log in before a step is abandoned
+START_TIMEOUT = 300
+# Recorded in every report so results are not read as shared-server contention
+ISOLATION = ("one process per session: SQLite stores are shared, but each session has its own "
+             "inference executor, admission queues and prediction cache")
+
+PAGES = ['Home Dashboard', '🔍 Symptom Checker', '🩸 Diabetes Check', '💓 Heart Disease Check',
+         '🧠 Parkinsons Check', '🩺 Full Screening', '📈 My History']
+SYMPTOM_QUERIES = ["shaking", "tummy ache", "chest pain", "fever", "short of breath", "diarhea", "dizzy"]
+CHAT_QUERIES = ["What is BMI?", "Explain Glucose", "hello", "What are Chest Pain types?", "what is insulin"]
+
+
+def _pct(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+class Session:
+    """One simulated user with its own AppTest instance."""
+
+    def __init__(self, username, seed):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(SCRIPT, default_timeout=60)
+        self.username = username
+        self.rng = random.Random(seed)
+        self.samples = []   # (action, ms, reruns)
+        self.errors = 0
+        self.consecutive_errors = 0
+
+    def _button(self, label, prefix=False):
+        for button in self.app.button:
+            if button.label == label or (prefix and button.label.startswith(label)):
+                return button
+        raise LookupError(f"No button {label!r}")
+
+    def _timed(self, action, step, reruns=1):
+        t0 = time.perf_counter()
+        try:
+            step()
+            if self.app.exception:
+                raise RuntimeError(self.app.exception[0].value)
+        except Exception:
+            self.errors += 1
+            self.consecutive_errors += 1
+            return
+        self.consecutive_errors = 0
+        self.samples.append((action, (time.perf_counter() - t0) * 1000, reruns))
+
+    def _goto(self, page):
+        self._timed(f"navigate[{page}]", lambda: self.app.sidebar.radio[0].set_value(page).run())
+
+    def login(self):
+        self._timed("open", self.app.run)
+
+        def submit():
+            self.app.text_input(key="login_user").set_value(self.username)
+            self.app.text_input(key="login_pass").set_value(PASSWORD)
+            self._button("Log In").click().run()
+        self._timed("login", submit)
+
+    def _fill_form(self):
+        for field in self.app.number_input:
+            if field.value is None:
+                # Optional inputs start empty and cannot be stepped; pick a value in range
+                low = field.min if field.min is not None else 0
+                high = field.max if field.max is not None else low + 10 * field.step
+                field.set_value(low + field.step * self.rng.randint(0, int((high - low) / field.step)))
+                continue
+            for _ in range(self.rng.randint(0, 3)):
+                field.increment()
+
+    def predict(self, page, submit_label):
+        self._goto(page)
+        self._fill_form()
+        self._timed(f"predict[{page}]", lambda: self._button(submit_label).click().run())
+
+    def symptoms(self):
+        self._goto('🔍 Symptom Checker')
+        query = self.rng.choice(SYMPTOM_QUERIES)
+        self._timed("symptom_search", lambda: self.app.text_input[0].set_value(query).run())
+
+        def pick_and_analyze():
+            self._button("➕", prefix=True).click().run()
+            self._button("🔍 Analyze Condition").click().run()
+        self._timed("symptom_analyze", pick_and_analyze, reruns=2)
+
+    def chat(self):
+        query = self.rng.choice(CHAT_QUERIES)
+        self._timed("chat", lambda: self.app.chat_input[0].set_value(query).run())
+
+    def step(self):
+        action = self.rng.choice(("navigate", "diabetes", "heart", "parkinsons", "screening", "symptoms", "chat"))
+        if action == "navigate":
+            self._goto(self.rng.choice(PAGES))
+        elif action == "diabetes":
+            self.predict('🩸 Diabetes Check', 'Analyze Risk')
+        elif action == "heart":
+            self.predict('💓 Heart Disease Check', 'Evaluate Heart Health')
+        elif action == "parkinsons":
+            self.predict('🧠 Parkinsons Check', 'Analyze Neural Signs')
+        elif action == "screening":
+            self.predict('🩺 Full Screening', 'Run Full Screening')
+        elif action == "symptoms":
+            self.symptoms()
+        else:
+            self.chat()
+
+
+def _worker(username, seed, duration, barrier, results):
+    """Runs one session in its own process and reports samples and resource use."""
+    session = Session(username, seed)
+    session.login()
+    login_ms = [ms for action, ms, _ in session.samples if action == "login"]
+    session.samples.clear()
+
+    stop = threading.Event()
+    rss_peak = [_rss_mb()]
+
+    def sample_rss():
+        while not stop.wait(0.25):
+            rss_peak[0] = max(rss_peak[0], _rss_mb())
+
+    threading.Thread(target=sample_rss, daemon=True).start()
+    try:
+        barrier.wait(START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        # The driver gave up on this step (another session failed to start)
+        stop.set()
+        return
+    cpu0 = os.times()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline and session.consecutive_errors < MAX_CONSECUTIVE_ERRORS:
+        session.step()
+    cpu1 = os.times()
+    stop.set()
+    results.put({
+        "samples": session.samples,
+        "login_ms": login_ms,
+        "errors": session.errors,
+        "cpu_s": (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system),
+        "rss_mb": max(rss_peak[0], _rss_mb()),
+    })
+
+
+def run_step(concurrency, duration, seed=0):
+    """Runs `concurrency` sessions for `duration` seconds; returns the step report."""
+    ctx = multiprocessing.get_context()
+    barrier = ctx.Barrier(concurrency + 1)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker, args=(f"loaduser{i}", seed + i, duration, barrier, results), daemon=True)
+        for i in range(concurrency)
+    ]
+    for w in workers:
+        w.start()
+    try:
+        barrier.wait(START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        for w in workers:
+            w.terminate()
+        raise RuntimeError(f"{concurrency} session(s) did not all log in within {START_TIMEOUT}s") from None
+    t0 = time.perf_counter()
+    # Login happens before the barrier, so only the driven window is bounded here
+    reports = [results.get(timeout=duration + 300) for _ in workers]
+    wall = time.perf_counter() - t0
+    for w in workers:
+        w.join()
+
+    samples = [x for r in reports for x in r["samples"]]
+    # Multi-rerun actions are spread evenly over their reruns
+    reruns = sorted(ms / n for _, ms, n in samples for _ in range(n))
+    logins = sorted(ms for r in reports for ms in r["login_ms"])
+    actions = {}
+    for action, ms, _ in samples:
+        actions.setdefault(action, []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(wall, 3),
+        "reruns": len(reruns),
+        "throughput_rps": round(len(reruns) / wall, 3),
+        "p50_ms": round(_pct(reruns, 0.50) or 0, 3),
+        "p95_ms": round(_pct(reruns, 0.95) or 0, 3),
+        "p99_ms": round(_pct(reruns, 0.99) or 0, 3),
+        "login_p50_ms": round(_pct(logins, 0.50) or 0, 3),
+        "errors": sum(r["errors"] for r in reports),
+        "cpu_percent": round(sum(r["cpu_s"] for r in reports) / wall * 100, 1),
+        "rss_mb_peak": round(sum(r["rss_mb"] for r in reports), 1),
+        "actions": {
+            name: {"count": len(v), "p50_ms": round(_pct(sorted(v), 0.5), 3), "p95_ms": round(_pct(sorted(v), 0.95), 3)}
+            for name, v in sorted(actions.items())
+        },
+    }
+
+
+def compare(steps, baseline, threshold):
+    """Returns [(concurrency, base_p95, now_p95, ratio)] for steps slower than the baseline."""
+    base = {s["concurrency"]: s for s in baseline.get("steps", [])}
+    regressions = []
+    for step in steps:
+        old = base.get(step["concurrency"])
+        if not old or not old.get("p95_ms"):
+            continue
+        ratio = step["p95_ms"] / old["p95_ms"]
+        if ratio > 1 + threshold:
+            regressions.append((step["concurrency"], old["p95_ms"], step["p95_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test eleventh.py with concurrent simulated sessions.")
+    parser.add_argument('--steps', default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per step")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed p95 slowdown before flagging")
+    parser.add_argument('--save-baseline', action='store_true', help="Write results to the baseline file")
+    args = parser.parse_args(argv)
+    levels = [int(x) for x in args.steps.split(',') if x.strip()]
+    print(f"Isolation: {ISOLATION}.")
+
+    # Keep test accounts and predictions out of the real stores, even when
+    # the environment points the app at them
+    tmp = tempfile.mkdtemp(prefix='medi-load-')
+    os.environ["MEDI_USER_DB"] = os.path.join(tmp, 'users.sqlite3')
+    os.environ["MEDI_HISTORY_DB"] = os.path.join(tmp, 'history.sqlite3')
+    sys.path.insert(0, APP_DIR)
+    try:
+        import hashlib
+        from user_store import get_user_store
+        store = get_user_store()
+        for i in range(max(levels)):
+            store.add(f"loaduser{i}", f"Load User {i}", hashlib.sha256(PASSWORD.encode()).hexdigest())
+
+        steps = []
+        for level in levels:
+            print(f"[{level} concurrent session(s), {args.duration:g}s]")
+            step = run_step(level, args.duration, args.seed)
+            steps.append(step)
+            print(f"  {step['throughput_rps']:8.1f} reruns/s   p50 {step['p50_ms']:8.1f} ms   p95 {step['p95_ms']:8.1f} ms   "
+                  f"p99 {step['p99_ms']:8.1f} ms   cpu {step['cpu_percent']:6.1f}%   rss {step['rss_mb_peak']:7.1f} MB   "
+                  f"errors {step['errors']}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "duration_s": args.duration,
+            "isolation": ISOLATION,
+        },
+        "steps": steps,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(steps)} steps to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(steps, json.load(f), args.threshold)
+        for level, base, now, ratio in regressions:
+            print(f"REGRESSION at {level} sessions: p95 {base:.1f} ms -> {now:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
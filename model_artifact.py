@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, memory-mappable model artifact.
+
+The fitted parameters of all three models (coefficients, intercepts,
+support vectors, dual coefficients and scaler parameters) are written
+into one flat file that can be mapped read-only with zero copies. Every
+worker process that maps the same file shares one physical copy of the
+weights, and loading needs neither sklearn nor unpickling.
+
+File layout (little endian):
+    8 bytes   magic b"MEDIART\\0"
+    4 bytes   format version (uint32)
+    4 bytes   header length N (uint32)
+    N bytes   UTF-8 JSON header describing each model and its arrays
+    ...       raw arrays, each aligned to 64 bytes, offsets relative to file start
+
+    python model_artifact.py export -o models.medi [--float32]
+    python model_artifact.py inspect models.medi
+
+Serve from the artifact by setting MEDI_MODEL_ARTIFACT=models.medi.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+from fastpath import KernelSVCScorer, LinearScorer, compile_model
+
+MAGIC = b"MEDIART\0"
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _scorer_arrays(scorer):
+    """Splits a compiled scorer into (params, {array_name: ndarray})."""
+    if isinstance(scorer, LinearScorer):
+        return {"kind": "linear", "intercept": scorer.intercept}, {"coef": scorer.coef}
+    arrays = {"support_vectors": scorer.support_vectors, "dual_coef": scorer.dual_coef}
+    if scorer.mean is not None:
+        arrays["mean"] = scorer.mean
+    if scorer.scale is not None:
+        arrays["scale"] = scorer.scale
+    params = {
+        "kind": "kernel", "intercept": scorer.intercept, "kernel": scorer.kernel,
+        "gamma": scorer.gamma, "coef0": scorer.coef0, "degree": scorer.degree,
+    }
+    return params, arrays
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def export(models, path, float32=False):
+    """Writes {name: (fitted_model, source_sha256)} into a compact artifact."""
+    entries, blobs = {}, []
+    for name, (model, sha256) in models.items():
+        params, arrays = _scorer_arrays(compile_model(model))
+        params["classes"] = [c.item() if hasattr(c, 'item') else c for c in model.classes_]
+        params["sha256"] = sha256
+        params["arrays"] = {}
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr, dtype=np.float32 if float32 else np.float64)
+            params["arrays"][key] = {"shape": list(arr.shape), "dtype": arr.dtype.str}
+            blobs.append((params["arrays"][key], arr))
+        entries[name] = params
+
+    # Offsets depend on the header size, which depends on the offsets' digits;
+    # reserve room by laying out with a generous header estimate first
+    header_room = _aligned(_PREAMBLE.size + len(json.dumps(entries)) + 64 * (len(blobs) + 1))
+    offset = header_room
+    for meta, arr in blobs:
+        meta["offset"] = offset
+        offset = _aligned(offset + arr.nbytes)
+    header = json.dumps({"format": FORMAT_VERSION, "models": entries}).encode()
+    if _PREAMBLE.size + len(header) > header_room:
+        raise ValueError("Artifact header overflowed its reserved space.")
+
+    # Written beside the target and renamed over it: processes that have the
+    # old file mapped keep reading the old inode instead of faulting on a
+    # file truncated and rewritten under them
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            os.fchmod(f.fileno(), 0o644)  # mkstemp creates 0600; other workers map it too
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for meta, arr in blobs:
+                f.seek(meta["offset"])
+                f.write(arr.tobytes())
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return entries
+
+
+class Artifact:
+    """A read-only mapping of an artifact file; arrays are zero-copy views."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, hlen = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Medi-Predictor model artifact.")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact version {version} (expected {FORMAT_VERSION}).")
+        self.header = json.loads(self._mm[_PREAMBLE.size:_PREAMBLE.size + hlen])
+        self.models = self.header["models"]
+
+    def array(self, meta):
+        shape = tuple(meta["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self._mm, dtype=np.dtype(meta["dtype"]), count=count,
+                             offset=meta["offset"]).reshape(shape)
+
+    def scorer(self, name):
+        """Builds the NumPy scorer for one model directly on the mapped arrays."""
+        params = self.models[name]
+        arrays = {key: self.array(meta) for key, meta in params["arrays"].items()}
+        classes = np.asarray(params["classes"])
+        if params["kind"] == "linear":
+            return LinearScorer(arrays["coef"], params["intercept"], classes)
+        return KernelSVCScorer(
+            arrays["support_vectors"], arrays["dual_coef"], params["intercept"], classes,
+            params["kernel"], params["gamma"], params["coef0"], params["degree"],
+            mean=arrays.get("mean"), scale=arrays.get("scale"),
+        )
+
+    def sha256(self, name):
+        """Content hash of the pickle the model was exported from."""
+        return self.models[name]["sha256"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or inspect a compact model artifact.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    exp = sub.add_parser('export', help="Convert the registry's .sav models")
+    exp.add_argument('-o', '--output', default='models.medi')
+    exp.add_argument('--float32', action='store_true', help="Store weights as float32")
+    ins = sub.add_parser('inspect', help="Print an artifact's header")
+    ins.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        import hashlib
+        import pickle
+        from model_registry import MODEL_FILES, model_path
+        models = {}
+        for name in MODEL_FILES:
+            with open(model_path(name), 'rb') as f:
+                data = f.read()
+            models[name] = (pickle.loads(data), hashlib.sha256(data).hexdigest())
+        export(models, args.output, float32=args.float32)
+        print(f"Wrote {len(models)} models to {args.output}")
+    else:
+        art = Artifact(args.path)
+        for name, params in art.models.items():
+            arrays = ", ".join(f"{k}{tuple(m['shape'])}:{m['dtype']}" for k, m in params["arrays"].items())
+            print(f"{name:<11} {params['kind']:<7} sha256={params['sha256'][:12]} {arrays}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide model registry for Medi-Predictor.
+
+Every model is unpickled at most once per process, the first time a page
+asks for it, and the loaded object is shared by all Streamlit sessions.
+Paths are resolved relative to the app directory and can be overridden
+through environment variables.
+
+A background watcher re-checks the loaded models' files every
+MEDI_MODEL_CHECK_INTERVAL seconds (0 disables it). A changed file is
+loaded and validated off the request path and then swapped in with a
+single reference assignment: predictions already holding the old
+LoadedModel finish on it, new ones get the new version, and a file that
+fails validation is logged and ignored until it changes again.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Directory holding the *.sav files (defaults to the app folder)
+MODEL_DIR = os.environ.get("MEDI_MODEL_DIR", APP_DIR)
+
+# Per-model file names; absolute paths are used as-is
+MODEL_FILES = {
+    "diabetes": os.environ.get("MEDI_DIABETES_MODEL", "trained_model.sav"),
+    "heart": os.environ.get("MEDI_HEART_MODEL", "heart_disease_model.sav"),
+    "parkinsons": os.environ.get("MEDI_PARKINSONS_MODEL", "parkinsons_model.sav"),
+}
+
+# Seconds between checks for changed model files (0 disables hot reload)
+WATCH_INTERVAL = float(os.environ.get("MEDI_MODEL_CHECK_INTERVAL", "5"))
+
+logger = logging.getLogger("medi.models")
+
+# Optional compact artifact (see model_artifact.py); when set, models are
+# memory-mapped from it instead of unpickled from the .sav files
+MODEL_ARTIFACT = os.environ.get("MEDI_MODEL_ARTIFACT")
+
+# Column order each model was trained on
+FEATURES = {
+    "diabetes": [
+        "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+        "Insulin", "BMI", "DiabetesPedigreeFunction", "Age",
+    ],
+    "heart": [
+        "age", "sex", "cp", "trestbps", "chol", "fbs", "restecg",
+        "thalach", "exang", "oldpeak", "slope", "ca", "thal",
+    ],
+    "parkinsons": [
+        "MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)",
+        "MDVP:Jitter(Abs)", "MDVP:RAP", "MDVP:PPQ", "Jitter:DDP",
+        "MDVP:Shimmer", "MDVP:Shimmer(dB)", "Shimmer:APQ3", "Shimmer:APQ5",
+        "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR", "RPDE", "DFA",
+        "spread1", "spread2", "D2", "PPE",
+    ],
+}
+
+_models = {}
+_locks = {name: threading.Lock() for name in MODEL_FILES}
+_rejected = {}
+
+
+class LoadedModel:
+    """A model together with the identity of the file it came from."""
+
+    __slots__ = ("name", "model", "sha256", "signature", "loaded_at")
+
+    def __init__(self, name, model, sha256, signature):
+        self.name = name
+        self.model = model
+        self.sha256 = sha256
+        self.signature = signature
+        self.loaded_at = time.time()
+
+    @property
+    def version(self):
+        """Short content hash shown to users and stored with predictions."""
+        return self.sha256[:12]
+
+
+def model_path(name):
+    """Returns the absolute path of a model file."""
+    path = MODEL_FILES[name]
+    if not os.path.isabs(path):
+        path = os.path.join(MODEL_DIR, path)
+    return path
+
+
+def source_path(name):
+    """The file a model is actually loaded from (artifact or pickle)."""
+    return MODEL_ARTIFACT or model_path(name)
+
+
+def file_signature(name):
+    """Cheap change detector for a model file: (mtime_ns, size)."""
+    st = os.stat(source_path(name))
+    return (st.st_mtime_ns, st.st_size)
+
+
+_artifact = None
+
+
+def _load_from_artifact(name, signature):
+    global _artifact
+    # Imported lazily: the artifact path never needs sklearn or pickle
+    from model_artifact import Artifact
+    if _artifact is None or _artifact[0] != signature:
+        _artifact = (signature, Artifact(MODEL_ARTIFACT))
+    art = _artifact[1]
+    return LoadedModel(name, art.scorer(name), art.sha256(name), signature)
+
+
+def _load(name):
+    signature = file_signature(name)
+    if MODEL_ARTIFACT:
+        return _load_from_artifact(name, signature)
+    with open(model_path(name), 'rb') as f:
+        data = f.read()
+    return LoadedModel(name, pickle.loads(data), hashlib.sha256(data).hexdigest(), signature)
+
+
+def get_loaded(name):
+    """Returns the shared LoadedModel, unpickling it on first use."""
+    if _watcher_pid != os.getpid():
+        start_watcher()
+    loaded = _models.get(name)
+    if loaded is not None:
+        return loaded
+    # Only one thread unpickles a given model; the others wait and reuse it
+    with _locks[name]:
+        loaded = _models.get(name)
+        if loaded is None:
+            loaded = _models[name] = _load(name)
+    return loaded
+
+
+def get_model(name):
+    """Returns the shared model object."""
+    return get_loaded(name).model
+
+
+def validate(name, loaded):
+    """Raises ValueError unless a freshly loaded model can serve this app's inputs."""
+    from fastpath import scorer_for
+    features = FEATURES[name]
+    model = loaded.model
+    n_in = getattr(model, 'n_features_in_', None)
+    if n_in is not None and n_in != len(features):
+        raise ValueError(f"{name} model expects {n_in} features, the app sends {len(features)}")
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and list(names) != features:
+        raise ValueError(f"{name} model was trained on different columns")
+    # Compiles (and parity-checks) the fast scorer before any request needs it
+    if len(scorer_for(name, model).predict([[0.0] * len(features)])) != 1:
+        raise ValueError(f"{name} model returned a malformed prediction")
+
+
+def reload_if_changed(name):
+    """Loads, validates and swaps in a changed model file; returns True if it did."""
+    loaded = _models.get(name)
+    if loaded is None:
+        return False
+    try:
+        signature = file_signature(name)
+    except FileNotFoundError:
+        return False
+    if signature == loaded.signature or signature == _rejected.get(name):
+        return False
+    # Requests never take this lock once a model is loaded, so they keep
+    # scoring on the current version while the new one is prepared
+    with _locks[name]:
+        if _models.get(name) is not loaded:
+            return False
+        try:
+            fresh = _load(name)
+            validate(name, fresh)
+        except Exception as e:
+            _rejected[name] = signature
+            logger.warning("Keeping %s model %s; new file rejected: %s", name, loaded.version, e)
+            return False
+        _models[name] = fresh
+    logger.info("Swapped %s model %s -> %s", name, loaded.version, fresh.version)
+    return True
+
+
+_watcher_pid = None
+_watch_lock = threading.Lock()
+
+
+def _watch(interval):
+    while True:
+        time.sleep(interval)
+        for name in list(_models):
+            try:
+                reload_if_changed(name)
+            except Exception:
+                logger.exception("Model watcher failed for %s", name)
+
+
+def start_watcher(interval=WATCH_INTERVAL):
+    """Starts the hot-reload watcher thread once per process (also after fork)."""
+    global _watcher_pid
+    with _watch_lock:
+        if _watcher_pid == os.getpid():
+            return
+        _watcher_pid = os.getpid()
+        if interval > 0:
+            threading.Thread(target=_watch, args=(interval,), name="model-watcher", daemon=True).start()
+
+
+def loaded_models():
+    """Names of the models currently held in memory."""
+    return sorted(_models)
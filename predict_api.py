@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Headless HTTP/JSON prediction service for the three disease models.
+
+Concurrent requests for the same model are collected into micro-batches
+(bounded by a maximum batch size and a maximum wait) and scored with a
+single vectorized `predict` call. Rows are validated per request before
+they join a batch, and a batch that still fails is rescored row by row,
+so one client's bad input never fails another client's request.
+
+Endpoints:
+    POST /predict/<diabetes|heart|parkinsons>
+         {"features": {...}}            one patient, keyed by feature name
+         {"rows": [{...}, [...], ...]}  several patients (dicts or ordered lists)
+    GET  /stats                         per-model queue depth, batch and latency stats
+    GET  /metrics                       Prometheus text metrics (see telemetry.py)
+    GET  /health
+
+Run locally:
+    python predict_api.py --port 8600
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from model_registry import FEATURES
+from fastpath import get_scorer
+from telemetry import render_prometheus
+
+MAX_BATCH = 64
+MAX_WAIT_MS = 2.0
+LATENCY_WINDOW = 2048
+
+
+class MicroBatcher:
+    """Collects rows for one model and scores them in small vectorized batches."""
+
+    def __init__(self, name, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Queues one feature row and returns a Future for its prediction."""
+        fut = Future()
+        self._queue.put((row, fut, time.perf_counter()))
+        return fut
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                X = np.asarray([row for row, _, _ in batch], dtype=np.float64)
+                preds = get_scorer(self.name).predict(X)
+            except Exception:
+                self._run_rows(batch)
+                continue
+            done = time.perf_counter()
+            for (_, fut, queued), pred in zip(batch, preds):
+                fut.set_result(int(pred))
+            with self._stats_lock:
+                self.batches += 1
+                self.rows += len(batch)
+                self._latencies.extend(done - queued for _, _, queued in batch)
+
+    def _run_rows(self, batch):
+        # Isolates the failing rows so only their senders get the error
+        for row, fut, _ in batch:
+            try:
+                fut.set_result(int(get_scorer(self.name).predict(np.asarray([row], dtype=np.float64))[0]))
+            except Exception as e:
+                fut.set_exception(e)
+
+    def stats(self):
+        with self._stats_lock:
+            lat = sorted(self._latencies)
+            batches, rows = self.batches, self.rows
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 3) if lat else None
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": round(rows / batches, 2) if batches else 0,
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)},
+        }
+
+
+def to_row(name, item):
+    """Orders a dict (by feature name) or list into the model's feature vector of finite floats."""
+    features = FEATURES[name]
+    if isinstance(item, dict):
+        missing = [f for f in features if f not in item]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+        row = [float(item[f]) for f in features]
+    else:
+        if len(item) != len(features):
+            raise ValueError(f"Expected {len(features)} values, got {len(item)}")
+        row = [float(v) for v in item]
+    bad = [f for f, v in zip(features, row) if not np.isfinite(v)]
+    if bad:
+        raise ValueError(f"Non-finite values for: {', '.join(bad)}")
+    return row
+
+
+class PredictionService:
+    """Owns one MicroBatcher per model."""
+
+    def __init__(self, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, timeout=10.0):
+        self.timeout = timeout
+        self.batchers = {name: MicroBatcher(name, max_batch, max_wait_ms) for name in FEATURES}
+
+    def predict(self, name, rows):
+        # Every row is checked before any is queued, so a bad request scores nothing
+        checked = []
+        for i, item in enumerate(rows):
+            try:
+                checked.append(to_row(name, item))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Row {i}: {e}") from None
+        futures = [self.batchers[name].submit(row) for row in checked]
+        return [f.result(timeout=self.timeout) for f in futures]
+
+    def stats(self):
+        return {name: b.stats() for name, b in self.batchers.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {"status": "ok"})
+        elif self.path == '/stats':
+            self._send(200, self.service.stats())
+        elif self.path == '/metrics':
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'predict' or parts[1] not in FEATURES:
+            self._send(404, {"error": f"Unknown endpoint. Models: {', '.join(FEATURES)}"})
+            return
+        name = parts[1]
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            rows = payload['rows'] if 'rows' in payload else [payload['features']]
+            preds = self.service.predict(name, rows)
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"model": name, "predictions": preds})
+
+
+def serve(host='127.0.0.1', port=8600, **service_opts):
+    """Starts the API on a background thread and returns the server (port=0 picks a free port)."""
+    handler = type('Handler', (_Handler,), {'service': PredictionService(**service_opts)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="predict-api", daemon=True).start()
+    return server
+
+
+class PredictClient:
+    """Minimal JSON client for the prediction API."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def _call(self, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data,
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+
+    def predict(self, name, features):
+        return self._call(f"/predict/{name}", {"features": features})["predictions"][0]
+
+    def predict_many(self, name, rows):
+        return self._call(f"/predict/{name}", {"rows": rows})["predictions"]
+
+    def stats(self):
+        return self._call("/stats")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Medi-Predictor models over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    print(f"Serving predictions on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide memoization of model predictions.
+
+Entries are keyed by the model file's content hash plus the canonical
+feature vector (optionally rounded per feature), held in a bounded LRU,
+and counted as hits/misses/evictions. When the registry's watcher swaps
+in a new model version, entries for the old content hash are dropped the
+first time the new version is used, and results a request computed with
+the old version after that point are returned but not cached.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from model_registry import FEATURES, get_loaded
+from fastpath import as_matrix, scorer_for
+from telemetry import register_gauge
+
+CACHE_SIZE = int(os.environ.get("MEDI_PREDICTION_CACHE_SIZE", "100000"))
+
+# Optional per-model rounding, e.g. {"diabetes": {"BMI": 1, "DiabetesPedigreeFunction": 3}}
+ROUNDING = {name: {} for name in FEATURES}
+ROUNDING.update(json.loads(os.environ.get("MEDI_CACHE_ROUNDING", "{}")))
+
+
+class PredictionCache:
+    """Bounded LRU of (model hash, model name, feature tuple) -> prediction."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def canonical(self, name, row):
+        """Float tuple with per-feature rounding applied and -0.0 folded into 0.0."""
+        rounding = ROUNDING.get(name) or {}
+        if not rounding:
+            return tuple(float(v) + 0.0 for v in row)
+        return tuple(
+            round(float(v), rounding[f]) + 0.0 if f in rounding else float(v) + 0.0
+            for f, v in zip(FEATURES[name], row)
+        )
+
+    def _current(self, name):
+        """Returns the LoadedModel to score with, dropping entries of replaced versions."""
+        loaded = get_loaded(name)
+        if self._versions.get(name) != loaded.sha256:
+            self._invalidate(name, loaded.sha256)
+        return loaded
+
+    def _invalidate(self, name, sha256):
+        with self._lock:
+            if get_loaded(name).sha256 != sha256:
+                # A request that fetched the model before a newer swap must not roll the version back
+                return
+            old = self._versions.get(name)
+            self._versions[name] = sha256
+            if old is not None:
+                for key in [k for k in self._data if k[0] == old]:
+                    del self._data[key]
+
+    def predict(self, name, rows):
+        """Returns a list of int predictions, scoring only uncached rows."""
+        return self.predict_versioned(name, rows)[0]
+
+    def predict_versioned(self, name, rows):
+        """Like predict, plus the version of the model that produced the results."""
+        loaded, keys, results, missing = self.lookup(name, rows)
+        if missing:
+            # Duplicate rows inside one call are scored once
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            preds = scorer_for(name, loaded.model).predict([list(k[2]) for k in unique])
+            fresh = {k: int(p) for k, p in zip(unique, preds)}
+            for i in missing:
+                results[i] = fresh[keys[i]]
+            self.store(name, loaded.sha256, fresh)
+        return results, loaded.version
+
+    def lookup(self, name, rows):
+        """Returns (LoadedModel, keys, results with None for misses, indices of the misses).
+
+        Misses are scored by the caller (possibly in another process) and
+        handed back through store().
+        """
+        # Rejected before the lookup so row numbers refer to this call and bad rows never hit the cache
+        as_matrix(rows)
+        loaded = self._current(name)
+        keys = [(loaded.sha256, name, self.canonical(name, row)) for row in rows]
+        results = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._data.get(key)
+                if value is None:
+                    missing.append(i)
+                else:
+                    self._data.move_to_end(key)
+                    results[i] = value
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return loaded, keys, results, missing
+
+    def store(self, name, sha256, fresh):
+        """Caches {key: prediction} scored with model version `sha256` if that is still current."""
+        with self._lock:
+            if self._versions.get(name) != sha256:
+                # The model was swapped while scoring and its old entries already dropped
+                return
+            for key, value in fresh.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+prediction_cache = PredictionCache()
+register_gauge(
+    "medi_prediction_cache", "Prediction cache counters.",
+    lambda: {(("stat", k),): v for k, v in prediction_cache.stats().items()},
+)
+
+
+def cached_predict(name, rows, versioned=False):
+    """Predicts through the shared process-wide cache; with `versioned`, returns (results, version)."""
+    if versioned:
+        return prediction_cache.predict_versioned(name, rows)
+    return prediction_cache.predict(name, rows)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Per-user prediction history.
+
+Every interactive prediction (user, model, model version, inputs,
+result, timestamp) is persisted to an SQLite database in WAL mode. The table is clustered on
+(user, ts), so one user's history is a contiguous range scan no matter
+how many predictions other users have stored.
+
+Pages never wait for the disk: `record()` only enqueues the row, and a
+background writer drains the queue in batches of up to BATCH_SIZE rows
+per transaction, at least every FLUSH_INTERVAL seconds. A batch that
+fails to write is retried a few times and then dropped and logged; the
+writer keeps running, and `flush()` at exit waits at most EXIT_TIMEOUT
+seconds.
+
+Configure the file with MEDI_HISTORY_DB (default prediction_history.sqlite3).
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB = 'prediction_history.sqlite3'
+BATCH_SIZE = 500
+FLUSH_INTERVAL = float(os.environ.get("MEDI_HISTORY_FLUSH_INTERVAL", "0.5"))
+WRITE_ATTEMPTS = 3
+EXIT_TIMEOUT = 10.0
+
+logger = logging.getLogger("medi.history")
+
+
+class PredictionHistory:
+    """Append-mostly store of predictions, indexed by (user, time)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._seq = itertools.count()
+        self.dropped = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " user TEXT NOT NULL,"
+            " ts INTEGER NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " model TEXT NOT NULL,"
+            " result INTEGER NOT NULL,"
+            " inputs TEXT NOT NULL,"
+            " model_version TEXT,"
+            " PRIMARY KEY (user, ts, seq)"
+            ") WITHOUT ROWID"
+        )
+        # Databases created before versions were recorded
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+        if "model_version" not in columns:
+            conn.execute("ALTER TABLE predictions ADD COLUMN model_version TEXT")
+        conn.commit()
+        self._writer = threading.Thread(target=self._drain, name="history-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush, EXIT_TIMEOUT)
+
+    def _conn(self):
+        # One connection per thread; WAL lets readers run alongside the writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, user, model, inputs, result, ts=None, version=None):
+        """Queues one prediction for the background writer; never blocks on I/O."""
+        ts = time.time() if ts is None else ts
+        self._queue.put((user, int(ts * 1e6), next(self._seq), model, int(result), json.dumps(inputs), version))
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                conn = self._conn()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO predictions (user, ts, seq, model, result, inputs, model_version)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                return
+            except Exception:
+                # Reconnect on the next attempt in case the connection itself is broken
+                conn = getattr(self._local, 'conn', None)
+                self._local.conn = None
+                if conn is not None:
+                    conn.close()
+                if attempt == WRITE_ATTEMPTS:
+                    self.dropped += len(batch)
+                    logger.exception("Dropped %d history rows after %d failed writes", len(batch), attempt)
+                else:
+                    time.sleep(0.1 * 2 ** attempt)
+
+    def flush(self, timeout=None):
+        """Blocks until every queued prediction has been handled; False if `timeout` seconds ran out first."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def query(self, user, since=None, until=None, model=None, limit=None):
+        """Returns the user's predictions oldest first, as dicts."""
+        sql = ("SELECT ts, model, result, inputs, model_version FROM predictions"
+               " WHERE user = ? AND ts >= ? AND ts <= ?")
+        params = [user, int((since or 0) * 1e6), int((until or 1e11) * 1e6)]
+        if model is not None:
+            sql += " AND model = ?"
+            params.append(model)
+        if limit is not None:
+            # Newest `limit` rows, returned in chronological order
+            sql = f"SELECT * FROM ({sql} ORDER BY ts DESC LIMIT ?) ORDER BY ts"
+            params.append(limit)
+        else:
+            sql += " ORDER BY ts"
+        return [
+            {"ts": ts / 1e6, "model": m, "result": r, "inputs": json.loads(i), "version": v}
+            for ts, m, r, i, v in self._conn().execute(sql, params)
+        ]
+
+    def count(self, user=None):
+        if user is None:
+            return self._conn().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM predictions WHERE user = ?", (user,)).fetchone()[0]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_prediction_history():
+    """Returns the process-wide history store, creating it on first use."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = PredictionHistory(os.environ.get("MEDI_HISTORY_DB", DEFAULT_DB))
+    return _history
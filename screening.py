@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Full screening: every applicable disease model from one patient profile.
+
+A profile is a flat record of patient measurements (PROFILE_FIELDS, plus
+the 22 Parkinson's voice measures when a recording was analysed). The
+feature-mapping layer derives what can be derived (BMI from height and
+weight, zero pregnancies for male patients) and builds each model's
+feature vector in its training column order. The heart model's fasting
+blood sugar flag is an input of its own: the diabetes model's glucose is
+a 2-hour tolerance test value and says nothing about fasting sugar. A
+model is applicable to a patient when every field it needs is present;
+the others are reported as skipped with the missing fields. Rows whose
+needed fields are all present but not all finite (an "inf" cell) are
+skipped as well and counted as invalid.
+
+Applicable models are submitted to the inference executor together and
+run concurrently. The same code screens a whole patient table in one
+pass, chunk by chunk, adding one risk column per model:
+
+    python screening.py patients.csv -o screened.csv
+    python screening.py --columns       # list the profile columns
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from admission import BULK, INTERACTIVE
+from batch_scoring import CHUNK_TIMEOUT, DEFAULT_CHUNKSIZE, RESULT_COLUMN, detect_format, read_chunks, write_chunks
+from inference_executor import get_executor
+from model_registry import FEATURES
+
+# Shared patient profile: column name -> description
+PROFILE_FIELDS = {
+    "age": "Age in years",
+    "sex": "1 = male, 0 = female (M/F and male/female are accepted too)",
+    "height_cm": "Height in cm (with weight_kg, used when bmi is missing)",
+    "weight_kg": "Weight in kg",
+    "bmi": "Body mass index",
+    "pregnancies": "Number of pregnancies (0 assumed for male patients)",
+    "glucose": "Plasma glucose 2 hours into an oral glucose tolerance test, mg/dL",
+    "fasting_bs_high": "Fasting blood sugar above 120 mg/dL, 1/0 (a fasting test, not the glucose value)",
+    "insulin": "Insulin in mu U/ml",
+    "skin_thickness": "Triceps skin fold thickness in mm",
+    "pedigree": "Diabetes pedigree function (family history score)",
+    "systolic_bp": "Resting systolic blood pressure in mm Hg",
+    "diastolic_bp": "Diastolic blood pressure in mm Hg",
+    "cholesterol": "Serum cholesterol in mg/dL",
+    "max_heart_rate": "Maximum heart rate achieved",
+    "chest_pain": "Chest pain type, 0-3",
+    "resting_ecg": "Resting ECG result, 0-2",
+    "exercise_angina": "Exercise-induced angina, 1/0",
+    "st_depression": "ST depression induced by exercise",
+    "st_slope": "Slope of the peak exercise ST segment, 0-2",
+    "major_vessels": "Major vessels coloured by fluoroscopy, 0-3",
+    "thal": "Thalassemia, 1-3",
+}
+
+# Model feature -> profile field, in each model's training order
+MAPPINGS = {
+    "diabetes": {
+        "Pregnancies": "pregnancies", "Glucose": "glucose", "BloodPressure": "diastolic_bp",
+        "SkinThickness": "skin_thickness", "Insulin": "insulin", "BMI": "bmi",
+        "DiabetesPedigreeFunction": "pedigree", "Age": "age",
+    },
+    "heart": {
+        "age": "age", "sex": "sex", "cp": "chest_pain", "trestbps": "systolic_bp",
+        "chol": "cholesterol", "fbs": "fasting_bs_high", "restecg": "resting_ecg",
+        "thalach": "max_heart_rate", "exang": "exercise_angina", "oldpeak": "st_depression",
+        "slope": "st_slope", "ca": "major_vessels", "thal": "thal",
+    },
+    # Voice measures keep their dataset names (voice_features.analyze returns them)
+    "parkinsons": {feature: feature for feature in FEATURES["parkinsons"]},
+}
+
+_SEX = {"m": 1.0, "male": 1.0, "f": 0.0, "female": 0.0}
+
+
+def _sex_code(value):
+    if pd.isna(value):
+        return np.nan
+    text = str(value).strip().lower()
+    return _SEX[text] if text in _SEX else pd.to_numeric(text, errors='coerce')
+
+
+def risk_column(name):
+    return f"{name}_{RESULT_COLUMN}"
+
+
+def complete_profile(frame):
+    """Numeric copy of a profile table with every mapped field present and derived fields filled in."""
+    frame = frame.copy()
+    if "sex" in frame and not pd.api.types.is_numeric_dtype(frame["sex"]):
+        frame["sex"] = frame["sex"].map(_sex_code)
+    fields = list(PROFILE_FIELDS) + FEATURES["parkinsons"]
+    for field in fields:
+        frame[field] = pd.to_numeric(frame[field], errors='coerce') if field in frame else np.nan
+
+    # A zero or negative height or weight is not a measurement (and would make BMI infinite)
+    frame["height_cm"] = frame["height_cm"].where(frame["height_cm"] > 0)
+    frame["weight_kg"] = frame["weight_kg"].where(frame["weight_kg"] > 0)
+    frame["bmi"] = frame["bmi"].fillna(frame["weight_kg"] / (frame["height_cm"] / 100) ** 2)
+    frame["pregnancies"] = frame["pregnancies"].mask(frame["pregnancies"].isna() & frame["sex"].eq(1), 0.0)
+    return frame
+
+
+def model_inputs(frame, name):
+    """For a completed profile table: (feature matrix of the rows the model applies to,
+    mask of those rows, mask of rows with every field present but some not finite).
+    """
+    X = frame[[MAPPINGS[name][feature] for feature in FEATURES[name]]].to_numpy(dtype=float)
+    applicable = np.isfinite(X).all(axis=1)
+    invalid = ~np.isnan(X).any(axis=1) & ~applicable
+    return X[applicable], applicable, invalid
+
+
+def screen_frame(frame, user=None, priority=INTERACTIVE, timeout=None, on_wait=None):
+    """Runs every applicable model on a profile table concurrently.
+
+    Returns (completed profile, {name: Int64 Series of predictions, NA where
+    not applicable}, {name: model version}, {name: boolean mask of rows
+    skipped for non-finite values}).
+    """
+    frame = complete_profile(frame)
+    executor = get_executor()
+    jobs, invalid = {}, {}
+    for name in FEATURES:
+        X, applicable, invalid[name] = model_inputs(frame, name)
+        if applicable.any():
+            future = executor.submit(name, X.tolist(), timeout, True, user, priority, on_wait)
+            jobs[name] = (applicable, future)
+
+    risks, versions = {}, {}
+    for name in FEATURES:
+        risk = pd.array([pd.NA] * len(frame), dtype="Int64")
+        if name in jobs:
+            applicable, future = jobs[name]
+            predictions, versions[name] = executor.result(name, future, timeout)
+            risk[applicable] = np.asarray(predictions, dtype=np.int64)
+        risks[name] = pd.Series(risk, index=frame.index)
+    return frame, risks, versions, invalid
+
+
+def screen(profile, user=None, on_wait=None):
+    """Screens one patient profile (a dict) with every applicable model.
+
+    Returns {name: {"prediction", "version", "inputs"}} for the models that
+    ran and {name: {"missing": [profile fields]}} for the others.
+    """
+    frame, risks, versions, _ = screen_frame(pd.DataFrame([profile]), user=user, on_wait=on_wait)
+    report = {}
+    for name in FEATURES:
+        if name in versions:
+            inputs = [float(frame[MAPPINGS[name][feature]].iloc[0]) for feature in FEATURES[name]]
+            report[name] = {"prediction": int(risks[name].iloc[0]), "version": versions[name], "inputs": inputs}
+        else:
+            fields = dict.fromkeys(MAPPINGS[name][feature] for feature in FEATURES[name])
+            report[name] = {"missing": [field for field in fields if not np.isfinite(frame[field].iloc[0])]}
+    return report
+
+
+def screen_file(source, dest, fmt=None, out_fmt=None, chunksize=DEFAULT_CHUNKSIZE, user=None):
+    """Adds one risk column per model to a patient table in a single pass; returns summary counts.
+
+    Rows a model cannot score get an empty risk; "invalid" counts those
+    skipped for non-finite values rather than missing ones.
+    """
+    fmt = fmt or detect_format(getattr(source, 'name', source))
+    out_fmt = out_fmt or detect_format(getattr(dest, 'name', dest))
+    stats = {"rows": 0, "screened": dict.fromkeys(FEATURES, 0), "positive": dict.fromkeys(FEATURES, 0),
+             "invalid": dict.fromkeys(FEATURES, 0)}
+
+    def scored():
+        for chunk in read_chunks(source, fmt, chunksize):
+            _, risks, _, invalid = screen_frame(chunk, user=user, priority=BULK, timeout=CHUNK_TIMEOUT)
+            for name, risk in risks.items():
+                chunk[risk_column(name)] = risk
+                stats["invalid"][name] += int(invalid[name].sum())
+                stats["screened"][name] += int(risk.notna().sum())
+                stats["positive"][name] += int(risk.sum())
+            stats["rows"] += len(chunk)
+            yield chunk
+
+    for _ in write_chunks(scored(), dest, out_fmt):
+        pass
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a patient table with every applicable Medi-Predictor model.")
+    parser.add_argument('input', nargs='?', help="CSV or Parquet file with one patient profile per row")
+    parser.add_argument('-o', '--output', help="Destination .csv or .parquet file")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows screened per chunk (default: %(default)s)")
+    parser.add_argument('--columns', action='store_true', help="List the profile columns and exit")
+    args = parser.parse_args(argv)
+
+    if args.columns:
+        for field, description in PROFILE_FIELDS.items():
+            print(f"  {field:<16} {description}")
+        print("  plus the Parkinson's voice measures: " + ", ".join(FEATURES["parkinsons"]))
+        return 0
+    if not args.input or not args.output:
+        parser.error("input and --output are required unless --columns is given")
+
+    stats = screen_file(args.input, args.output, chunksize=args.chunksize)
+    print(f"Screened {stats['rows']} rows -> {args.output}")
+    for name in FEATURES:
+        print(f"  {name:<11} {stats['screened'][name]:>8} screened   {stats['positive'][name]:>8} positive"
+              f"   {stats['invalid'][name]:>8} invalid")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Per-session memory controls.
+
+ChatHistory is a ring buffer for the assistant conversation: once the
+cap is reached the oldest messages are dropped, so a long-lived session
+holds a constant amount of chat state. `state_footprint` walks a
+session's state and reports how many bytes each key retains.
+"""
+
+import os
+import sys
+from collections import deque
+
+# Maximum messages kept per session (older ones are discarded)
+CHAT_HISTORY_LIMIT = int(os.environ.get("MEDI_CHAT_HISTORY_LIMIT", "50"))
+# Messages rendered by default; earlier ones are collapsed
+CHAT_PAGE_SIZE = int(os.environ.get("MEDI_CHAT_PAGE_SIZE", "10"))
+
+
+class ChatHistory:
+    """Bounded list of {'role', 'content'} chat messages."""
+
+    def __init__(self, messages=(), maxlen=CHAT_HISTORY_LIMIT):
+        self._messages = deque(messages, maxlen=maxlen)
+
+    @property
+    def maxlen(self):
+        return self._messages.maxlen
+
+    def append(self, message):
+        self._messages.append(message)
+
+    def clear(self):
+        self._messages.clear()
+
+    def recent(self, n=CHAT_PAGE_SIZE):
+        """The newest `n` messages, oldest first."""
+        start = max(0, len(self._messages) - n)
+        return [self._messages[i] for i in range(start, len(self._messages))]
+
+    def older(self, n=CHAT_PAGE_SIZE):
+        """Everything before the newest `n` messages."""
+        end = max(0, len(self._messages) - n)
+        return [self._messages[i] for i in range(end)]
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+
+def deep_sizeof(obj):
+    """Approximate bytes retained by an object graph (each object counted once)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__') and not isinstance(item, type):
+            stack.append(vars(item))
+        elif hasattr(item, '__slots__'):
+            stack.extend(getattr(item, s) for s in item.__slots__ if hasattr(item, s))
+    return total
+
+
+def state_footprint(state):
+    """Returns ({key: bytes}, total_bytes) for a session-state mapping."""
+    sizes = {str(key): deep_sizeof(state[key]) for key in list(state.keys())}
+    return sizes, sum(sizes.values())
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned static assets (stylesheet, logo) served by Streamlit itself.
+
+Sources live in assets/. `publish()` copies each one into static/ under a
+content-hash name (medi.css -> medi.<sha256[:12]>.css), which Streamlit
+serves at app/static/ when server.enableStaticServing is on (see
+.streamlit/config.toml). Pages then only emit a short <link>/<img> tag
+per rerun; the browser downloads each version once, and a changed file
+gets a new URL instead of a stale cached copy. No page fetches anything
+from outside the app. Superseded versions are kept (the newest
+KEEP_VERSIONS per asset) so pages already open, and replicas still
+running the previous release, can keep loading the files they link to.
+
+`streamlit run` serves app/static with validators only (ETag and
+Last-Modified). To send long-lived immutable Cache-Control headers for
+the hashed files, run the ASGI entrypoint instead (uvicorn asgi:app),
+which adds CacheHeadersMiddleware, or set the same header in a proxy.
+
+    python static_assets.py     # publish and print the hashed names
+"""
+
+import base64
+import hashlib
+import os
+import re
+import sys
+import threading
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(APP_DIR, "assets")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Hashed versions of each asset kept in static/, the current one included
+KEEP_VERSIONS = int(os.environ.get("MEDI_STATIC_KEEP_VERSIONS", "5"))
+_HASHED = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+_MIME = {".css": "text/css", ".svg": "image/svg+xml", ".png": "image/png"}
+
+_published = None
+_lock = threading.Lock()
+
+
+def hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def _publish_one(name):
+    with open(os.path.join(ASSET_DIR, name), 'rb') as f:
+        data = f.read()
+    target = hashed_name(name, data)
+    path = os.path.join(STATIC_DIR, target)
+    if os.path.exists(path):
+        try:
+            # Mark it current again (e.g. after a rollback) so pruning keeps it
+            os.utime(path)
+        except OSError:
+            # Read-only install with a prebuilt copy: serve it as is
+            return target
+    else:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    _prune(name, target)
+    return target
+
+
+def _prune(name, target):
+    """Removes all but the KEEP_VERSIONS most recently published versions of an asset."""
+    stem, ext = os.path.splitext(name)
+    versions = []
+    for old in os.listdir(STATIC_DIR):
+        if old != target and old.startswith(stem + ".") and old.endswith(ext) and _HASHED.search(old):
+            try:
+                versions.append((os.path.getmtime(os.path.join(STATIC_DIR, old)), old))
+            except FileNotFoundError:
+                pass
+    for _, old in sorted(versions, reverse=True)[max(KEEP_VERSIONS - 1, 0):]:
+        try:
+            os.remove(os.path.join(STATIC_DIR, old))
+        except FileNotFoundError:
+            # Another process pruned it first
+            pass
+
+
+def publish():
+    """{asset name: hashed file name in static/, or None if it could not be written}; once per process."""
+    global _published
+    if _published is None:
+        with _lock:
+            if _published is None:
+                published = {}
+                for name in sorted(os.listdir(ASSET_DIR)):
+                    try:
+                        published[name] = _publish_one(name)
+                    except OSError:
+                        # Read-only install without a prebuilt copy: tags inline the asset
+                        published[name] = None
+                _published = published
+    return _published
+
+
+def url(name):
+    """Versioned URL of an asset, or None if it is not being served."""
+    target = publish().get(name)
+    return f"{STATIC_URL}/{target}" if target else None
+
+
+def _inline(name):
+    with open(os.path.join(ASSET_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def stylesheet_tag(name="medi.css"):
+    """<link> to the versioned stylesheet (inline <style> as a fallback)."""
+    href = url(name)
+    if href is None:
+        return f"<style>\n{_inline(name).decode('utf-8')}</style>"
+    return f'<link rel="stylesheet" href="{href}">'
+
+
+def image_tag(name, width, alt=""):
+    """<img> of a versioned image (data: URI as a fallback)."""
+    src = url(name)
+    if src is None:
+        mime = _MIME.get(os.path.splitext(name)[1], "application/octet-stream")
+        src = f"data:{mime};base64,{base64.b64encode(_inline(name)).decode('ascii')}"
+    return f'<img src="{src}" width="{width}" alt="{alt}">'
+
+
+class CacheHeadersMiddleware:
+    """ASGI middleware marking content-hashed app/static files as immutable."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if "/app/static/" not in path or not _HASHED.search(path):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+                headers.append((b"cache-control", CACHE_CONTROL.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache)
+
+
+def main():
+    for name, target in publish().items():
+        print(f"{name:<20} {target or 'NOT PUBLISHED'}")
+    return 0 if all(publish().values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
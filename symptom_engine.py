@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Symptom matching engine for the Symptom Checker.
+
+The disease knowledge base is read from a JSON data file once per
+process and compiled into a symptom -> diseases inverted index. Scoring
+a selection only touches diseases that share at least one symptom with
+it, and the top-k results come from a bounded heap instead of a full
+sort, so analysis cost tracks the selection, not the catalog size.
+
+Knowledge base format (data/diseases.json):
+    {"version": 1, "diseases": [
+        {"name": ..., "symptoms": [...], "severity": "Critical|High|Medium|Low",
+         "advice": ..., "weights": {"<symptom>": 2.0}}   # weights optional
+    ]}
+"""
+
+import heapq
+import json
+import os
+import threading
+from collections import defaultdict
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DISEASE_DB = os.environ.get("MEDI_DISEASE_DB", os.path.join(APP_DIR, "data", "diseases.json"))
+
+# Multiplier applied when ranking by severity
+SEVERITY_WEIGHTS = {"Critical": 2.0, "High": 1.5, "Medium": 1.0, "Low": 0.75}
+
+
+class KnowledgeBase:
+    """Diseases plus the inverted index built from their symptom lists."""
+
+    def __init__(self, diseases):
+        self.diseases = diseases
+        self.index = defaultdict(list)
+        for idx, disease in enumerate(diseases):
+            for symptom in disease["symptoms"]:
+                self.index[symptom].append(idx)
+        self.index = dict(self.index)
+        self.all_symptoms = sorted(self.index)
+
+    def match(self, selected, top_k=4, weighted=False):
+        """Ranks diseases sharing symptoms with `selected`.
+
+        Returns up to `top_k` dicts with disease, score (matched symptom
+        count), matched_symptoms, severity and advice. With `weighted`,
+        ranking multiplies the score by per-symptom weights and severity.
+        """
+        hits = defaultdict(list)
+        for symptom in dict.fromkeys(selected):
+            for idx in self.index.get(symptom, ()):
+                hits[idx].append(symptom)
+        if not hits:
+            return []
+
+        def rank(idx):
+            matched = hits[idx]
+            if not weighted:
+                return (len(matched), -idx)
+            disease = self.diseases[idx]
+            weights = disease.get("weights", {})
+            value = sum(weights.get(s, 1.0) for s in matched)
+            return (value * SEVERITY_WEIGHTS.get(disease["severity"], 1.0), -idx)
+
+        results = []
+        for idx in heapq.nlargest(top_k, hits, key=rank):
+            disease = self.diseases[idx]
+            matched = hits[idx]
+            results.append({
+                "disease": disease["name"],
+                "score": len(matched),
+                "matched_symptoms": [s for s in disease["symptoms"] if s in matched],
+                "severity": disease["severity"],
+                "advice": disease["advice"],
+            })
+        return results
+
+
+def load_knowledge_base(path=DISEASE_DB):
+    """Reads a knowledge base file and compiles its index."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return KnowledgeBase(data["diseases"])
+
+
+_kb = None
+_lock = threading.Lock()
+
+
+def get_knowledge_base():
+    """Returns the process-wide knowledge base, loading it on first use."""
+    global _kb
+    if _kb is None:
+        with _lock:
+            if _kb is None:
+                _kb = load_knowledge_base()
+    return _kb
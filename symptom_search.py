@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Typeahead search from free-text symptom descriptions to canonical symptoms.
+
+Every canonical symptom and each of its lay synonyms ("shaking" ->
+"Tremors (Shaking)") is a searchable term. Terms are normalised into
+words and indexed once per process in a word-trigram inverted index
+(words padded at the front, so the leading trigrams double as a prefix
+index). A query only looks at terms starting with it (a binary search
+over the sorted terms, so exact and prefix matches are never crowded
+out) and at the terms sharing the most trigrams with it, shorter terms
+first on ties. Candidates are ranked by match tier (exact, prefix, all
+words prefixed, fuzzy) and then by a bounded edit distance that counts
+a swap of two adjacent letters as one edit; when that leaves room in
+the results, the query's adjacent-letter swaps are searched too. Lookups
+stay in the low milliseconds as the vocabulary grows to tens of
+thousands of terms.
+
+Synonyms live in data/symptom_synonyms.json (override with
+MEDI_SYMPTOM_SYNONYMS):
+    {"version": 1, "synonyms": {"<canonical symptom>": ["<synonym>", ...]}}
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SYNONYMS_DB = os.environ.get("MEDI_SYMPTOM_SYNONYMS", os.path.join(APP_DIR, "data", "symptom_synonyms.json"))
+
+# Terms ranked with edit distance after the trigram pass
+CANDIDATES = 64
+# Share of the query's trigrams a fuzzy candidate must contain
+MIN_OVERLAP = 0.34
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Lowercase alphanumeric words of a term or query."""
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(words, partial_last=False):
+    grams = set()
+    for i, word in enumerate(words):
+        padded = "  " + word if partial_last and i == len(words) - 1 else "  " + word + " "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _swaps(words):
+    """Query variants with two adjacent letters of one word swapped."""
+    for i, word in enumerate(words):
+        for j in range(len(word) - 1):
+            if word[j] != word[j + 1]:
+                yield words[:i] + [word[:j] + word[j + 1] + word[j] + word[j + 2:]] + words[i + 1:]
+
+
+def prefix_distance(a, b, limit):
+    """Smallest edit distance from `a` to any prefix of `b`, capped at limit + 1.
+
+    Insertions, deletions, substitutions and swaps of adjacent letters
+    each cost one edit (optimal string alignment).
+    """
+    b = b[:len(a) + limit]
+    over = limit + 1
+    before = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        # Only cells within `limit` of the diagonal can stay under the cap
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [i if i <= limit else over] + [over] * len(b)
+        for j in range(lo, hi + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]), over)
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                cost = min(cost, before[j - 2] + 1)
+            current[j] = cost
+        if min(current[lo - 1:hi + 1]) > limit:
+            return over
+        before, previous = previous, current
+    return min(previous)
+
+
+class SymptomIndex:
+    """Trigram index over canonical symptoms and their synonyms."""
+
+    def __init__(self, symptoms, synonyms=None):
+        self.terms = []      # (normalised words, display text, canonical symptom)
+        postings = defaultdict(list)
+        seen = set()
+        for canonical in symptoms:
+            names = [canonical] + list((synonyms or {}).get(canonical, ()))
+            for text in names:
+                words = normalize(text)
+                key = (" ".join(words), canonical)
+                if not words or key in seen:
+                    continue
+                seen.add(key)
+                term_id = len(self.terms)
+                self.terms.append((words, text, canonical))
+                for gram in _trigrams(words):
+                    postings[gram].append(term_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.symptoms = sorted(set(symptoms))
+        # Sorted joined terms for prefix lookups, and term lengths for tie-breaking
+        joined = [" ".join(words) for words, _, _ in self.terms]
+        order = sorted(range(len(joined)), key=joined.__getitem__)
+        self._sorted = [joined[i] for i in order]
+        self._sorted_ids = np.asarray(order, dtype=np.int64)
+        self._lengths = np.asarray([len(j) for j in joined], dtype=np.int64)
+
+    def _tier(self, query_words, query, words, joined):
+        """0 exact, 1 term prefix, 2 every query word prefixes some term word, 3 other."""
+        if joined == query:
+            return 0
+        if joined.startswith(query):
+            return 1
+        if all(any(w.startswith(q) for w in words) for q in query_words):
+            return 2
+        return 3
+
+    def _shortest(self, ids):
+        """The CANDIDATES shortest of some term ids."""
+        if len(ids) > CANDIDATES:
+            ids = ids[np.argpartition(self._lengths[ids], CANDIDATES)[:CANDIDATES]]
+        return ids
+
+    def _prefixed(self, query):
+        """Ids of the shortest terms starting with the query (exact matches included)."""
+        lo = bisect.bisect_left(self._sorted, query)
+        hi = bisect.bisect_left(self._sorted, query + "\uffff", lo)
+        return self._shortest(self._sorted_ids[lo:hi])
+
+    def _sharing(self, grams):
+        """(ids, shared-trigram counts) of the terms sharing most trigrams, shorter ones first on ties."""
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        counts = np.bincount(np.concatenate(lists), minlength=len(self.terms))
+        top = np.flatnonzero(counts)
+        key = counts[top] * (int(self._lengths.max()) + 1) - self._lengths[top]
+        if len(top) > CANDIDATES:
+            top = top[np.argpartition(key, -CANDIDATES)[-CANDIDATES:]]
+        return top, counts[top]
+
+    def _rank(self, query_words, query, candidates):
+        """Ranks {term id: trigram overlap} into [(rank, canonical, display)], dropping poor fuzzy matches."""
+        ranked = []
+        budget = max(1, len(query) // 4)
+        for term_id, overlap in candidates.items():
+            words, display, canonical = self.terms[term_id]
+            joined = " ".join(words)
+            tier = self._tier(query_words, query, words, joined)
+            if tier < 3:
+                distance = 0
+            else:
+                if overlap < MIN_OVERLAP:
+                    continue
+                # Typo-tolerant prefix match: single words against each term word,
+                # phrases against the whole term
+                targets = words if len(query_words) == 1 else (joined,)
+                distance = min(prefix_distance(query, t, budget) for t in targets)
+                if distance > budget:
+                    continue
+            ranked.append(((tier, distance, -overlap, len(joined)), canonical, display))
+        return ranked
+
+    def search(self, text, limit=8):
+        """Returns up to `limit` dicts {symptom, matched, score}, best first, one per symptom."""
+        query_words = normalize(text)
+        if not query_words:
+            return []
+        query = " ".join(query_words)
+
+        def collect(words, candidates):
+            grams = _trigrams(words, partial_last=True)
+            for term_id, shared in zip(*(a.tolist() for a in self._sharing(grams))):
+                candidates[term_id] = max(candidates.get(term_id, 0.0), shared / len(grams))
+
+        candidates = dict.fromkeys(self._prefixed(query).tolist(), 1.0)
+        collect(query_words, candidates)
+        ranked = self._rank(query_words, query, candidates)
+        if len({canonical for _, canonical, _ in ranked}) < limit:
+            # Swapped letters break most trigrams; look again with each swap undone
+            for variant in _swaps(query_words):
+                collect(variant, candidates)
+            ranked = self._rank(query_words, query, candidates)
+
+        ranked.sort()
+        results, emitted = [], set()
+        for rank, canonical, display in ranked:
+            if canonical in emitted:
+                continue
+            emitted.add(canonical)
+            results.append({"symptom": canonical, "matched": display, "score": rank[:2]})
+            if len(results) == limit:
+                break
+        return results
+
+
+def load_synonyms(path=SYNONYMS_DB):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)["synonyms"]
+    except FileNotFoundError:
+        return {}
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_symptom_index():
+    """Returns the process-wide search index over the knowledge base's symptoms."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                from symptom_engine import get_knowledge_base
+                _index = SymptomIndex(get_knowledge_base().all_symptoms, load_synonyms())
+    return _index
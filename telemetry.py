@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Latency instrumentation for Medi-Predictor pages.
+
+A PageTimer measures named stages (feature assembly, inference, render)
+during one rerun. Finished timings are written to the 'medi.timing'
+logger as one JSON object per rerun and kept in a process-wide rolling
+window, so p50/p99 per page and stage can be shown in the debug panel.
+
+Tracing spans (MEDI_TRACING=1) time the expensive steps of every rerun
+(CSS injection, auth, model load, page render, predict, symptom matching,
+chat). They feed per-label histograms exported in Prometheus text format
+(on MEDI_METRICS_PORT, or via `render_prometheus`) and, with
+MEDI_TRACE_FILE set, one JSON line per rerun. When tracing is off,
+`span()` returns a shared no-op context manager.
+
+Set MEDI_TIMING_LOG=<path> to append the structured timing log to a file.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WINDOW = 1000
+
+logger = logging.getLogger("medi.timing")
+if os.environ.get("MEDI_TIMING_LOG") and not logger.handlers:
+    _handler = logging.FileHandler(os.environ["MEDI_TIMING_LOG"])
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_lock = threading.Lock()
+
+
+class PageTimer:
+    """Collects stage durations (in ms) for a single page rerun."""
+
+    def __init__(self, page):
+        self.page = page
+        self.stages = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def finish(self):
+        """Records the rerun in the rolling window and the structured log."""
+        self.stages["total"] = (time.perf_counter() - self._start) * 1000
+        with _lock:
+            for name, ms in self.stages.items():
+                _samples[(self.page, name)].append(ms)
+        logger.info(json.dumps({
+            "ts": round(time.time(), 3),
+            "page": self.page,
+            "stages_ms": {k: round(v, 3) for k, v in self.stages.items()},
+        }))
+        return self.stages
+
+
+def _pct(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def summary(page=None):
+    """Returns {(page, stage): {count, p50, p99}} over the rolling window."""
+    with _lock:
+        items = [(k, sorted(v)) for k, v in _samples.items() if page is None or k[0] == page]
+    return {
+        k: {"count": len(v), "p50": round(_pct(v, 0.50), 3), "p99": round(_pct(v, 0.99), 3)}
+        for k, v in items if v
+    }
+
+
+# =========================================================
+#  TRACING SPANS & METRICS
+# =========================================================
+TRACING = os.environ.get("MEDI_TRACING", "0") == "1"
+TRACE_FILE = os.environ.get("MEDI_TRACE_FILE")
+
+# Histogram upper bounds in seconds (Prometheus convention)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_histograms = {}
+_hist_lock = threading.Lock()
+_trace_lock = threading.Lock()
+_gauges = []
+_local = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def end(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+        return False
+
+    def end(self):
+        elapsed = time.perf_counter() - self.t0
+        key = (self.name, self.labels)
+        with _hist_lock:
+            hist = _histograms.get(key)
+            if hist is None:
+                hist = _histograms[key] = Histogram()
+            hist.observe(elapsed)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.append({
+                "name": self.name,
+                "labels": dict(self.labels),
+                "start_ms": round((self.t0 - _local.trace_start) * 1000, 3),
+                "duration_ms": round(elapsed * 1000, 3),
+            })
+
+
+def span(name, **labels):
+    """Times a block as a named span; a shared no-op when tracing is disabled."""
+    if not TRACING:
+        return _NULL_SPAN
+    return _Span(name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def start_span(name, **labels):
+    """Starts a span that is closed explicitly with `.end()`."""
+    return span(name, **labels).__enter__()
+
+
+def begin_rerun():
+    """Starts collecting spans for the rerun running on this thread."""
+    if TRACING:
+        _local.trace = []
+        _local.trace_start = time.perf_counter()
+
+
+def end_rerun(page):
+    """Writes the rerun's spans to the trace file and stops collecting."""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is None or not TRACE_FILE:
+        return
+    line = json.dumps({"ts": round(time.time(), 3), "page": page, "spans": trace})
+    with _trace_lock:
+        with open(TRACE_FILE, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+def register_gauge(name, help_text, collect):
+    """Adds a gauge family; `collect()` returns {labels_dict_items_tuple: value}."""
+    _gauges.append((name, help_text, collect))
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    """Returns all span histograms and gauges in Prometheus text format."""
+    lines = [
+        "# HELP medi_span_duration_seconds Duration of instrumented rerun steps.",
+        "# TYPE medi_span_duration_seconds histogram",
+    ]
+    with _hist_lock:
+        snapshot = [(k, list(h.counts), h.sum, h.count) for k, h in sorted(_histograms.items())]
+    for (name, labels), counts, total, count in snapshot:
+        base = (("span", name),) + labels
+        running = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), counts):
+            running += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"medi_span_duration_seconds_bucket{_labels(base + (('le', le),))} {running}")
+        lines.append(f"medi_span_duration_seconds_sum{_labels(base)} {total:.9f}")
+        lines.append(f"medi_span_duration_seconds_count{_labels(base)} {count}")
+    for name, help_text, collect in _gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(collect().items()):
+            lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port=None, host='0.0.0.0'):
+    """Serves /metrics on a background thread, once per process."""
+    global _metrics_server
+    port = port if port is not None else os.environ.get("MEDI_METRICS_PORT")
+    if _metrics_server is not None or not port:
+        return _metrics_server
+    with _hist_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+    return _metrics_server
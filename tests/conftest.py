@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+
+# Keep test runs away from the real stores and background threads; set
+# before any app module is imported because they read these at import time
+_tmp = tempfile.mkdtemp(prefix='medi-tests-')
+os.environ["MEDI_USER_DB"] = os.path.join(_tmp, 'users.sqlite3')
+os.environ["MEDI_HISTORY_DB"] = os.path.join(_tmp, 'history.sqlite3')
+os.environ["MEDI_EVAL_CACHE"] = os.path.join(_tmp, 'evaluation_results.json')
+os.environ["MEDI_MODEL_CHECK_INTERVAL"] = "0"
+os.environ["MEDI_WARMUP"] = "off"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from admission import BULK, INTERACTIVE, AdmissionController, QueueFull, WaitTimeout
+
+
+class Waiter(threading.Thread):
+    """Acquires a slot in the background and holds it until released."""
+
+    def __init__(self, controller, user, priority=INTERACTIVE, timeout=5, on_wait=None):
+        super().__init__(daemon=True)
+        self.controller, self.user, self.priority, self.timeout, self.on_wait = controller, user, priority, timeout, on_wait
+        self.ticket = None
+        self.error = None
+        self.admitted = threading.Event()
+        self.start()
+
+    def run(self):
+        try:
+            self.ticket = self.controller.acquire("model", self.user, self.priority, self.timeout, self.on_wait)
+        except Exception as e:
+            self.error = e
+        self.admitted.set()
+
+    def release(self):
+        self.controller.release(self.ticket)
+
+
+def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _waiting(controller, n):
+    _wait_until(lambda: controller.stats()[("model", "waiting")] == n)
+
+
+def _controller(limit=1, **kwargs):
+    return AdmissionController(limits={"model": limit}, **kwargs)
+
+
+def test_cap_and_wait_timeout():
+    controller = _controller()
+    held = controller.acquire("model", "a")
+    with pytest.raises(WaitTimeout):
+        controller.acquire("model", "b", timeout=0.05)
+    controller.release(held)
+    with controller.admit("model", "b"):
+        assert controller.stats()[("model", "running")] == 1
+    stats = controller.stats()
+    assert stats[("model", "running")] == 0 and stats[("model", "timed_out")] == 1 and stats[("model", "admitted")] == 2
+
+
+def test_sheds_when_the_queue_is_full():
+    controller = _controller(queue_limit=2)
+    held = controller.acquire("model", "a")
+    waiters = [Waiter(controller, user) for user in ("b", "c")]
+    _waiting(controller, 2)
+    with pytest.raises(QueueFull, match="at capacity"):
+        controller.acquire("model", "d")
+    assert controller.stats()[("model", "rejected")] == 1
+    controller.release(held)
+    for w in waiters:
+        assert w.admitted.wait(5)
+        w.release()
+
+
+def test_bulk_work_keeps_half_the_queue_free():
+    controller = _controller(queue_limit=4)
+    held = controller.acquire("model", "a")
+    waiters = [Waiter(controller, user) for user in ("b", "c")]
+    _waiting(controller, 2)
+    with pytest.raises(QueueFull, match="Bulk jobs"):
+        controller.acquire("model", "d", priority=BULK)
+    # Interactive requests still get the other half
+    waiters.append(Waiter(controller, "d"))
+    _waiting(controller, 3)
+    controller.release(held)
+    for w in waiters:
+        assert w.admitted.wait(5)
+        w.release()
+
+
+def test_per_user_waiting_limit():
+    controller = _controller(per_user_limit=2)
+    held = controller.acquire("model", "a")
+    waiters = [Waiter(controller, "b") for _ in range(2)]
+    _waiting(controller, 2)
+    with pytest.raises(QueueFull, match="already have 2 requests waiting"):
+        controller.acquire("model", "b")
+    other = Waiter(controller, "c")
+    _waiting(controller, 3)
+    controller.release(held)
+    for w in waiters + [other]:
+        assert w.admitted.wait(5)
+        w.release()
+
+
+def test_interactive_requests_go_before_bulk():
+    controller = _controller()
+    held = controller.acquire("model", "a")
+    bulk = Waiter(controller, "b", priority=BULK)
+    _waiting(controller, 1)
+    interactive = Waiter(controller, "c")
+    _waiting(controller, 2)
+    controller.release(held)
+    assert interactive.admitted.wait(5) and not bulk.admitted.wait(0.1)
+    interactive.release()
+    assert bulk.admitted.wait(5)
+    bulk.release()
+
+
+def test_users_with_fewer_running_requests_go_first():
+    controller = _controller(limit=2)
+    heavy = controller.acquire("model", "heavy")
+    other = controller.acquire("model", "other")
+    heavy_again = Waiter(controller, "heavy")
+    _waiting(controller, 1)
+    light = Waiter(controller, "light")
+    _waiting(controller, 2)
+    # "heavy" queued first but already holds a slot, so "light" is admitted first
+    controller.release(other)
+    assert light.admitted.wait(5) and not heavy_again.admitted.wait(0.1)
+    controller.release(heavy)
+    assert heavy_again.admitted.wait(5)
+    light.release()
+    heavy_again.release()
+
+
+def test_waiters_see_their_queue_position():
+    controller = _controller()
+    held = controller.acquire("model", "a")
+    first = Waiter(controller, "b")
+    _waiting(controller, 1)
+    positions = []
+    second = Waiter(controller, "c", on_wait=positions.append)
+    _waiting(controller, 2)
+    _wait_until(lambda: positions == [2])
+    controller.release(held)
+    assert first.admitted.wait(5)
+    _wait_until(lambda: positions == [2, 1])
+    first.release()
+    assert second.admitted.wait(5)
+    second.release()
+    assert positions == [2, 1, 0]
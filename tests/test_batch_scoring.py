@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import RESULT_COLUMN, SchemaError, score_file
+from fastpath import get_scorer
+from model_registry import FEATURES
+
+
+def _table(n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.uniform(0, 150, size=(n, len(FEATURES['diabetes']))), columns=FEATURES['diabetes'])
+    return frame.round(2)
+
+
+def _score(frame, **kwargs):
+    out = io.StringIO()
+    stats = score_file('diabetes', io.StringIO(frame.to_csv(index=False)), out, fmt='csv', out_fmt='csv', **kwargs)
+    out.seek(0)
+    return stats, pd.read_csv(out)
+
+
+@pytest.mark.parametrize("model", [None, "direct"])
+def test_predictions_match_the_model(model):
+    frame = _table()
+    scorer = get_scorer('diabetes')
+    stats, scored = _score(frame, model=scorer if model else None, chunksize=5)
+    expected = scorer.predict(frame.to_numpy())
+    assert stats["rows"] == len(frame) and stats["invalid"] == 0
+    assert scored[RESULT_COLUMN].tolist() == expected.tolist()
+    assert stats["positive"] == int(expected.sum())
+
+
+@pytest.mark.parametrize("model", [None, "direct"])
+def test_missing_and_non_numeric_rows_are_left_empty(model):
+    frame = _table().astype(object)
+    frame.loc[2, 'Glucose'] = None
+    frame.loc[6, 'BMI'] = 'n/a'
+    frame.loc[9, 'Age'] = np.inf
+    stats, scored = _score(frame, model=get_scorer('diabetes') if model else None, chunksize=4)
+    assert scored[RESULT_COLUMN].isna().tolist() == [i in (2, 6, 9) for i in range(len(frame))]
+    assert stats["invalid"] == 3
+    # Rows are numbered from 1 below the header, across chunk boundaries
+    assert stats["first_invalid"] == (3, 'Glucose')
+
+
+def test_missing_column_is_a_schema_error():
+    with pytest.raises(SchemaError, match="Glucose"):
+        _score(_table().drop(columns=['Glucose']))
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    frame = _table()
+    src, dest = tmp_path / "in.parquet", tmp_path / "out.parquet"
+    frame.to_parquet(src)
+    stats = score_file('diabetes', str(src), str(dest), chunksize=5)
+    assert stats["rows"] == len(frame)
+    assert pd.read_parquet(dest)[RESULT_COLUMN].tolist() == get_scorer('diabetes').predict(frame.to_numpy()).tolist()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+
+from evaluation import MetricAccumulator, evaluate, latest_results
+from fastpath import get_scorer
+from model_registry import FEATURES, get_loaded
+
+
+def test_accumulator_matches_sklearn_across_chunks():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 2, 5000)
+    scores = labels * 1.5 + rng.normal(size=5000)
+    acc = MetricAccumulator()
+    for part in np.array_split(np.arange(5000), 7):
+        acc.update(labels[part], scores[part] > 0, scores[part])
+    result = acc.result()
+    assert result["rows"] == 5000
+    assert result["accuracy"] == pytest.approx(accuracy_score(labels, scores > 0))
+    assert result["f1"] == pytest.approx(f1_score(labels, scores > 0))
+    assert result["roc_auc"] == pytest.approx(roc_auc_score(labels, scores), abs=1e-3)
+
+
+@pytest.mark.parametrize("labels, scores, match", [
+    ([0, 1, 1], [0.5, np.nan, 1.0], "Row 1 .*non-finite score"),
+    ([0, 1, 1], [0.5, 1.0, np.inf], "Row 2 .*non-finite score"),
+    ([0, np.nan, 1], [0.5, 1.0, 2.0], "Row 1 .*expected 0 or 1"),
+    ([0, 2, 1], [0.5, 1.0, 2.0], "Row 1 .*expected 0 or 1"),
+])
+def test_accumulator_rejects_invalid_rows(labels, scores, match):
+    acc = MetricAccumulator()
+    with pytest.raises(ValueError, match=match):
+        acc.update(labels, np.asarray(scores) > 0, scores)
+    assert acc.result()["rows"] == 0
+
+
+def test_evaluate_skips_and_counts_invalid_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame(rng.uniform(0, 150, size=(40, len(FEATURES['diabetes']))), columns=FEATURES['diabetes'])
+    frame["Outcome"] = rng.integers(0, 2, len(frame))
+    clean = frame.copy()
+    frame = frame.astype({'Glucose': object, 'Outcome': object})
+    frame.loc[3, 'Glucose'] = None
+    frame.loc[7, 'Glucose'] = 'high'
+    frame.loc[11, 'Outcome'] = None
+    frame.loc[12, 'Outcome'] = 'unknown'
+    path = tmp_path / "holdout.csv"
+    frame.to_csv(path, index=False)
+
+    result = evaluate('diabetes', str(path), chunksize=9)
+    assert result["skipped"] == {"invalid_features": 2, "unlabeled": 2}
+    kept = clean.drop(index=[3, 7, 11, 12])
+    predictions = get_scorer('diabetes').predict(kept[FEATURES['diabetes']].to_numpy())
+    assert result["rows"] == len(kept)
+    assert result["accuracy"] == pytest.approx(accuracy_score(kept["Outcome"], predictions))
+    assert latest_results({'diabetes': get_loaded('diabetes').sha256})['diabetes'] == result
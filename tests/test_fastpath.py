@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from fastpath import KernelSVCScorer, LinearScorer, UnsupportedModel, compile_model, probe_inputs, scorer_for, verify
+from model_registry import FEATURES, get_model
+
+
+def _data(n=300, d=5, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, d))
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 2] > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(),
+    SVC(kernel='linear'),
+    SVC(kernel='rbf', gamma='scale'),
+    SVC(kernel='poly', degree=2),
+    make_pipeline(StandardScaler(), SVC(kernel='rbf')),
+    make_pipeline(StandardScaler(), LogisticRegression()),
+])
+def test_compiled_scorer_matches_sklearn(model):
+    X, y = _data()
+    model.fit(X, y)
+    scorer = compile_model(model)
+    probe = probe_inputs(model, X.shape[1])
+    assert verify(model, scorer, probe) == 0
+    np.testing.assert_allclose(scorer.decision_function(probe), model.decision_function(probe), rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("name", sorted(FEATURES))
+def test_shipped_models_have_parity(name):
+    model = get_model(name)
+    scorer = compile_model(model)
+    assert verify(model, scorer, probe_inputs(model, len(FEATURES[name]))) == 0
+
+
+@pytest.mark.parametrize("model", [LogisticRegression(), SVC(kernel='rbf')])
+@pytest.mark.parametrize("bad, message", [(np.nan, "NaN"), (np.inf, "infinity"), (-np.inf, "infinity"), (None, "NaN")])
+def test_non_finite_rows_are_rejected_like_sklearn(model, bad, message):
+    X, y = _data()
+    model.fit(X, y)
+    scorer = compile_model(model)
+    rows = [list(X[0]), list(X[1])]
+    rows[1][2] = bad
+    with pytest.raises(ValueError, match=message):
+        scorer.predict(rows)
+    with pytest.raises(ValueError):
+        model.predict(np.asarray(rows, dtype=float))
+
+
+def test_error_names_the_offending_rows():
+    scorer = LinearScorer(np.ones(3), 0.0, [0, 1])
+    with pytest.raises(ValueError, match=r"row 1, 3"):
+        scorer.predict([[1, 2, 3], [np.nan, 0, 0], [1, 1, 1], [0, np.inf, 0]])
+
+
+def test_non_numeric_input_is_rejected():
+    scorer = LinearScorer(np.ones(2), 0.0, [0, 1])
+    with pytest.raises(ValueError):
+        scorer.predict([["abc", 1.0]])
+
+
+def test_unsupported_models_fall_back_to_sklearn():
+    from sklearn.tree import DecisionTreeClassifier
+    X, y = _data()
+    tree = DecisionTreeClassifier().fit(X, y)
+    with pytest.raises(UnsupportedModel):
+        compile_model(tree)
+    assert scorer_for("diabetes", tree) is tree
+
+
+def test_other_scalers_fall_back_to_sklearn():
+    from sklearn.preprocessing import MinMaxScaler
+    X, y = _data()
+    model = make_pipeline(MinMaxScaler(), SVC(kernel='rbf')).fit(X, y)
+    with pytest.raises(UnsupportedModel):
+        compile_model(model)
+    assert scorer_for("diabetes", model) is model
+
+
+@pytest.mark.parametrize("scorer", [
+    LinearScorer([[1.0, 2.0, 3.0]], [0.5], [0, 1]),
+    KernelSVCScorer(np.ones((2, 3)), [1.0, -1.0], 0.0, [0, 1], 'rbf', 0.1),
+])
+def test_with_scaler_returns_a_new_scorer(scorer):
+    X = np.array([[1.0, 2.0, 3.0], [-1.0, 0.5, 2.0]])
+    before = scorer.decision_function(X)
+    scaled = scorer.with_scaler(np.array([1.0, 1.0, 1.0]), np.array([2.0, 2.0, 2.0]))
+    assert scaled is not scorer
+    np.testing.assert_array_equal(scorer.decision_function(X), before)
+    np.testing.assert_allclose(scaled.decision_function(X), scorer.decision_function((X - 1.0) / 2.0))
+
+
+def test_scorer_objects_pass_through():
+    scorer = KernelSVCScorer(np.ones((2, 3)), [1.0, -1.0], 0.0, [0, 1], 'rbf', 0.1)
+    assert scorer_for("heart", scorer) is scorer
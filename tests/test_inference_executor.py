@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import inference_executor
+from admission import BULK, AdmissionController
+from fastpath import get_scorer
+from inference_executor import InferenceBusy, InferenceExecutor, InferenceTimeout
+from model_registry import FEATURES, get_loaded
+
+
+@pytest.fixture
+def executor():
+    admission = AdmissionController(limits={}, default_limit=2)
+    executor = InferenceExecutor(workers=2, mode='thread', model_concurrency=1, timeout=5, admission=admission)
+    yield executor
+    executor.shutdown()
+
+
+def _idle(executor, name, timeout=5):
+    # Slots are released by a done-callback, which may run just after result() returns
+    deadline = time.monotonic() + timeout
+    while executor.admission.stats()[(name, "running")]:
+        assert time.monotonic() < deadline, f"{name} slot never released"
+        time.sleep(0.005)
+    return True
+
+
+def _rows(name, n=5, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, size=(n, len(FEATURES[name]))).round(2).tolist()
+
+
+@pytest.mark.parametrize("name", sorted(FEATURES))
+def test_predictions_and_version(executor, name):
+    rows = _rows(name)
+    results, version = executor.predict(name, rows, versioned=True, user="ana")
+    assert results == get_scorer(name).predict(rows).tolist()
+    assert version == get_loaded(name).version
+    assert _idle(executor, name)
+
+
+def test_jobs_run_concurrently_across_models(executor):
+    futures = {name: executor.submit(name, _rows(name), priority=BULK) for name in FEATURES}
+    for name, future in futures.items():
+        assert executor.result(name, future) == get_scorer(name).predict(_rows(name)).tolist()
+
+
+def test_slow_job_times_out(executor, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(inference_executor, "_job", lambda *args: release.wait(5))
+    with pytest.raises(InferenceTimeout, match="took longer than 0.05s"):
+        executor.predict("diabetes", _rows("diabetes"), timeout=0.05)
+    release.set()
+
+
+def test_busy_model_is_reported(executor):
+    # model_concurrency=1: hold the only diabetes slot
+    held = executor.admission.acquire("diabetes", "other", default_limit=executor.model_concurrency)
+    try:
+        with pytest.raises(InferenceBusy):
+            executor.predict("diabetes", _rows("diabetes"), timeout=0.05)
+        # Other models are unaffected
+        assert executor.predict("heart", _rows("heart"))
+    finally:
+        executor.admission.release(held)
+
+
+def test_invalid_rows_surface_as_value_errors(executor):
+    rows = _rows("diabetes")
+    rows[1][2] = float("nan")
+    with pytest.raises(ValueError, match="NaN"):
+        executor.predict("diabetes", rows)
+    assert _idle(executor, "diabetes")
+
+
+def test_executor_leaves_the_controllers_limits_alone():
+    admission = AdmissionController(limits={"heart": 3}, default_limit=4)
+    executor = InferenceExecutor(workers=1, mode='thread', model_concurrency=2, admission=admission)
+    try:
+        assert admission.limits == {"heart": 3}
+        executor.predict("diabetes", _rows("diabetes"))
+        executor.predict("heart", _rows("heart"))
+        assert admission.limits == {"heart": 3}
+        # Models without a configured cap get the executor's, configured ones keep theirs
+        assert admission.limit("diabetes") == 2 and admission.limit("heart") == 3
+    finally:
+        executor.shutdown()
+
+
+def test_admission_wait_and_result_share_one_deadline(executor, monkeypatch):
+    monkeypatch.setattr(inference_executor, "_job", lambda *args: time.sleep(0.5) or [0])
+    held = executor.admission.acquire("diabetes", "other", default_limit=executor.model_concurrency)
+    threading.Timer(0.3, executor.admission.release, args=(held,)).start()
+    t0 = time.monotonic()
+    # 0.3s waiting for the slot plus 0.5s scoring overruns a 0.6s budget
+    with pytest.raises(InferenceTimeout, match="0.6s"):
+        executor.predict("diabetes", _rows("diabetes"), timeout=0.6)
+    assert time.monotonic() - t0 < 0.75
+
+
+def test_process_mode_shares_the_parents_cache(monkeypatch):
+    from prediction_cache import prediction_cache
+    executor = InferenceExecutor(workers=2, mode='process', timeout=30, admission=AdmissionController(limits={}))
+    try:
+        rows = _rows("heart", 6, seed=7)
+        rows.append(rows[0])
+        expected = get_scorer("heart").predict(rows).tolist()
+        before = prediction_cache.stats()
+        assert executor.predict("heart", rows, versioned=True) == (expected, get_loaded("heart").version)
+        after = prediction_cache.stats()
+        assert after["misses"] - before["misses"] == 7 and after["hits"] == before["hits"]
+
+        # Every row is now cached in the parent: nothing goes to a worker
+        monkeypatch.setattr(executor._pool, "submit", lambda *args: pytest.fail("cached rows were sent to a worker"))
+        assert executor.predict("heart", rows[::-1]) == expected[::-1]
+        assert prediction_cache.stats()["hits"] - after["hits"] == 7
+    finally:
+        executor.shutdown()
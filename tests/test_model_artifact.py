@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from fastpath import probe_inputs
+from model_artifact import Artifact, export
+
+
+def _fitted(model, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 4))
+    return model.fit(X, (X[:, 0] - X[:, 1] > 0).astype(int))
+
+
+def _models(seed=0):
+    return {
+        "linear": (_fitted(LogisticRegression(), seed), "a" * 64),
+        "kernel": (_fitted(make_pipeline(StandardScaler(), SVC(kernel='rbf')), seed), "b" * 64),
+    }
+
+
+@pytest.mark.parametrize("float32", [False, True])
+def test_round_trip_matches_the_fitted_models(tmp_path, float32):
+    path = str(tmp_path / "models.medi")
+    models = _models()
+    export(models, path, float32=float32)
+    art = Artifact(path)
+    for name, (model, sha256) in models.items():
+        probe = probe_inputs(model, 4)
+        scorer = art.scorer(name)
+        assert art.sha256(name) == sha256
+        assert (scorer.predict(probe) == model.predict(probe)).mean() >= (0.99 if float32 else 1.0)
+        if not float32:
+            np.testing.assert_allclose(scorer.decision_function(probe), model.decision_function(probe), rtol=1e-7, atol=1e-9)
+
+
+def test_re_export_leaves_existing_mappings_intact(tmp_path):
+    path = str(tmp_path / "models.medi")
+    old = _models(seed=0)
+    export(old, path)
+    mapped = Artifact(path)
+    probe = probe_inputs(old["kernel"][0], 4)
+    before = mapped.scorer("kernel").decision_function(probe)
+
+    export(_models(seed=1), path)
+    # The old mapping still reads the file it mapped; a fresh one sees the new models
+    np.testing.assert_array_equal(mapped.scorer("kernel").decision_function(probe), before)
+    assert not np.array_equal(Artifact(path).scorer("kernel").decision_function(probe), before)
+    assert os.listdir(tmp_path) == ["models.medi"]
+
+
+def test_failed_export_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "models.medi")
+    export(_models(), path)
+    with open(path, 'rb') as f:
+        original = f.read()
+    def fail(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(OSError):
+        export(_models(seed=1), path)
+    with open(path, 'rb') as f:
+        assert f.read() == original
+    assert os.listdir(tmp_path) == ["models.medi"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.medi"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError, match="not a Medi-Predictor model artifact"):
+        Artifact(str(path))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+import model_registry
+from model_registry import FEATURES, LoadedModel, get_loaded, reload_if_changed, validate
+
+
+def _fitted(d, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(100, d))
+    return LogisticRegression().fit(X, (X[:, 0] > 0).astype(int))
+
+
+@pytest.fixture
+def model_file(tmp_path, monkeypatch):
+    """A private diabetes model file and an empty registry; returns a writer for new versions."""
+    path = str(tmp_path / "diabetes.sav")
+    monkeypatch.setitem(model_registry.MODEL_FILES, "diabetes", path)
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setattr(model_registry, "_rejected", {})
+    versions = iter(range(1, 100))
+
+    def write(model):
+        with open(path, 'wb') as f:
+            pickle.dump(model, f)
+        # Distinct mtimes even on coarse filesystem clocks
+        t = next(versions) * 10**9
+        os.utime(path, ns=(t, t))
+    write(_fitted(8))
+    return write
+
+
+def test_loaded_once_and_shared(model_file):
+    first = get_loaded("diabetes")
+    assert get_loaded("diabetes") is first
+    assert len(first.sha256) == 64 and first.version == first.sha256[:12]
+
+
+def test_changed_file_is_swapped_in(model_file):
+    old = get_loaded("diabetes")
+    assert not reload_if_changed("diabetes")
+    model_file(_fitted(8, seed=1))
+    assert reload_if_changed("diabetes")
+    new = get_loaded("diabetes")
+    assert new is not old and new.sha256 != old.sha256
+
+
+@pytest.mark.parametrize("bad", [_fitted(3), "not a model"])
+def test_invalid_file_is_rejected_and_remembered(model_file, bad, caplog):
+    old = get_loaded("diabetes")
+    model_file(bad)
+    assert not reload_if_changed("diabetes")
+    assert get_loaded("diabetes") is old
+    assert "new file rejected" in caplog.text
+    # The same rejected file is not loaded again; a fixed one is
+    assert not reload_if_changed("diabetes")
+    model_file(_fitted(8, seed=2))
+    assert reload_if_changed("diabetes")
+
+
+def test_validate_checks_the_feature_layout():
+    validate("heart", LoadedModel("heart", _fitted(len(FEATURES["heart"])), "0" * 64, None))
+    with pytest.raises(ValueError, match="expects 3 features"):
+        validate("heart", LoadedModel("heart", _fitted(3), "0" * 64, None))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import urllib.error
+
+import numpy as np
+import pytest
+
+from fastpath import get_scorer
+from model_registry import FEATURES
+from predict_api import MicroBatcher, PredictClient, serve
+
+# A long batching window so concurrent requests reliably share a batch
+WAIT_MS = 100
+
+
+@pytest.fixture(scope="module")
+def client():
+    server = serve(port=0, max_wait_ms=WAIT_MS)
+    yield PredictClient(f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+    server.server_close()
+
+
+def _rows(name, n, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, size=(n, len(FEATURES[name]))).round(2).tolist()
+
+
+def _concurrently(*calls):
+    """Runs the calls at the same time; returns each one's result or exception."""
+    results = [None] * len(calls)
+    start = threading.Barrier(len(calls))
+
+    def run(i, call):
+        start.wait()
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    return results
+
+
+def _error(exc):
+    assert isinstance(exc, urllib.error.HTTPError), exc
+    return exc.code, json.loads(exc.read())["error"]
+
+
+@pytest.mark.parametrize("name", sorted(FEATURES))
+def test_predictions_match_the_model(client, name):
+    rows = _rows(name, 5)
+    expected = get_scorer(name).predict(rows).tolist()
+    assert client.predict_many(name, rows) == expected
+    assert client.predict(name, dict(zip(FEATURES[name], rows[2]))) == expected[2]
+
+
+def test_concurrent_requests_share_batches(client):
+    rows = _rows('heart', 8, seed=1)
+    before = client.stats()['heart']
+    results = _concurrently(*[lambda row=row: client.predict_many('heart', [row]) for row in rows])
+    assert [r[0] for r in results] == get_scorer('heart').predict(rows).tolist()
+    after = client.stats()['heart']
+    assert after['rows'] - before['rows'] == 8
+    assert after['batches'] - before['batches'] < 8
+
+
+@pytest.mark.parametrize("bad, message", [
+    (float('nan'), "Non-finite values for: Glucose"),
+    (float('inf'), "Non-finite values for: Glucose"),
+    ("high", "Row 0: could not convert"),
+    (None, "Row 0:"),
+])
+def test_bad_input_is_a_400(client, bad, message):
+    row = dict(zip(FEATURES['diabetes'], _rows('diabetes', 1)[0]), Glucose=bad)
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        client.predict('diabetes', row)
+    code, error = _error(exc.value)
+    assert code == 400 and message in error
+
+
+def test_missing_features_and_unknown_models(client):
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        client.predict('diabetes', {"Glucose": 100})
+    assert _error(exc.value)[0] == 400
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        client.predict('kidney', {})
+    assert _error(exc.value)[0] == 404
+
+
+def test_one_clients_bad_input_does_not_fail_another(client):
+    good = _rows('diabetes', 4, seed=2)
+    bad = [dict(zip(FEATURES['diabetes'], good[0]), BMI=float('nan'))]
+    results = _concurrently(
+        lambda: client.predict_many('diabetes', good),
+        lambda: client.predict_many('diabetes', bad),
+        lambda: client.predict_many('diabetes', good[:1]),
+    )
+    assert results[0] == get_scorer('diabetes').predict(good).tolist()
+    assert _error(results[1])[0] == 400
+    assert results[2] == results[0][:1]
+
+
+def test_a_failing_row_only_fails_its_own_future():
+    # Rows that bypass validation still cannot take down the rest of their batch
+    batcher = MicroBatcher('diabetes', max_wait_ms=WAIT_MS)
+    good = _rows('diabetes', 2, seed=3)
+    futures = [batcher.submit(good[0]), batcher.submit([float('nan')] * 8), batcher.submit(good[1])]
+    assert futures[0].result(10) == get_scorer('diabetes').predict(good[:1])[0]
+    with pytest.raises(ValueError, match="NaN"):
+        futures[1].result(10)
+    assert futures[2].result(10) == get_scorer('diabetes').predict(good[1:])[0]
+
+
+def test_health(client):
+    assert client._call("/health") == {"status": "ok"}
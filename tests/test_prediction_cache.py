@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+import prediction_cache
+from fastpath import LinearScorer
+from prediction_cache import PredictionCache
+
+
+class Loaded:
+    def __init__(self, sha256, model):
+        self.sha256 = sha256
+        self.model = model
+        self.version = sha256[:12]
+
+
+class CountingScorer(LinearScorer):
+    """Positive when the first feature exceeds `threshold`; counts scored rows."""
+
+    def __init__(self, threshold, d=8, on_predict=None):
+        coef = np.zeros(d)
+        coef[0] = 1.0
+        super().__init__(coef, -threshold, np.array([0, 1]))
+        self.scored = 0
+        self.on_predict = on_predict
+
+    def predict(self, X):
+        self.scored += len(X)
+        if self.on_predict is not None:
+            self.on_predict()
+        return super().predict(X)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """{name: Loaded} standing in for the model registry."""
+    models = {}
+    monkeypatch.setattr(prediction_cache, "get_loaded", lambda name: models[name])
+    return models
+
+
+def _rows(*firsts):
+    return [[float(v)] + [0.0] * 7 for v in firsts]
+
+
+def test_hits_skip_scoring_and_duplicates_are_scored_once(registry):
+    scorer = CountingScorer(5)
+    registry["diabetes"] = Loaded("a" * 64, scorer)
+    cache = PredictionCache()
+    assert cache.predict("diabetes", _rows(1, 9, 9)) == [0, 1, 1]
+    assert scorer.scored == 2
+    assert cache.predict_versioned("diabetes", _rows(9, 1)) == ([1, 0], "a" * 12)
+    assert scorer.scored == 2
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 3
+
+
+def test_lru_eviction(registry):
+    registry["diabetes"] = Loaded("a" * 64, CountingScorer(5))
+    cache = PredictionCache(maxsize=2)
+    cache.predict("diabetes", _rows(1, 2, 3))
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+
+
+def test_swap_invalidates_old_entries(registry):
+    old, new = CountingScorer(5), CountingScorer(0)
+    registry["diabetes"] = Loaded("a" * 64, old)
+    cache = PredictionCache()
+    assert cache.predict("diabetes", _rows(3)) == [0]
+    registry["diabetes"] = Loaded("b" * 64, new)
+    assert cache.predict_versioned("diabetes", _rows(3)) == ([1], "b" * 12)
+    assert new.scored == 1 and cache.stats()["size"] == 1
+
+
+def test_results_of_a_replaced_version_are_not_cached(registry):
+    cache = PredictionCache()
+    new = CountingScorer(0)
+
+    def swap_mid_request():
+        # Another request sees the new version (and invalidates) while this one is scoring
+        registry["diabetes"] = Loaded("b" * 64, new)
+        cache.predict("diabetes", _rows(7))
+
+    old = CountingScorer(5, on_predict=swap_mid_request)
+    registry["diabetes"] = Loaded("a" * 64, old)
+    assert cache.predict_versioned("diabetes", _rows(3)) == ([0], "a" * 12)
+    assert all(key[0] == "b" * 64 for key in cache._data)
+    # The stale request did not roll the version back either
+    assert cache.predict("diabetes", _rows(3)) == [1]
+
+
+def test_invalid_rows_never_reach_the_cache(registry):
+    registry["diabetes"] = Loaded("a" * 64, CountingScorer(5))
+    cache = PredictionCache()
+    with pytest.raises(ValueError, match="NaN"):
+        cache.predict("diabetes", _rows(1, float("nan")))
+    assert cache.stats()["size"] == 0 and cache.stats()["misses"] == 0
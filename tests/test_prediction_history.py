@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+
+import prediction_history
+from prediction_history import PredictionHistory
+
+
+def test_records_are_written_and_queried_in_order(tmp_path):
+    history = PredictionHistory(str(tmp_path / "h.sqlite3"))
+    for i in range(5):
+        history.record("ana", "heart", [i], i % 2, ts=1000 + i, version="v1")
+    history.record("bo", "heart", [9], 1, ts=1001)
+    assert history.flush(timeout=10)
+    rows = history.query("ana")
+    assert [r["inputs"] for r in rows] == [[i] for i in range(5)]
+    assert [r["inputs"] for r in history.query("ana", limit=2)] == [[3], [4]]
+    assert history.count("bo") == 1 and history.count() == 6
+
+
+def test_writer_survives_failed_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_history, "WRITE_ATTEMPTS", 2)
+    monkeypatch.setattr(prediction_history.time, "sleep", lambda s: None)
+    history = PredictionHistory(str(tmp_path / "h.sqlite3"))
+    real_conn = history._conn
+    failing = {"left": 2}
+
+    class Broken:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def executemany(self, *args):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        def close(self):
+            pass
+
+    def conn():
+        if threading.current_thread() is history._writer and failing["left"]:
+            failing["left"] -= 1
+            history._local.conn = Broken()
+            return history._local.conn
+        return real_conn()
+
+    monkeypatch.setattr(history, "_conn", conn)
+    history.record("ana", "heart", [1], 1)
+    assert history.flush(timeout=10)
+    assert history.dropped == 1 and history.count("ana") == 0
+
+    # The writer is still alive and the next batch goes through
+    history.record("ana", "heart", [2], 0)
+    assert history.flush(timeout=10)
+    assert [r["inputs"] for r in history.query("ana")] == [[2]]
+
+
+def test_flush_gives_up_after_its_timeout(tmp_path, monkeypatch):
+    history = PredictionHistory(str(tmp_path / "h.sqlite3"))
+    release = threading.Event()
+    monkeypatch.setattr(history, "_write", lambda batch: release.wait(10))
+    history.record("ana", "heart", [1], 1)
+    assert history.flush(timeout=0.2) is False
+    release.set()
+    assert history.flush(timeout=10)
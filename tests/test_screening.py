@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import io
+
+import numpy as np
+import pandas as pd
+
+from model_registry import FEATURES, get_model
+from screening import MAPPINGS, complete_profile, risk_column, screen, screen_file
+
+PROFILE = {
+    "age": 54, "sex": "M", "height_cm": 175, "weight_kg": 82, "glucose": 148, "insulin": 90,
+    "skin_thickness": 30, "pedigree": 0.6, "diastolic_bp": 80, "systolic_bp": 140, "cholesterol": 240,
+    "max_heart_rate": 150, "chest_pain": 2, "resting_ecg": 1, "exercise_angina": 0, "st_depression": 1.2,
+    "st_slope": 1, "major_vessels": 0, "thal": 2, "fasting_bs_high": 0,
+}
+
+
+def _expected(name, profile):
+    row = complete_profile(pd.DataFrame([profile])).iloc[0]
+    X = pd.DataFrame([[row[MAPPINGS[name][f]] for f in FEATURES[name]]], columns=FEATURES[name])
+    model = get_model(name)
+    return int(model.predict(X if hasattr(model, 'feature_names_in_') else X.to_numpy())[0])
+
+
+def test_derived_fields():
+    frame = complete_profile(pd.DataFrame([PROFILE, {**PROFILE, "sex": "female", "bmi": 31.0}]))
+    assert frame["bmi"].iloc[0] == 82 / 1.75 ** 2
+    assert frame["bmi"].iloc[1] == 31.0
+    assert frame["pregnancies"].iloc[0] == 0 and np.isnan(frame["pregnancies"].iloc[1])
+    assert frame["sex"].tolist() == [1.0, 0.0]
+
+
+def test_screen_matches_each_model():
+    report = screen(PROFILE)
+    for name in ("diabetes", "heart"):
+        assert report[name]["prediction"] == _expected(name, PROFILE)
+    assert "fasting_bs_high" not in report["parkinsons"]["missing"]
+
+
+def test_fasting_sugar_is_not_derived_from_glucose():
+    profile = {k: v for k, v in PROFILE.items() if k != "fasting_bs_high"}
+    frame = complete_profile(pd.DataFrame([profile]))
+    assert np.isnan(frame["fasting_bs_high"].iloc[0])
+    report = screen(profile)
+    assert report["heart"] == {"missing": ["fasting_bs_high"]}
+    assert "prediction" in report["diabetes"]
+
+
+def test_screen_file_adds_a_column_per_model():
+    table = pd.DataFrame([PROFILE, {**PROFILE, "cholesterol": None}, {"age": 40}])
+    out = io.StringIO()
+    stats = screen_file(io.StringIO(table.to_csv(index=False)), out, fmt='csv', out_fmt='csv', chunksize=2)
+    out.seek(0)
+    screened = pd.read_csv(out)
+    assert stats["rows"] == 3
+    assert stats["screened"] == {"diabetes": 2, "heart": 1, "parkinsons": 0}
+    assert screened[risk_column("heart")].isna().tolist() == [False, True, True]
+    assert screened[risk_column("diabetes")].iloc[0] == _expected("diabetes", PROFILE)
+
+
+def test_non_positive_height_is_treated_as_missing():
+    frame = complete_profile(pd.DataFrame([{**PROFILE, "height_cm": 0}, {**PROFILE, "height_cm": -170}]))
+    assert frame["bmi"].isna().all()
+    report = screen({**PROFILE, "height_cm": 0})
+    assert report["diabetes"] == {"missing": ["bmi"]}
+    assert "prediction" in report["heart"]
+
+
+def test_non_finite_rows_are_skipped_and_counted():
+    table = pd.DataFrame([
+        {**PROFILE, "height_cm": 0},            # no BMI: diabetes skipped as missing
+        {**PROFILE, "cholesterol": "inf"},      # heart skipped as invalid
+        {**PROFILE, "insulin": "-inf"},         # diabetes skipped as invalid
+        PROFILE,
+    ])
+    out = io.StringIO()
+    stats = screen_file(io.StringIO(table.to_csv(index=False)), out, fmt='csv', out_fmt='csv', chunksize=3)
+    out.seek(0)
+    screened = pd.read_csv(out)
+    assert stats["rows"] == 4
+    assert stats["invalid"] == {"diabetes": 1, "heart": 1, "parkinsons": 0}
+    assert stats["screened"] == {"diabetes": 2, "heart": 3, "parkinsons": 0}
+    assert screened[risk_column("diabetes")].isna().tolist() == [True, False, True, False]
+    assert screened[risk_column("heart")].isna().tolist() == [False, True, False, False]
+
+
+def test_single_profile_with_an_infinite_value():
+    report = screen({**PROFILE, "cholesterol": float("inf")})
+    assert report["heart"] == {"missing": ["cholesterol"]}
+    assert "prediction" in report["diabetes"]
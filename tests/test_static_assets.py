@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import static_assets
+from static_assets import hashed_name
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    assets, static = tmp_path / "assets", tmp_path / "static"
+    assets.mkdir()
+    monkeypatch.setattr(static_assets, "ASSET_DIR", str(assets))
+    monkeypatch.setattr(static_assets, "STATIC_DIR", str(static))
+    monkeypatch.setattr(static_assets, "KEEP_VERSIONS", 3)
+    return assets, static
+
+
+def _release(assets, n):
+    """Publishes version n of medi.css with increasing mtimes; returns its hashed name."""
+    data = f"body {{ margin: {n}px; }}".encode()
+    (assets / "medi.css").write_bytes(data)
+    target = static_assets._publish_one("medi.css")
+    os.utime(os.path.join(static_assets.STATIC_DIR, target), (n, n))
+    return target
+
+
+def test_hashed_names_follow_content():
+    assert hashed_name("medi.css", b"a") != hashed_name("medi.css", b"b")
+    assert hashed_name("medi.css", b"a").startswith("medi.") and hashed_name("medi.css", b"a").endswith(".css")
+
+
+def test_keeps_the_newest_versions(dirs):
+    assets, static = dirs
+    static.mkdir()
+    (static / "other.12345678abcd.css").write_text("")
+    names = [_release(assets, n) for n in range(1, 6)]
+    assert sorted(os.listdir(static)) == sorted(names[-3:] + ["other.12345678abcd.css"])
+
+
+def test_rollback_marks_the_old_version_current(dirs):
+    assets, static = dirs
+    first = _release(assets, 1)
+    _release(assets, 2)
+    _release(assets, 3)
+    # Re-publishing version 1 touches it, so the next release prunes version 2 instead
+    (assets / "medi.css").write_bytes(b"body { margin: 1px; }")
+    assert static_assets._publish_one("medi.css") == first
+    _release(assets, 4)
+    assert first in os.listdir(static) and len(os.listdir(static)) == 3
+
+
+def test_tags_fall_back_to_inline_when_unpublished(dirs, monkeypatch):
+    assets, _ = dirs
+    (assets / "medi.css").write_text("body {}")
+    monkeypatch.setattr(static_assets, "publish", lambda: {"medi.css": None})
+    assert static_assets.stylesheet_tag() == "<style>\nbody {}</style>"
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from symptom_search import SymptomIndex, get_symptom_index, normalize, prefix_distance
+
+SYMPTOMS = ["Tremors (Shaking)", "Chest Pain", "Chest Tightness", "Fever", "Shortness of Breath"]
+SYNONYMS = {"Tremors (Shaking)": ["shaking", "shivering hands"], "Shortness of Breath": ["short of breath"]}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SymptomIndex(SYMPTOMS, SYNONYMS)
+
+
+def test_normalize():
+    assert normalize("Tremors (Shaking)!") == ["tremors", "shaking"]
+    assert normalize("  ") == []
+
+
+def test_prefix_distance():
+    assert prefix_distance("fev", "fever", 1) == 0
+    assert prefix_distance("fevr", "fever", 1) == 1
+    assert prefix_distance("xyzw", "fever", 1) > 1
+    # Adjacent swaps cost one edit
+    assert prefix_distance("pian", "pain", 1) == 1
+    assert prefix_distance("feevr", "fever", 1) == 1
+
+
+@pytest.mark.parametrize("query, symptom, matched, tier", [
+    ("shaking", "Tremors (Shaking)", "shaking", 0),
+    ("ches", "Chest Pain", "Chest Pain", 1),
+    ("short of br", "Shortness of Breath", "short of breath", 1),
+    ("hands shiv", "Tremors (Shaking)", "shivering hands", 2),
+    ("fevr", "Fever", "Fever", 3),
+    ("fevre", "Fever", "Fever", 3),
+    ("chset pain", "Chest Pain", "Chest Pain", 3),
+])
+def test_best_match(index, query, symptom, matched, tier):
+    best = index.search(query)[0]
+    assert (best["symptom"], best["matched"], best["score"][0]) == (symptom, matched, tier)
+
+
+def test_one_result_per_symptom_within_limit(index):
+    results = index.search("chest")
+    assert [r["symptom"] for r in results] == ["Chest Pain", "Chest Tightness"]
+    assert len(index.search("chest", limit=1)) == 1
+    assert len({r["symptom"] for r in index.search("sh")}) == len(index.search("sh"))
+
+
+@pytest.mark.parametrize("query", ["", "  ", "xyz", "qqqqqqqq"])
+def test_no_match(index, query):
+    assert index.search(query) == []
+
+
+def test_shipped_synonyms_resolve_lay_terms():
+    assert get_symptom_index().search("tummy ache")[0]["score"] == (0, 0)
+
+
+def test_exact_match_survives_many_trigram_ties():
+    # Every term shares the query's trigrams; the exact one must not be cut by the candidate cap
+    index = SymptomIndex([f"Pain in region {i}" for i in range(20000)] + ["Pain"])
+    results = index.search("pain")
+    assert results[0] == {"symptom": "Pain", "matched": "Pain", "score": (0, 0)}
+    assert [r["symptom"] for r in index.search("pain in region 12345")][:1] == ["Pain in region 12345"]
+
+
+def test_transposed_letters_are_found_among_many_terms():
+    index = SymptomIndex([f"Pain in region {i}" for i in range(20000)] + ["Pain", "Fever"])
+    assert index.search("pian")[0]["symptom"] == "Pain"
+    assert index.search("fveer")[0]["symptom"] == "Fever"
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+import user_store
+from user_store import JsonUserStore, SQLiteUserStore, UserStore, migrate_json
+
+USERS = {"ana": {"name": "Ana", "password": "h1"}, "bo": {"name": "Bo", "password": "h2"}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteUserStore(str(tmp_path / "users.sqlite3"))
+
+
+@pytest.mark.parametrize("backend", [SQLiteUserStore, JsonUserStore])
+def test_add_and_get(tmp_path, backend):
+    users = backend(str(tmp_path / "users.db"))
+    assert users.add("ana", "Ana", "h1")
+    assert not users.add("ana", "Other", "h2")
+    assert users.get("ana") == {"name": "Ana", "password": "h1"}
+    assert users.get("nobody") is None
+    assert users.count() == 1
+
+
+def test_backends_must_implement_the_interface():
+    with pytest.raises(TypeError):
+        UserStore()
+
+    class Partial(UserStore):
+        def get(self, username):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_migrates_and_renames(tmp_path, store):
+    legacy = tmp_path / "user_db.json"
+    legacy.write_text(json.dumps(USERS))
+    assert migrate_json(store, str(legacy)) == 2
+    assert store.get("bo") == USERS["bo"]
+    assert not legacy.exists() and (tmp_path / "user_db.json.migrated").exists()
+    assert migrate_json(store, str(legacy)) == 0
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps(["ana"]), json.dumps({"ana": {"name": "Ana"}})])
+def test_unparseable_file_is_kept(tmp_path, store, content):
+    legacy = tmp_path / "user_db.json"
+    legacy.write_text(content)
+    assert migrate_json(store, str(legacy)) == 0
+    assert legacy.read_text() == content
+    assert store.count() == 0
+
+
+def test_failed_import_keeps_the_file(tmp_path, store, monkeypatch):
+    legacy = tmp_path / "user_db.json"
+    legacy.write_text(json.dumps(USERS))
+
+    def fail(users):
+        raise user_store.sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(store, "add_many", fail)
+    with pytest.raises(user_store.sqlite3.OperationalError):
+        migrate_json(store, str(legacy))
+    assert legacy.exists()
+
+
+def test_losing_the_rename_race_counts_as_migrated(tmp_path, store, monkeypatch):
+    legacy = tmp_path / "user_db.json"
+    legacy.write_text(json.dumps(USERS))
+    real_replace = os.replace
+
+    def other_process_first(src, dst):
+        # The other process renames between our import and our rename
+        real_replace(src, dst)
+        real_replace(src, dst)
+    monkeypatch.setattr(user_store.os, "replace", other_process_first)
+    assert migrate_json(store, str(legacy)) == 2
+    assert (tmp_path / "user_db.json.migrated").exists()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from voice_features import FEATURE_NAMES, VoiceAnalysisError, _decode, analyze, extract_features
+
+RATE = 22050
+
+
+def _vowel(seconds=2.0, f0=140.0, seed=0):
+    """A sustained vowel: slightly wandering pitch, five harmonics, a little noise."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE)
+    pitch = f0 * (1 + 0.00003 * rng.standard_normal(n).cumsum())
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    return 0.5 * sum(np.sin(k * phase) / k for k in range(1, 6)) + 0.005 * rng.standard_normal(n)
+
+
+def _wav(x, channels=1):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(np.repeat(x, channels), -1, 1) * 32767).astype('<i2').tobytes())
+    buf.seek(0)
+    return buf
+
+
+def test_sustained_vowel_gives_every_feature():
+    features, info = analyze(_wav(_vowel()))
+    assert list(features) == FEATURE_NAMES
+    assert all(np.isfinite(v) for v in features.values())
+    assert features["MDVP:Fo(Hz)"] == pytest.approx(140, rel=0.03)
+    assert features["MDVP:Flo(Hz)"] <= features["MDVP:Fo(Hz)"] <= features["MDVP:Fhi(Hz)"]
+    assert info["duration_s"] == pytest.approx(2.0) and info["voiced_fraction"] > 0.9
+
+
+def test_result_does_not_depend_on_block_size():
+    x = _vowel(seed=1)
+    whole, _ = analyze(_wav(x))
+    streamed, _ = analyze(_wav(x), block=3000)
+    np.testing.assert_allclose([streamed[k] for k in FEATURE_NAMES], [whole[k] for k in FEATURE_NAMES], rtol=1e-9)
+
+
+def test_stereo_is_mixed_to_mono():
+    x = _vowel(seed=2)
+    assert extract_features(_wav(x, channels=2)) == pytest.approx(extract_features(_wav(x)), rel=1e-6)
+
+
+@pytest.mark.parametrize("width, raw, expected", [
+    (1, bytes([128, 192, 0]), [0.0, 0.5, -1.0]),
+    (2, np.array([0, 16384, -32768], '<i2').tobytes(), [0.0, 0.5, -1.0]),
+    (3, bytes([0, 0, 0, 0, 0, 0x40, 0, 0, 0x80]), [0.0, 0.5, -1.0]),
+    (4, np.array([0, 1 << 30, -(1 << 31)], '<i4').tobytes(), [0.0, 0.5, -1.0]),
+])
+def test_decode_sample_widths(width, raw, expected):
+    np.testing.assert_allclose(_decode(raw, width, 1), expected)
+
+
+@pytest.mark.parametrize("data, match", [
+    (_wav(np.zeros(RATE)), "No sustained voicing"),
+    (_wav(np.zeros(0)), "empty"),
+    (io.BytesIO(b"not a wav file at all"), "Not a readable PCM WAV"),
+])
+def test_unusable_recordings_are_rejected(data, match):
+    with pytest.raises(VoiceAnalysisError, match=match):
+        analyze(data)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+import model_registry
+import warmup
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_sklearn_is_only_warmed_for_pickled_models(monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_ARTIFACT", None)
+    assert "sklearn" in warmup.heavy_modules()
+    monkeypatch.setattr(model_registry, "MODEL_ARTIFACT", "models.medi")
+    assert "sklearn" not in warmup.heavy_modules()
+    assert "numpy" in warmup.heavy_modules()
+
+
+def test_warm_up_from_an_artifact_never_imports_sklearn(tmp_path):
+    artifact = str(tmp_path / "models.medi")
+    env = {**os.environ, "MEDI_MODEL_ARTIFACT": artifact}
+    subprocess.run([sys.executable, "model_artifact.py", "export", "-o", artifact],
+                   cwd=APP_DIR, env={**os.environ}, check=True, capture_output=True)
+    code = "import sys, warmup; r = warmup.warm_up(); print(r['errors'] or 'sklearn' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=env, check=True, capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
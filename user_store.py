@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Pluggable user account storage.
+
+The default backend is an embedded SQLite database in WAL mode with the
+username as primary key, so logins are indexed B-tree lookups and signups
+are atomic inserts. The original JSON file format is still available as
+a backend and is migrated into SQLite once, on first use.
+
+Select the backend with MEDI_USER_STORE=sqlite|json and the file with
+MEDI_USER_DB.
+"""
+
+import abc
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+LEGACY_JSON = 'user_db.json'
+DEFAULT_SQLITE = 'user_db.sqlite3'
+
+logger = logging.getLogger("medi.users")
+
+
+class UserStore(abc.ABC):
+    """Interface shared by all backends."""
+
+    @abc.abstractmethod
+    def get(self, username):
+        """Returns {'name': ..., 'password': ...} or None."""
+
+    @abc.abstractmethod
+    def add(self, username, name, password_hash):
+        """Creates the user; returns False if the username is taken."""
+
+    @abc.abstractmethod
+    def count(self):
+        """Returns the number of registered users."""
+
+
+class SQLiteUserStore(UserStore):
+    """Indexed, concurrency-safe store backed by SQLite in WAL mode."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            " username TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " password TEXT NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; WAL lets readers run alongside a writer
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, username):
+        row = self._conn().execute(
+            "SELECT name, password FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        return {"name": row[0], "password": row[1]} if row else None
+
+    def add(self, username, name, password_hash):
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (username, name, password) VALUES (?, ?, ?)",
+                    (username, name, password_hash),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_many(self, users):
+        """Bulk-inserts {username: {'name', 'password'}}; existing users are kept."""
+        conn = self._conn()
+        with conn:
+            cur = conn.executemany(
+                "INSERT OR IGNORE INTO users (username, name, password) VALUES (?, ?, ?)",
+                ((u, d["name"], d["password"]) for u, d in users.items()),
+            )
+        return cur.rowcount
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def load_users(path=LEGACY_JSON):
+    """Loads users from JSON file. If not exists, returns empty dict."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_users(users, path=LEGACY_JSON):
+    """Saves users to JSON file, replacing it atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(users, f)
+    os.replace(tmp, path)
+
+
+class JsonUserStore(UserStore):
+    """The original whole-file JSON format, serialized by a process lock."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        return load_users(self.path).get(username)
+
+    def add(self, username, name, password_hash):
+        with self._lock:
+            users = load_users(self.path)
+            if username in users:
+                return False
+            users[username] = {"name": name, "password": password_hash}
+            save_users(users, self.path)
+        return True
+
+    def count(self):
+        return len(load_users(self.path))
+
+
+def migrate_json(store, json_path):
+    """One-shot import of a legacy JSON user file; the file is renamed once it has been imported.
+
+    A file that cannot be read or parsed is left in place (and logged) so
+    no accounts are lost; it is retried on the next start.
+    """
+    try:
+        with open(json_path, 'r') as f:
+            users = json.load(f)
+        if not isinstance(users, dict) or not all(
+                isinstance(u, dict) and "name" in u and "password" in u for u in users.values()):
+            raise ValueError("expected {username: {'name', 'password'}}")
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning("Not migrating %s: %s", json_path, e)
+        return 0
+    added = store.add_many(users)
+    try:
+        os.replace(json_path, json_path + '.migrated')
+    except FileNotFoundError:
+        # Another process imported and renamed it first; the inserts above were no-ops
+        pass
+    return added
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_user_store():
+    """Returns the process-wide user store, creating (and migrating) it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.environ.get("MEDI_USER_STORE", "sqlite")
+                if backend == "json":
+                    _store = JsonUserStore(os.environ.get("MEDI_USER_DB", LEGACY_JSON))
+                else:
+                    store = SQLiteUserStore(os.environ.get("MEDI_USER_DB", DEFAULT_SQLITE))
+                    migrate_json(store, LEGACY_JSON)
+                    _store = store
+    return _store
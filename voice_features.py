@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Acoustic feature extraction for the Parkinson's model.
+
+Turns a WAV recording of a sustained vowel ("aaah") into the 22 voice
+measurements `parkinsons_model` was trained on (the UCI Oxford
+Parkinson's set): pitch (Fo/Fhi/Flo), jitter and shimmer variants,
+NHR/HNR, the nonlinear measures RPDE, DFA and D2, and the pitch-entropy
+measures spread1, spread2 and PPE.
+
+The file is read block by block and cut into overlapping frames that are
+analysed in batches with one FFT-based autocorrelation per batch, so
+memory stays bounded by the block size plus a few floats per 10 ms frame.
+Only a short voiced excerpt (EXCERPT_SECONDS, decimated to about
+NONLINEAR_RATE Hz) is kept for the nonlinear measures.
+
+Perturbation measures are computed from frame-level pitch periods and
+peak amplitudes (10 ms hop) rather than individual glottal cycles, and
+spread1/spread2/PPE follow Little et al. (2009) on a whitened semitone
+pitch contour. Values land on the same scales as the training data but
+are not bit-for-bit equal to the original MDVP/MATLAB tools.
+
+    python voice_features.py recording.wav [--predict]
+"""
+
+import argparse
+import sys
+import time
+import wave
+
+import numpy as np
+
+from model_registry import FEATURES
+
+FEATURE_NAMES = FEATURES["parkinsons"]
+
+BLOCK_SAMPLES = 1 << 16
+FRAME_SECONDS = 0.05
+HOP_SECONDS = 0.01
+F0_MIN, F0_MAX = 60.0, 600.0
+# A shorter lag wins if its peak reaches this share of the strongest one
+OCTAVE_RATIO = 0.9
+VOICING_THRESHOLD = 0.45
+SILENCE_RATIO = 0.05
+MIN_VOICED_FRAMES = 10
+
+EXCERPT_SECONDS = 1.0
+NONLINEAR_RATE = 11025
+EMBED_DELAY_SECONDS = 0.0014
+RPDE_EPSILON = 0.12
+RPDE_TMAX_SECONDS = 0.04
+RPDE_POINTS = 2000
+DFA_SCALES_SECONDS = (0.002, 0.01)
+D2_DIMENSION = 8
+D2_POINTS = 1000
+
+# Reference pitch (Hz) of the semitone scale used by Little et al.
+SEMITONE_REF = 127.09
+
+
+class VoiceAnalysisError(ValueError):
+    """The recording cannot be analysed (format, length or no voicing)."""
+
+
+# ---------------------------------------------------------
+#  STREAMING WAV INPUT
+# ---------------------------------------------------------
+def _decode(raw, width, channels):
+    """PCM bytes -> mono float64 samples in [-1, 1)."""
+    if width == 1:
+        x = (np.frombuffer(raw, np.uint8).astype(np.float64) - 128.0) / 128.0
+    elif width == 2:
+        x = np.frombuffer(raw, '<i2') / 32768.0
+    elif width == 3:
+        b = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+        v = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        x = np.where(v >= 1 << 23, v - (1 << 24), v) / float(1 << 23)
+    elif width == 4:
+        x = np.frombuffer(raw, '<i4') / 2147483648.0
+    else:
+        raise VoiceAnalysisError(f"Unsupported sample width: {width} bytes.")
+    if channels > 1:
+        x = x.reshape(-1, channels).mean(axis=1)
+    return x
+
+
+def read_blocks(source, block=BLOCK_SAMPLES):
+    """Yields (sample_rate, samples) blocks from a PCM WAV path or file object."""
+    try:
+        wav = wave.open(source, 'rb')
+    except (wave.Error, EOFError) as e:
+        raise VoiceAnalysisError("Not a readable PCM WAV file (8/16/24/32-bit integer samples).") from e
+    with wav:
+        rate, width, channels = wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+        while True:
+            raw = wav.readframes(block)
+            if not raw:
+                break
+            yield rate, _decode(raw, width, channels)
+
+
+# ---------------------------------------------------------
+#  FRAME-BATCHED PITCH TRACKING
+# ---------------------------------------------------------
+class _FrameAnalyzer:
+    """Consumes sample blocks; keeps per-frame pitch, voicing strength and amplitude."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.frame = int(round(FRAME_SECONDS * rate))
+        self.hop = int(round(HOP_SECONDS * rate))
+        self.window = np.hanning(self.frame)
+        self.nfft = 1 << int(np.ceil(np.log2(2 * self.frame)))
+        self.lag_min = max(2, int(rate / F0_MAX))
+        self.lag_max = min(int(np.ceil(rate / F0_MIN)), self.frame // 2)
+        if self.lag_max <= self.lag_min + 1:
+            raise VoiceAnalysisError(f"Sample rate {rate} Hz is too low for pitch analysis.")
+        # Autocorrelation of the window, to undo its taper (Boersma 1993)
+        wac = np.fft.irfft(np.abs(np.fft.rfft(self.window, self.nfft)) ** 2, self.nfft)[:self.lag_max + 2]
+        self.window_ac = wac / wac[0]
+
+        self.carry = np.zeros(0)
+        self.frames_done = 0
+        self.parts = []
+        self.excerpt, self.excerpt_len, self.excerpt_next = [], 0, None
+        self.excerpt_max = int(EXCERPT_SECONDS * rate)
+
+    def feed(self, block):
+        buf = np.concatenate((self.carry, block)) if len(self.carry) else block
+        buf_start = self.frames_done * self.hop
+        n = 0 if len(buf) < self.frame else 1 + (len(buf) - self.frame) // self.hop
+        if n:
+            frames = np.lib.stride_tricks.sliding_window_view(buf, self.frame)[::self.hop][:n]
+            f0, strength, amp, rms = self._analyze(frames)
+            self.parts.append((f0, strength, amp, rms))
+            if self.excerpt_next is None:
+                started = np.flatnonzero((strength >= VOICING_THRESHOLD) & (rms > 1e-3))
+                if len(started):
+                    self.excerpt_next = buf_start + int(started[0]) * self.hop
+        if self.excerpt_next is not None and self.excerpt_len < self.excerpt_max:
+            take = buf[self.excerpt_next - buf_start:][:self.excerpt_max - self.excerpt_len]
+            self.excerpt.append(take.copy())
+            self.excerpt_len += len(take)
+            self.excerpt_next += len(take)
+        self.frames_done += n
+        self.carry = buf[n * self.hop:].copy()
+
+    def _analyze(self, frames):
+        x = frames - frames.mean(axis=1, keepdims=True)
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        amp = 0.5 * (frames.max(axis=1) - frames.min(axis=1))
+        spec = np.fft.rfft(x * self.window, self.nfft, axis=1)
+        ac = np.fft.irfft(spec.real ** 2 + spec.imag ** 2, self.nfft, axis=1)[:, :self.lag_max + 2]
+        r = ac / np.maximum(ac[:, :1], 1e-20) / self.window_ac
+
+        # First local maximum close to the global one; avoids octave-down errors
+        seg = r[:, self.lag_min - 1:self.lag_max + 2]
+        centre = seg[:, 1:-1]
+        peaks = (centre > seg[:, :-2]) & (centre >= seg[:, 2:])
+        strong = peaks & (centre >= OCTAVE_RATIO * centre.max(axis=1, keepdims=True))
+        k = np.where(strong.any(axis=1), np.argmax(strong, axis=1), np.argmax(centre, axis=1)) + self.lag_min
+        rows = np.arange(len(k))
+        a, b, c = r[rows, k - 1], r[rows, k], r[rows, k + 1]
+        denom = a - 2 * b + c
+        shift = np.where(denom < 0, 0.5 * (a - c) / np.where(denom < 0, denom, -1.0), 0.0)
+        shift = np.clip(shift, -0.5, 0.5)
+        peak = np.clip(b - 0.25 * (a - c) * shift, 0.0, 0.999999)
+        return self.rate / (k + shift), peak, amp, rms
+
+    def results(self):
+        if not self.parts:
+            raise VoiceAnalysisError("The recording is too short to analyse.")
+        f0, strength, amp, rms = (np.concatenate(p) for p in zip(*self.parts))
+        excerpt = np.concatenate(self.excerpt) if self.excerpt else np.zeros(0)
+        return f0, strength, amp, rms, excerpt
+
+
+# ---------------------------------------------------------
+#  MEASURES
+# ---------------------------------------------------------
+def _longest_run(mask):
+    """(start, stop) of the longest run of True values."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    i = int(np.argmax(stops - starts))
+    return starts[i], stops[i]
+
+
+def _quotient(x, points):
+    """Mean absolute deviation from a centred `points`-point average, relative to mean(x)."""
+    points = min(points, len(x) - (1 - len(x) % 2))
+    if points < 3:
+        return 0.0
+    half = points // 2
+    smooth = np.convolve(x, np.ones(points) / points, mode='valid')
+    return float(np.mean(np.abs(x[half:len(x) - half] - smooth)) / np.mean(x))
+
+
+def _perturbation(periods, amps):
+    mean_t, mean_a = periods.mean(), amps.mean()
+    d_t = np.abs(np.diff(periods))
+    return {
+        "MDVP:Jitter(%)": float(d_t.mean() / mean_t),
+        "MDVP:Jitter(Abs)": float(d_t.mean()),
+        "MDVP:RAP": _quotient(periods, 3),
+        "MDVP:PPQ": _quotient(periods, 5),
+        "Jitter:DDP": float(np.mean(np.abs(np.diff(periods, 2))) / mean_t),
+        "MDVP:Shimmer": float(np.mean(np.abs(np.diff(amps))) / mean_a),
+        "MDVP:Shimmer(dB)": float(np.mean(np.abs(20 * np.log10(amps[1:] / amps[:-1])))),
+        "Shimmer:APQ3": _quotient(amps, 3),
+        "Shimmer:APQ5": _quotient(amps, 5),
+        "MDVP:APQ": _quotient(amps, 11),
+        "Shimmer:DDA": float(np.mean(np.abs(np.diff(amps, 2))) / mean_a),
+    }
+
+
+def _pitch_entropy(f0):
+    """spread1, spread2 and PPE from the whitened semitone pitch contour."""
+    semitones = 12 * np.log2(f0 / SEMITONE_REF)
+    if len(semitones) < 5:
+        return {"spread1": 0.0, "spread2": 0.0, "PPE": 0.0}
+    # Whiten with an order-2 linear predictor to remove smooth intonation
+    design = np.column_stack((semitones[1:-1], semitones[:-2], np.ones(len(semitones) - 2)))
+    coef, *_ = np.linalg.lstsq(design, semitones[2:], rcond=None)
+    residual = semitones[2:] - design @ coef
+    hist, _ = np.histogram(np.clip(residual, -3, 3), bins=60, range=(-3, 3))
+    p = hist[hist > 0] / hist.sum()
+    trend = np.polyval(np.polyfit(np.arange(len(semitones)), semitones, 1), np.arange(len(semitones)))
+    return {
+        "spread1": float(np.log(max(residual.std() * np.log(2) / 12, 1e-12))),
+        "spread2": float((semitones - trend).std()),
+        "PPE": float(-(p * np.log(p)).sum() / np.log(60)),
+    }
+
+
+def _embed(x, dim, delay):
+    n = len(x) - (dim - 1) * delay
+    return np.stack([x[i * delay:i * delay + n] for i in range(dim)], axis=1)
+
+
+def _rpde(x, delay, t_max):
+    """Recurrence period density entropy, normalised to [0, 1]."""
+    emb = _embed(x, 4, delay)
+    n = min(RPDE_POINTS, len(emb) - t_max)
+    if n < 50:
+        return 0.0
+    base = emb[:n]
+    left = np.zeros(n, bool)
+    period = np.zeros(n, np.int64)
+    for t in range(1, t_max + 1):
+        inside = np.max(np.abs(emb[t:t + n] - base), axis=1) < RPDE_EPSILON
+        hit = left & inside & (period == 0)
+        period[hit] = t
+        left |= ~inside
+    counts = np.bincount(period[period > 0], minlength=t_max + 1)[1:]
+    if counts.sum() == 0:
+        return 0.0
+    p = counts[counts > 0] / counts.sum()
+    return float(-(p * np.log(p)).sum() / np.log(t_max))
+
+
+def _dfa(x, rate):
+    """Detrended fluctuation scaling exponent, mapped through a logistic as in the dataset."""
+    y = np.cumsum(x - x.mean())
+    lo, hi = (max(4, int(s * rate)) for s in DFA_SCALES_SECONDS)
+    sizes = np.unique(np.geomspace(lo, max(hi, lo + 1), 12).astype(int))
+    fluct = []
+    for n in sizes:
+        seg = y[:len(y) // n * n].reshape(-1, n)
+        t = np.arange(n) - (n - 1) / 2
+        centred = seg - seg.mean(axis=1, keepdims=True)
+        slope = centred @ t / (t @ t)
+        fluct.append(np.sqrt(np.mean((centred - slope[:, None] * t) ** 2)))
+    alpha = np.polyfit(np.log(sizes), np.log(np.maximum(fluct, 1e-20)), 1)[0]
+    return float(1 / (1 + np.exp(-alpha)))
+
+
+def _correlation_dimension(x, delay):
+    """Grassberger-Procaccia D2 on a subsample of the delay embedding."""
+    emb = _embed(x, D2_DIMENSION, delay)
+    if len(emb) < 100:
+        return 0.0
+    idx = np.linspace(0, len(emb) - 1, min(D2_POINTS, len(emb))).astype(int)
+    pts = emb[idx]
+    sq = np.einsum('ij,ij->i', pts, pts)
+    dist = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2 * pts @ pts.T, 0.0))
+    # Skip temporally close pairs (Theiler window of one delay span)
+    far = np.abs(idx[:, None] - idx[None, :]) > D2_DIMENSION * delay
+    d = dist[np.triu(far, 1)]
+    d = d[d > 0]
+    if len(d) < 100:
+        return 0.0
+    radii = np.geomspace(np.percentile(d, 1), np.percentile(d, 20), 10)
+    d.sort()
+    corr = np.searchsorted(d, radii) / len(d)
+    return float(np.polyfit(np.log(radii), np.log(np.maximum(corr, 1e-12)), 1)[0])
+
+
+def _nonlinear(excerpt, rate):
+    if len(excerpt) < int(0.2 * rate):
+        raise VoiceAnalysisError("Need at least 0.2 s of continuous voicing.")
+    q = max(1, int(rate // NONLINEAR_RATE))
+    x = excerpt[:len(excerpt) // q * q].reshape(-1, q).mean(axis=1)
+    rate = rate / q
+    x = x / max(np.max(np.abs(x)), 1e-12)
+    delay = max(1, int(round(EMBED_DELAY_SECONDS * rate)))
+    return {
+        "RPDE": _rpde(x, delay, max(10, int(RPDE_TMAX_SECONDS * rate))),
+        "DFA": _dfa(x, rate),
+        "D2": _correlation_dimension(x, delay),
+    }
+
+
+# ---------------------------------------------------------
+#  ENTRY POINTS
+# ---------------------------------------------------------
+def analyze(source, block=BLOCK_SAMPLES):
+    """Returns ({feature: value} in model order, info dict) for a WAV recording."""
+    analyzer = None
+    samples = 0
+    for rate, chunk in read_blocks(source, block):
+        if analyzer is None:
+            analyzer = _FrameAnalyzer(rate)
+        analyzer.feed(chunk)
+        samples += len(chunk)
+    if analyzer is None:
+        raise VoiceAnalysisError("The recording is empty.")
+    f0, strength, amp, rms, excerpt = analyzer.results()
+
+    in_range = (f0 >= F0_MIN) & (f0 <= F0_MAX)
+    voiced = (strength >= VOICING_THRESHOLD) & (rms >= SILENCE_RATIO * rms.max()) & in_range & (amp > 0)
+    if voiced.sum() < MIN_VOICED_FRAMES:
+        raise VoiceAnalysisError("No sustained voicing found. Record a steady 'aaah' of a few seconds.")
+    start, stop = _longest_run(voiced)
+    if stop - start < 3:
+        raise VoiceAnalysisError("Voicing is too fragmented to measure jitter and shimmer.")
+
+    v_f0, v_strength = f0[voiced], strength[voiced]
+    measures = {
+        "MDVP:Fo(Hz)": float(v_f0.mean()),
+        "MDVP:Fhi(Hz)": float(v_f0.max()),
+        "MDVP:Flo(Hz)": float(v_f0.min()),
+        "NHR": float(np.mean((1 - v_strength) / v_strength)),
+        "HNR": float(np.mean(10 * np.log10(v_strength / (1 - v_strength)))),
+    }
+    measures.update(_perturbation(1.0 / f0[start:stop], amp[start:stop]))
+    measures.update(_pitch_entropy(f0[start:stop]))
+    measures.update(_nonlinear(excerpt, analyzer.rate))
+
+    info = {
+        "duration_s": samples / analyzer.rate,
+        "sample_rate": analyzer.rate,
+        "frames": len(f0),
+        "voiced_fraction": float(voiced.mean()),
+    }
+    return {name: measures[name] for name in FEATURE_NAMES}, info
+
+
+def extract_features(source):
+    """The 22 Parkinson's model inputs, in training column order."""
+    features, _ = analyze(source)
+    return [features[name] for name in FEATURE_NAMES]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract Parkinson's voice measurements from a WAV file.")
+    parser.add_argument('path')
+    parser.add_argument('--predict', action='store_true', help="Also score the recording with the model")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        features, info = analyze(args.path)
+    except VoiceAnalysisError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - t0
+    for name, value in features.items():
+        print(f"{name:<18} {value:>14.6f}")
+    print(f"\n{info['duration_s']:.2f} s of audio, {info['voiced_fraction']:.0%} voiced, "
+          f"analysed in {elapsed * 1000:.0f} ms ({info['duration_s'] / max(elapsed, 1e-9):.0f}x real time)")
+    if args.predict:
+        from fastpath import get_scorer
+        pred = get_scorer('parkinsons').predict([list(features.values())])[0]
+        print("Prediction:", "Parkinson's signs" if pred == 1 else "Healthy pattern")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Process warm-up for Medi-Predictor.
+
+The login page needs no ML, so eleventh.py imports numpy, pandas and the
+model modules only once a user is logged in. To keep the first
+prediction from absorbing that cost, `warm_up()` imports the heavy
+modules, loads and validates every model (fast-path parity check), runs
+one dummy prediction per model and starts the inference pool, timing
+each step for an import/load report.
+
+At server start the app calls `start()`, which by default runs the
+warm-up on a background thread so the login screen is served immediately.
+
+Configuration:
+    MEDI_WARMUP     background (default) | blocking | off
+
+    python warmup.py            # run the warm-up and print the report
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+
+MODE = os.environ.get("MEDI_WARMUP", "background")
+
+# Imported in dependency order so each line reports its own cost
+HEAVY_MODULES = (
+    "numpy", "pandas", "sklearn", "fastpath", "prediction_cache",
+    "inference_executor", "batch_scoring", "screening", "voice_features",
+)
+# Only unpickled models need these; a compact model artifact loads without them
+PICKLE_ONLY_MODULES = ("sklearn",)
+
+_report = {"status": "not started", "imports_ms": {}, "models_ms": {}, "errors": {}}
+_started = False
+_lock = threading.Lock()
+_done = threading.Event()
+
+
+def heavy_modules():
+    """The modules to import ahead of time for the configured model source."""
+    from model_registry import MODEL_ARTIFACT
+    return [m for m in HEAVY_MODULES if not (MODEL_ARTIFACT and m in PICKLE_ONLY_MODULES)]
+
+
+def warm_up():
+    """Imports heavy modules, loads and exercises every model; returns the report."""
+    _report["status"] = "running"
+    t_start = time.perf_counter()
+    for module in heavy_modules():
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            _report["errors"][module] = str(e)
+        _report["imports_ms"][module] = round((time.perf_counter() - t0) * 1000, 3)
+
+    try:
+        from model_registry import FEATURES, get_loaded
+        from fastpath import scorer_for
+        from inference_executor import get_executor
+    except ImportError as e:
+        _report["errors"]["models"] = str(e)
+    else:
+        for name, features in FEATURES.items():
+            t0 = time.perf_counter()
+            try:
+                # scorer_for verifies the compiled scorer against the pickle
+                scorer_for(name, get_loaded(name).model).predict([[0.0] * len(features)])
+            except Exception as e:
+                _report["errors"][name] = str(e)
+            _report["models_ms"][name] = round((time.perf_counter() - t0) * 1000, 3)
+        get_executor()
+
+    _report["total_ms"] = round((time.perf_counter() - t_start) * 1000, 3)
+    _report["status"] = "done"
+    _done.set()
+    return _report
+
+
+def start(mode=None):
+    """Runs the warm-up once per process according to MEDI_WARMUP."""
+    global _started
+    mode = mode or MODE
+    if mode == "off":
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+    if mode == "blocking":
+        warm_up()
+    else:
+        threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
+def wait(timeout=None):
+    """Blocks until a started warm-up has finished."""
+    return _done.wait(timeout)
+
+
+def report():
+    """The most recent warm-up report (import and model timings in ms)."""
+    return _report
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    result = warm_up()
+    print("Imports:")
+    for module, ms in result["imports_ms"].items():
+        print(f"  {module:<20} {ms:>10.1f} ms")
+    print("Models (load + validate + dummy predict):")
+    for name, ms in result["models_ms"].items():
+        print(f"  {name:<20} {ms:>10.1f} ms")
+    for what, err in result["errors"].items():
+        print(f"  ERROR {what}: {err}")
+    print(f"Total: {result['total_ms']:.1f} ms")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())